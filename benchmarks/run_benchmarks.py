@@ -0,0 +1,321 @@
+"""
+CPU benchmarks of the data pipeline, transforms, sampler, loss and evaluator.
+
+Runs offline on synthetic corpora (see `synthetic.py`), writes the timings to
+a JSON results file and compares them against a baseline JSON. Benchmarks
+whose median time exceeds the baseline by more than `--threshold` are
+reported as regressions and make the script exit with status 1.
+
+Usage (from the repository root):
+    python benchmarks/run_benchmarks.py --scales small medium
+    python benchmarks/run_benchmarks.py --update-baseline
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import numpy as np
+import torch
+
+from synthetic import SCALES, generate_corpus
+
+# (name, setup) pairs; setup(context) returns the callable to time, or None to skip
+BENCHMARKS: List[tuple] = []
+
+
+def benchmark(name: str):
+    def register(setup: Callable[[dict], Optional[Callable[[], None]]]):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+def _params(ctx: dict, **overrides):
+    from experiment.exp_params import ExpParams
+    defaults = dict(data_path=ctx["corpus"], device="cpu", use_manifest=False, num_workers=0)
+    return ExpParams(**{**defaults, **overrides})
+
+
+def _waveform_batch(ctx: dict, batch_size: int = 16) -> torch.Tensor:
+    return torch.randn(batch_size, int(ctx["sample_rate"] * 0.9))
+
+
+# === Corpus parsing and loading ===
+
+@benchmark("parse_dataset")
+def _parse_dataset(ctx):
+    from data_utils.parser import parse_dataset
+    return lambda: parse_dataset(ctx["corpus"], logger=ctx["logger"])
+
+
+@benchmark("parse_dataset_manifest")
+def _parse_dataset_manifest(ctx):
+    from data_utils.parser import parse_dataset
+    manifest_path = ctx["workdir"] / "manifest.jsonl"
+    parse_dataset(ctx["corpus"], logger=ctx["logger"], manifest_path=manifest_path)
+    return lambda: parse_dataset(ctx["corpus"], logger=ctx["logger"], manifest_path=manifest_path)
+
+
+@benchmark("dataset_getitem")
+def _dataset_getitem(ctx):
+    from data_utils.dataset import PhonemeDataset
+    from data_utils.parser import parse_dataset
+    file_paths, labels, _, lengths = parse_dataset(ctx["corpus"], logger=ctx["logger"])
+    dataset = PhonemeDataset(file_paths, labels, params=_params(ctx), lengths=lengths)
+
+    def run():
+        for i in range(len(dataset)):
+            dataset[i]
+    return run
+
+
+# === Transforms ===
+
+def _transform_benchmark(name: str, make: Callable[[dict], Callable], features: bool):
+    @benchmark(f"transform/{name}")
+    def setup(ctx):
+        transform = make(ctx)
+        if features:
+            from transforms.mfcc import MFCC
+            x = MFCC(sample_rate=ctx["sample_rate"])(_waveform_batch(ctx, 1)[0])
+        else:
+            x = _waveform_batch(ctx, 1)[0]
+
+        def run():
+            with torch.no_grad():
+                for _ in range(16):
+                    transform(x)
+        return run
+
+
+def _mfcc(ctx):
+    from transforms.mfcc import MFCC
+    return MFCC(sample_rate=ctx["sample_rate"])
+
+
+def _log_mel(ctx):
+    from transforms.log_mel import LogMelSpectrogram
+    return LogMelSpectrogram(sample_rate=ctx["sample_rate"])
+
+
+def _wavelet(ctx):
+    from transforms.wavelet import WaveletTransform
+    return WaveletTransform()
+
+
+def _torch_wavelet(ctx):
+    from transforms.wavelet import TorchWaveletTransform
+    return TorchWaveletTransform()
+
+
+def _time_mask(ctx):
+    from transforms.masking import RandomTimeMask
+    return RandomTimeMask(p=1.0)
+
+
+def _freq_mask(ctx):
+    from transforms.masking import RandomFreqMask
+    return RandomFreqMask(p=1.0)
+
+
+def _noise(ctx):
+    from transforms.noise import AddNoise
+    return AddNoise(p=1.0)
+
+
+def _compose(ctx):
+    from transforms.build_transforms import build_transforms
+    return build_transforms(_params(ctx, target_sr=ctx["sample_rate"]))
+
+
+for _name, _make, _features in [
+    ("mfcc", _mfcc, False),
+    ("log_mel", _log_mel, False),
+    ("wavelet", _wavelet, False),
+    ("torch_wavelet", _torch_wavelet, False),
+    ("time_mask", _time_mask, True),
+    ("freq_mask", _freq_mask, True),
+    ("noise", _noise, True),
+    ("compose", _compose, False),
+]:
+    _transform_benchmark(_name, _make, _features)
+
+
+@benchmark("transform/batch_feature_stage")
+def _batch_feature_stage(ctx):
+    from transforms.build_transforms import build_batch_transform
+    stage = build_batch_transform(_params(ctx, target_sr=ctx["sample_rate"]))
+    x = _waveform_batch(ctx)
+    return lambda: stage(x)
+
+
+# === Sampling, loss and evaluation ===
+
+@benchmark("contrastive_batch_sampler")
+def _contrastive_batch_sampler(ctx):
+    from utils.samplers import ContrastiveBatchSampler
+    labels = np.random.RandomState(0).randint(0, 200, size=50_000)
+    sampler = ContrastiveBatchSampler(labels, classes_per_batch=16, samples_per_class=4, views_per_sample=2)
+    return lambda: sum(1 for _ in sampler)
+
+
+@benchmark("supcon_loss")
+def _supcon_loss(ctx):
+    try:
+        from models.losses import SupervisedContrastiveLoss
+    except ImportError:
+        return None
+    criterion = SupervisedContrastiveLoss(temperature=0.07)
+    embeddings = torch.nn.functional.normalize(torch.randn(256, 128), dim=1).requires_grad_()
+    labels = torch.randint(0, 32, (256,))
+
+    def run():
+        criterion(embeddings, labels).backward()
+    return run
+
+
+def _evaluator_benchmark(probe: str):
+    @benchmark(f"evaluate_latent_classification/{probe}")
+    def setup(ctx):
+        from torch.utils.data import DataLoader, TensorDataset
+        from utils.evaluate_latent_classification import evaluate_latent_classification
+        rng = torch.Generator().manual_seed(0)
+        labels = torch.arange(40).repeat_interleave(25)
+        x = torch.randn(40, 128, generator=rng)[labels] + torch.randn(len(labels), 128, generator=rng)
+        loader = DataLoader(TensorDataset(x, labels), batch_size=64)
+        model = torch.nn.Identity()
+        return lambda: evaluate_latent_classification(model, loader, torch.device("cpu"), probe=probe)
+
+
+for _probe in ["knn", "ridge", "centroid", "random_forest"]:
+    _evaluator_benchmark(_probe)
+
+
+# === Runner ===
+
+def time_callable(fn: Callable[[], None], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(times), "min_s": min(times), "repeat": repeat}
+
+
+def machine_info() -> Dict[str, str]:
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+    }
+
+
+def run(scales: List[str], repeat: int, only: Optional[str], workdir: Path) -> Dict[str, Dict]:
+    import logging
+    logger = logging.getLogger("benchmarks")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    results = {}
+    for scale_name in scales:
+        scale = SCALES[scale_name]
+        corpus = workdir / f"corpus_{scale_name}"
+        generate_corpus(corpus, scale)
+        ctx = {
+            "corpus": corpus,
+            "workdir": workdir / scale_name,
+            "sample_rate": 16000,
+            "logger": logger,
+        }
+        ctx["workdir"].mkdir(parents=True, exist_ok=True)
+
+        for name, setup in BENCHMARKS:
+            key = f"{scale_name}/{name}"
+            if only and only not in key:
+                continue
+            fn = setup(ctx)
+            if fn is None:
+                print(f"{key:<50} skipped (not available in this tree)")
+                continue
+            results[key] = time_callable(fn, repeat)
+            print(f"{key:<50} {results[key]['median_s'] * 1000:10.2f} ms")
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict, threshold: float) -> List[str]:
+    """Return the benchmarks whose median exceeds the baseline median by more than `threshold`."""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get("results", {}).get(key)
+        if reference is None:
+            continue
+        ratio = result["median_s"] / reference["median_s"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{key}: {ratio:.2f}x baseline "
+                               f"({result['median_s'] * 1000:.2f} ms vs {reference['median_s'] * 1000:.2f} ms)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", default=["small"], choices=sorted(SCALES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=1, help="torch intra-op threads")
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this string")
+    parser.add_argument("--baseline", type=Path, default=Path(__file__).resolve().parent / "baseline.json")
+    parser.add_argument("--output", type=Path, default=Path(__file__).resolve().parent / "results.json")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown, e.g. 0.25 for +25%%")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--workdir", type=Path, help="Where synthetic corpora are kept (temporary if unset)")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or Path(tmp)
+        results = run(args.scales, args.repeat, args.only, workdir)
+
+    report = {"machine": machine_info(), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline or not args.baseline.exists():
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("machine") != report["machine"]:
+        print("Warning: the baseline was recorded on a different machine or setup")
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond +{args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"No regressions beyond +{args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Synthetic phoneme-like stimuli in the corpus filename-label convention.
+
+Files are named `<label><index> (<speaker>).wav`, where the label is 1-4
+lowercase letters (see `data_utils.parser.extract_label`), and are split
+into `CV/` and `VCV/` subdirectories like the real stimulus set.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+import itertools
+import math
+
+import numpy as np
+import torch
+import torchaudio
+
+CONSONANTS = "bdgkmnprstvz"
+VOWELS = "aeiou"
+
+
+@dataclass(frozen=True)
+class CorpusScale:
+    n_classes: int
+    files_per_class: int
+    sample_rates: Sequence[int] = (44100,)
+    min_ms: int = 250
+    max_ms: int = 900
+
+
+SCALES: Dict[str, CorpusScale] = {
+    "small": CorpusScale(n_classes=6, files_per_class=4, sample_rates=(16000, 44100)),
+    "medium": CorpusScale(n_classes=24, files_per_class=10, sample_rates=(22050, 44100)),
+    "large": CorpusScale(n_classes=48, files_per_class=40, sample_rates=(16000, 22050, 44100)),
+}
+
+
+def class_labels(n_classes: int) -> List[str]:
+    """CV ("ba") and VCV ("aba") labels, up to 4 letters each."""
+    cv = [c + v for c, v in itertools.product(CONSONANTS, VOWELS)]
+    vcv = [v + c + v for c, v in itertools.product(CONSONANTS, VOWELS)]
+    labels = cv + vcv
+    if n_classes > len(labels):
+        raise ValueError(f"At most {len(labels)} synthetic classes are supported")
+    return labels[:n_classes]
+
+
+def synth_phoneme(label: str, n_samples: int, sample_rate: int, rng: np.random.RandomState) -> np.ndarray:
+    """
+    A burst of noise for the consonant followed by a two-formant vowel, with speaker jitter.
+    """
+    t = np.arange(n_samples) / sample_rate
+    vowel = next((ch for ch in reversed(label) if ch in VOWELS), "a")
+    f1 = 300 + 120 * VOWELS.index(vowel) * rng.uniform(0.9, 1.1)
+    f2 = 900 + 350 * VOWELS.index(vowel) * rng.uniform(0.9, 1.1)
+    pitch = rng.uniform(90, 220)
+
+    voiced = np.sin(2 * np.pi * pitch * t) * (np.sin(2 * np.pi * f1 * t) + 0.5 * np.sin(2 * np.pi * f2 * t))
+    onset = int(n_samples * rng.uniform(0.1, 0.3))
+    burst = np.zeros(n_samples)
+    burst[:onset] = rng.randn(onset) * (0.2 + 0.05 * CONSONANTS.find(label[0] if label[0] in CONSONANTS else label[1]))
+
+    envelope = np.minimum(1.0, np.minimum(t, t[-1] - t) / 0.02)
+    waveform = 0.3 * envelope * (burst + voiced * (t > t[onset]))
+    return waveform.astype(np.float32)
+
+
+def generate_corpus(root: Path, scale: CorpusScale, seed: int = 0) -> List[Path]:
+    """
+    Write a synthetic corpus under `root` (existing files are kept).
+
+    Returns:
+        List[Path]: The written files
+    """
+    rng = np.random.RandomState(seed)
+    paths = []
+    for label in class_labels(scale.n_classes):
+        subdir = root / ("VCV" if len(label) == 3 else "CV")
+        subdir.mkdir(parents=True, exist_ok=True)
+        for i in range(scale.files_per_class):
+            sample_rate = scale.sample_rates[rng.randint(len(scale.sample_rates))]
+            duration_ms = rng.uniform(scale.min_ms, scale.max_ms)
+            n_samples = int(math.ceil(duration_ms * sample_rate / 1000))
+            waveform = synth_phoneme(label, n_samples, sample_rate, rng)
+            path = subdir / f"{label}{i + 1} (s{i % 5 + 1}).wav"
+            if not path.exists():
+                torchaudio.save(str(path), torch.from_numpy(waveform).unsqueeze(0), sample_rate)
+            paths.append(path)
+    return paths
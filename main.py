@@ -1,6 +1,8 @@
+import os
 from pathlib import Path
 from experiment.exp_params import ExpParams
 from experiment.experiment import Experiment
+from experiment.distributed import init_from_env, launch
 
 if __name__ == "__main__":
     params = ExpParams(
@@ -49,11 +51,19 @@ if __name__ == "__main__":
 
         # === Contrastive Loss ===
         temperature=0.07,
+        queue_size=0,
+        queue_momentum=0.0,
 
         # === Evaluation ===
         eval_classifier_every=1,
+        eval_probe="knn",
         use_kfold=True,
         n_splits=5,
+        parallel_folds=1,
+
+        # === Distributed ===
+        world_size=1,
+        dist_backend="gloo",
 
         # === Logging ===
         console_log_level="debug",
@@ -62,5 +72,12 @@ if __name__ == "__main__":
         mode="train"
     )
 
-    experiment = Experiment(params=params)
-    experiment.train()
+    # world_size > 1 spawns the ranks here; under torchrun each process is already one rank
+    if params.mode == "train" and params.world_size > 1 and "WORLD_SIZE" not in os.environ:
+        launch(params)
+    else:
+        experiment = Experiment(params=params, dist_ctx=init_from_env(params.dist_backend))
+        if params.mode == "precompute":
+            experiment.precompute_features()
+        else:
+            experiment.train()
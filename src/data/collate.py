@@ -0,0 +1,107 @@
+"""
+Collation with per-batch padding and length masks.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+import inspect
+
+import torch
+import torch.nn as nn
+
+
+def pad_collate(batch: Sequence[Tuple[torch.Tensor, int]]) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Collate (x, label) pairs of different lengths, padding only to the longest item.
+
+    Items are right-padded with zeros along their last dimension (samples for
+    waveforms, frames for features).
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor, torch.Tensor]: Padded inputs
+            [B, ..., N], labels [B] and a [B, N] bool mask that is True on
+            real samples/frames
+    """
+    items = [x for x, _ in batch]
+    lengths = torch.tensor([x.shape[-1] for x in items])
+    longest = int(lengths.max())
+
+    x = items[0].new_zeros((len(items), *items[0].shape[:-1], longest))
+    for i, item in enumerate(items):
+        x[i, ..., :item.shape[-1]] = item
+
+    labels = torch.tensor([label for _, label in batch])
+    mask = torch.arange(longest) < lengths.unsqueeze(1)
+    return x, labels, mask
+
+
+def flatten_views(batch: Sequence[Tuple[torch.Tensor, int]]) -> List[Tuple[torch.Tensor, int]]:
+    """Turn ([n_views, ...], label) items into one (view, label) item per view, views of a clip adjacent."""
+    return [(view, label) for views, label in batch for view in views]
+
+
+def multiview_collate(batch: Sequence[Tuple[torch.Tensor, int]]) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Collate multi-view items into a flat batch of B * n_views views.
+
+    Every view keeps its clip's label, so the views of a clip are positives
+    for each other in a supervised contrastive loss.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor]: Views [B * n_views, ...] and labels [B * n_views]
+    """
+    x = torch.cat([views for views, _ in batch])
+    labels = torch.tensor([label for views, label in batch for _ in range(len(views))])
+    return x, labels
+
+
+def multiview_pad_collate(batch: Sequence[Tuple[torch.Tensor, int]]) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """`multiview_collate` with per-batch padding: returns views, labels and a [B * n_views, N] mask."""
+    return pad_collate(flatten_views(batch))
+
+
+def resize_mask(mask: torch.Tensor, n_frames: int) -> torch.Tensor:
+    """
+    Map a [B, N] sample mask onto `n_frames` output frames.
+
+    Each example keeps the same fraction of frames as of samples, rounded up,
+    which matches framed transforms (STFT, DWT) up to their edge frames.
+    """
+    if mask.shape[-1] == n_frames:
+        return mask
+    lengths = mask.sum(dim=-1)
+    frame_lengths = torch.ceil(lengths * n_frames / mask.shape[-1]).long()
+    return torch.arange(n_frames, device=mask.device) < frame_lengths.unsqueeze(1)
+
+
+def apply_mask(x: torch.Tensor, mask: torch.Tensor) -> torch.Tensor:
+    """Zero the padded frames of a [B, ..., T] batch given a [B, T] mask."""
+    mask = mask.reshape(mask.shape[0], *([1] * (x.ndim - 2)), mask.shape[-1])
+    return x * mask.to(x.dtype)
+
+
+def unpack_batch(batch: Sequence[torch.Tensor]) -> Tuple[torch.Tensor, torch.Tensor, Optional[torch.Tensor]]:
+    """Split a DataLoader batch into (x, labels, mask), with mask None for default collation."""
+    x, y, *rest = batch
+    return x, y, rest[0] if rest else None
+
+
+def accepts_mask(model: nn.Module) -> bool:
+    """Whether the model's forward takes a `mask` argument."""
+    # Look through wrappers such as `CompiledCallable` and `DistributedDataParallel`
+    model = getattr(model, "__wrapped__", model)
+    model = getattr(model, "module", model)
+    try:
+        return "mask" in inspect.signature(model.forward).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def embed(model: nn.Module, x: torch.Tensor, mask: Optional[torch.Tensor] = None) -> torch.Tensor:
+    """
+    Run `model` on a batch, passing the frame mask when the model supports one.
+
+    Models without mask support still see zeros in the padded frames.
+    """
+    if mask is not None and accepts_mask(model):
+        return model(x, mask=resize_mask(mask, x.shape[-1]))
+    return model(x)
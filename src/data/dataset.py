@@ -4,17 +4,26 @@ from torch.utils.data import Dataset
 import torchaudio
 import torch
 from pathlib import Path
-from typing import Callable, Optional
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+import math
 import random
 
 from experiment.exp_params import ExpParams
+from data_utils.waveform_arena import WaveformArena
+from data_utils.feature_store import FeatureStore
+from data_utils.resample import resample
+from utils.profiler import stage
 
 
 class PhonemeDataset(Dataset):
     """
     A dataset for phoneme classification from WAV files.
 
-    Each sample is a (waveform, label) pair, optionally transformed.
+    Each sample is a (waveform, label) pair, optionally transformed. With
+    `params.n_views > 1` each sample is decoded once and returned as
+    n_views independently padded and transformed views stacked on a new
+    first dimension ([n_views, ...], label); see `multiview_collate`.
     """
 
     def __init__(
@@ -23,17 +32,163 @@ class PhonemeDataset(Dataset):
             labels: list[int],
             params: ExpParams,
             transform: Optional[Callable[[torch.Tensor], torch.Tensor]] = None,
+            lengths: Optional[list[int]] = None,
+            arena: Optional[WaveformArena] = None,
+            feature_store: Optional[FeatureStore] = None,
     ) -> None:
 
         # File paths and labels must have the same length
-        assert len(file_paths) == len(labels)  # src/data/dataset.py
-import torch
-import torchaudio
-from torch.utils.data import Dataset
-from pathlib import Path
-import numpy as np
-from typing import Dict, List, Optional, Callable, Tuple
-import random
+        assert len(file_paths) == len(labels)
+        assert lengths is None or len(lengths) == len(file_paths)
+
+        self.file_paths = file_paths
+        self.labels = labels
+        self.label_array = np.asarray(labels, dtype=np.int64)
+        self.transform = transform
+        self.params = params
+        self.target_sr = params.target_sr
+        self.lengths = lengths
+        self.arena = arena
+        self.feature_store = feature_store
+        self.max_length = params.max_length or self._estimate_max_length()
+        self.n_augment = params.n_augment
+        self.n_views = params.n_views
+        self.pad_strategy = params.pad_strategy
+        self.dynamic_padding = params.dynamic_padding
+
+
+    def __len__(self) -> int:
+        """Return the number of samples in the dataset."""
+        return len(self.file_paths) * self.n_augment
+    
+    def __getitem__(self, idx: int) -> tuple[torch.Tensor, int]:
+        
+        # Account for augmentations
+        true_idx = idx % len(self.file_paths)
+        
+        label = self.labels[true_idx]
+
+        # Precomputed features only need the random augmentations on top
+        if self.feature_store is not None:
+            with stage("feature_store"):
+                features = self.feature_store.features_for(true_idx)
+            return self._emit_views(lambda: self._place_features(features, true_idx)), label
+
+        waveform = self.load_waveform(true_idx)
+        return self._emit_views(lambda: self._place_waveform(waveform)), label
+
+    def _emit_views(self, place: Callable[[], torch.Tensor]) -> torch.Tensor:
+        """
+        Pad (via `place`) and transform the decoded sample once per view.
+
+        Returns one view, or n_views views stacked on a new first dimension.
+        """
+        views = []
+        for _ in range(self.n_views):
+            x = place()
+            if self.transform:
+                with stage("transform"):
+                    x = self.transform(x)
+            views.append(x)
+        return views[0] if self.n_views == 1 else torch.stack(views)
+
+    def _place_waveform(self, waveform: torch.Tensor) -> torch.Tensor:
+        # Apply random zero padding before transform (or leave it to `pad_collate`)
+        if self.dynamic_padding:
+            return waveform[..., :self.max_length]
+        with stage("pad"):
+            return self._pad_waveform(waveform)
+
+    def labels_for(self, indices) -> np.ndarray:
+        """
+        Return the labels of the given dataset indices without decoding any audio.
+
+        Indices may point into any of the `n_augment` copies of the dataset.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return self.label_array[indices % len(self.file_paths)]
+
+    def lengths_for(self, indices) -> Optional[np.ndarray]:
+        """
+        Return the unpadded lengths (in source samples) of the given indices,
+        or None if the dataset was built without lengths.
+        """
+        if self.lengths is None:
+            return None
+        indices = np.asarray(indices, dtype=np.int64)
+        return np.asarray(self.lengths, dtype=np.int64)[indices % len(self.file_paths)]
+
+    def load_waveform(self, idx: int) -> torch.Tensor:
+        """
+        Return the decoded, resampled and unpadded waveform of file `idx`.
+        """
+        # Decoded waveforms in the shared arena skip the load and resample entirely
+        if self.arena is not None and idx in self.arena:
+            with stage("arena_read"):
+                return self.arena.get(idx)
+
+        with stage("decode"):
+            waveform, sr = torchaudio.load(self.file_paths[idx])
+
+        # Resample if necessary (kernels are cached per rate pair)
+        with stage("resample"):
+            waveform = resample(waveform, sr, self.target_sr)
+
+        # Remove channel dim if it's mono
+        if waveform.shape[0] == 1:
+            waveform = waveform.squeeze(0)
+
+        return waveform
+
+    def _place_features(self, features: torch.Tensor, idx: int) -> torch.Tensor:
+        if self.dynamic_padding:
+            # Keep only the frames covered by the clip; `pad_collate` pads per batch
+            n_frames = math.ceil(features.shape[-1] * self.feature_store.clip_fraction(idx))
+            return features[..., :max(n_frames, 1)]
+        if self.pad_strategy == "left":
+            return features
+
+        # Stored features are left-aligned, so moving trailing padding frames to
+        # the front reproduces the other padding positions at frame resolution
+        n_frames = features.shape[-1]
+        pad_frames = int(n_frames * (1 - self.feature_store.clip_fraction(idx)))
+        if self.pad_strategy == "random":
+            shift = random.randint(0, pad_frames)
+        elif self.pad_strategy == "right":
+            shift = pad_frames
+        elif self.pad_strategy == "center":
+            shift = pad_frames // 2
+        else:
+            raise ValueError(f"Invalid pad_strategy: {self.pad_strategy}")
+        return torch.roll(features, shifts=shift, dims=-1)
+    
+    def _estimate_max_length(self) -> int:
+        # Prefer lengths from the parser's manifest; only probe headers as a fallback
+        lengths = self.lengths or [torchaudio.info(str(path)).num_frames for path in self.file_paths]
+        
+        # Add 20% to max length to account for padding
+        return int(max(lengths) * 1.2)
+    
+    def _pad_waveform(self, waveform: torch.Tensor) -> torch.Tensor:
+        length = waveform.shape[-1]
+        if length >= self.max_length:
+            return waveform[..., :self.max_length]
+
+        pad_total = self.max_length - length
+        if self.pad_strategy == "random":
+            pad_left = random.randint(0, pad_total)
+        elif self.pad_strategy == "left":
+            pad_left = 0
+        elif self.pad_strategy == "right":
+            pad_left = pad_total
+        elif self.pad_strategy == "center":
+            pad_left = pad_total // 2
+        else:
+            raise ValueError(f"Invalid pad_strategy: {self.pad_strategy}")
+
+        pad_right = pad_total - pad_left
+        return torch.nn.functional.pad(waveform, (pad_left, pad_right))
+
 
 class PhonemeContrastiveDataset(Dataset):
     """
@@ -52,14 +207,17 @@ class PhonemeContrastiveDataset(Dataset):
         config: Dict,
         transform_pipeline: Callable,
         feature_extractor: Callable,
-        mode: str = "train"
+        mode: str = "train",
+        arena: Optional[WaveformArena] = None
     ):
         self.file_paths = file_paths
         self.labels = labels
+        self.label_array = np.asarray(labels, dtype=np.int64)
         self.config = config
         self.transform_pipeline = transform_pipeline
         self.feature_extractor = feature_extractor
         self.mode = mode
+        self.arena = arena
         
         self.n_views = config["views_per_sample"] if mode == "train" else 1
         self.target_sr = config["target_sr"]
@@ -99,17 +257,23 @@ class PhonemeContrastiveDataset(Dataset):
         }
         
         return views, self.labels[idx], metadata
+
+    def labels_for(self, indices) -> np.ndarray:
+        """Return the labels of the given indices without loading any audio."""
+        return self.label_array[np.asarray(indices, dtype=np.int64)]
     
     def _load_audio(self, idx: int) -> torch.Tensor:
+        # The shared arena replaces the per-worker cache for the files it holds
+        if self.arena is not None and idx in self.arena:
+            return self._pad_or_trim(self.arena.get(idx).unsqueeze(0))
+
         if self.use_cache and idx in self.cache:
             return self.cache[idx].clone()
             
         waveform, sr = torchaudio.load(self.file_paths[idx])
         
-        # Resample if necessary
-        if sr != self.target_sr:
-            resampler = torchaudio.transforms.Resample(sr, self.target_sr)
-            waveform = resampler(waveform)
+        # Resample if necessary (kernels are cached per rate pair)
+        waveform = resample(waveform, sr, self.target_sr)
         
         # Convert to mono
         if waveform.shape[0] > 1:
@@ -171,69 +335,3 @@ class PhonemeContrastiveDataset(Dataset):
             waveform = torch.nn.functional.pad(waveform, (pad_left, pad_right))
             
         return waveform
-
-        self.file_paths = file_paths
-        self.labels = labels
-        self.transform = transform
-        self.params = params
-        self.target_sr = params.target_sr
-        self.max_length = params.max_length or self._estimate_max_length()
-        self.n_augment = params.n_augment
-        self.pad_strategy = params.pad_strategy
-
-
-    def __len__(self) -> int:
-        """Return the number of samples in the dataset."""
-        return len(self.file_paths) * self.n_augment
-    
-    def __getitem__(self, idx: int) -> tuple[torch.Tensor, int]:
-        
-        # Account for augmentations
-        true_idx = idx % len(self.file_paths)
-        
-        path = self.file_paths[true_idx]
-        label = self.labels[true_idx]
-
-        waveform, sr = torchaudio.load(path)
-
-        # Resample if necessary
-        if sr != self.target_sr:
-            resampler = torchaudio.transforms.Resample(orig_freq=sr, new_freq=self.target_sr)
-            waveform = resampler(waveform)
-
-        # Remove channel dim if it's mono
-        if waveform.shape[0] == 1:
-            waveform = waveform.squeeze(0)
-
-        # Apply radom zero padding before transform
-        waveform = self._pad_waveform(waveform)
-
-        # Apply transformation if provided
-        if self.transform:
-            waveform = self.transform(waveform)
-
-        return waveform, label
-    
-    def _estimate_max_length(self) -> int:
-        lengths = [torchaudio.info(str(path)).num_frames for path in self.file_paths]
-        
-        # Add 20% to max length to account for padding
-        return int(max(lengths) * 1.2)
-    
-    def _pad_waveform(self, waveform: torch.Tensor) -> torch.Tensor:
-        length = waveform.shape[-1]
-        if length >= self.max_length:
-            return waveform[..., :self.max_length]
-
-        pad_total = self.max_length - length
-        if self.pad_strategy == "random":
-            pad_left = random.randint(0, pad_total)
-        elif self.pad_strategy == "left":
-            pad_left = 0
-        elif self.pad_strategy == "right":
-            pad_left = pad_total
-        else:
-            raise ValueError(f"Invalid pad_strategy: {self.pad_strategy}")
-
-        pad_right = pad_total - pad_left
-        return torch.nn.functional.pad(waveform, (pad_left, pad_right))
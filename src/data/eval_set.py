@@ -0,0 +1,111 @@
+"""
+Evaluation inputs materialized once as contiguous tensors on the training device.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch.utils.data import DataLoader, Dataset, Subset
+
+from data_utils.collate import resize_mask, unpack_batch
+
+
+@dataclass
+class EvalSet:
+    """
+    Model-ready inputs, labels and (for dynamic padding) frame masks of an evaluation split.
+
+    The dataset behind it must be deterministic (fixed padding, no
+    augmentation), since it is decoded and featurized only once.
+    """
+
+    x: torch.Tensor
+    labels: torch.Tensor
+    mask: Optional[torch.Tensor] = None
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def nbytes(self) -> int:
+        return self.x.numel() * self.x.element_size()
+
+    def batches(self, batch_size: int) -> Iterator[Tuple[torch.Tensor, ...]]:
+        """Yield (x, labels) or (x, labels, mask) slices, like a DataLoader would."""
+        for start in range(0, len(self), batch_size):
+            end = start + batch_size
+            if self.mask is None:
+                yield self.x[start:end], self.labels[start:end]
+            else:
+                yield self.x[start:end], self.labels[start:end], self.mask[start:end]
+
+    @classmethod
+    def materialize(
+        cls,
+        dataset: Dataset,
+        indices: Sequence[int],
+        device: torch.device,
+        batch_transform: Optional[Callable[..., torch.Tensor]] = None,
+        batch_size: int = 64,
+        num_workers: int = 0,
+        collate_fn: Optional[Callable] = None,
+        worker_init_fn: Optional[Callable[[int], None]] = None,
+        loader: Optional[Iterable] = None,
+    ) -> "EvalSet":
+        """
+        Load, collate and featurize `indices` of `dataset` once.
+
+        Args:
+            dataset: Deterministic evaluation dataset
+            indices: Dataset indices of the split
+            device: Device the tensors are kept on
+            batch_transform: Optional deterministic batch stage (feature
+                extraction without augmentation) applied on the device
+            batch_size: Batch size used while materializing
+            num_workers: DataLoader workers used while materializing
+            collate_fn: Collate function (e.g. `pad_collate`)
+            worker_init_fn: DataLoader worker init (e.g. the stage profiler's)
+            loader: Batches of `indices` in order, used instead of a new
+                DataLoader (e.g. a `LoaderService` view)
+
+        Returns:
+            EvalSet
+        """
+        if loader is None:
+            loader = DataLoader(
+                Subset(dataset, list(indices)),
+                batch_size=batch_size,
+                shuffle=False,
+                num_workers=num_workers,
+                collate_fn=collate_fn,
+                worker_init_fn=worker_init_fn,
+            )
+
+        xs, labels, masks = [], [], []
+        with torch.no_grad():
+            for batch in loader:
+                x, y, mask = unpack_batch(batch)
+                x = x.to(device)
+                if mask is not None:
+                    mask = mask.to(device)
+                if batch_transform is not None:
+                    x = batch_transform(x, mask=mask) if mask is not None else batch_transform(x)
+                if mask is not None:
+                    mask = resize_mask(mask, x.shape[-1])
+                    masks.append(mask)
+                xs.append(x)
+                labels.append(torch.as_tensor(y))
+
+        # Batches padded to their own longest clip are padded again to the overall longest
+        longest = max(x.shape[-1] for x in xs)
+        x = torch.cat([F.pad(x, (0, longest - x.shape[-1])) for x in xs]).contiguous()
+        mask = torch.cat([F.pad(m, (0, longest - m.shape[-1])) for m in masks]) if masks else None
+        return cls(x, torch.cat(labels).to(device), mask)
+
+
+def eval_indices(indices: Sequence[int], n_files: int) -> np.ndarray:
+    """Map split indices (which may point into `n_augment` copies) to unique file indices."""
+    return np.unique(np.asarray(indices, dtype=np.int64) % n_files)
@@ -0,0 +1,270 @@
+"""
+Content-addressed store of precomputed features, shared across runs.
+
+Only the deterministic part of the transform pipeline (decode, resample,
+left-aligned padding and the MFCC/log-mel extractor) is stored. Random
+augmentations are applied on top at training time.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Literal, Optional, Sequence
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, Dataset
+
+
+class FeatureStore:
+    """
+    Memory-mapped feature shards plus a JSON index, keyed by audio content.
+
+    Each transform configuration gets its own directory, named after a hash
+    of the extractor's parameters. Inside it, features of each file are
+    stored as contiguous [T, F] rows of a shard, keyed by the SHA-1 of the
+    file's bytes, so renamed or copied stimuli are not recomputed.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        signature: dict,
+        dtype: Literal["float16", "float32"] = "float16",
+    ) -> None:
+        self.root = root
+        self.signature = {**signature, "dtype": dtype}
+        self.dtype = dtype
+        key = hashlib.sha1(json.dumps(self.signature, sort_keys=True).encode()).hexdigest()[:16]
+        self.dir = root / key
+        self.entries: Dict[str, list] = self._load_index()
+        self.keys: List[str] = []
+        self._shards: Dict[int, np.ndarray] = {}
+
+    def __contains__(self, content_hash: str) -> bool:
+        return content_hash in self.entries
+
+    def bind(self, file_paths: Sequence[Path]) -> None:
+        """
+        Attach the store to a dataset's file list so features can be fetched by index.
+        """
+        self.keys = _content_hashes(self.root, file_paths)
+
+    def missing(self) -> List[int]:
+        """Return the dataset indices whose features are not stored yet."""
+        return [i for i, key in enumerate(self.keys) if key not in self.entries]
+
+    def features_for(self, idx: int) -> torch.Tensor:
+        """
+        Return the stored features of dataset index `idx` as a [1, F, T] float32 tensor.
+
+        float32 stores return a view of the memory-mapped shard.
+        """
+        shard, start, n_frames, _ = self.entries[self.keys[idx]]
+        rows = torch.from_numpy(self._shard(shard)[start:start + n_frames])
+        return rows.float().T.unsqueeze(0)
+
+    def clip_fraction(self, idx: int) -> float:
+        """Fraction of the stored frames covered by the clip rather than padding."""
+        return self.entries[self.keys[idx]][3]
+
+    def add(self, items: Sequence[tuple]) -> None:
+        """
+        Write a new shard holding `(content_hash, features [1, F, T], clip_fraction)` items.
+        """
+        items = [item for item in items if item[0] not in self.entries]
+        if not items:
+            return
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        shard = max((entry[0] for entry in self.entries.values()), default=-1) + 1
+        total = sum(features.shape[-1] for _, features, _ in items)
+        n_features = items[0][1].shape[-2]
+
+        rows = np.lib.format.open_memmap(
+            self._shard_path(shard), mode="w+", dtype=self.dtype, shape=(total, n_features)
+        )
+        start = 0
+        new_entries = {}
+        for content_hash, features, clip_fraction in items:
+            n_frames = features.shape[-1]
+            rows[start:start + n_frames] = features.reshape(n_features, n_frames).T.numpy()
+            new_entries[content_hash] = [shard, start, n_frames, float(clip_fraction)]
+            start += n_frames
+        rows.flush()
+        del rows
+
+        self.entries.update(new_entries)
+        self._save_index()
+
+    def _shard(self, shard: int) -> np.ndarray:
+        if shard not in self._shards:
+            # Copy-on-write mapping: zero-copy reads, never writes back to the shard
+            self._shards[shard] = np.load(self._shard_path(shard), mmap_mode="c")
+        return self._shards[shard]
+
+    def _shard_path(self, shard: int) -> Path:
+        return self.dir / f"shard_{shard:05d}.npy"
+
+    def _load_index(self) -> Dict[str, list]:
+        try:
+            with open(self.dir / "index.json") as f:
+                return json.load(f)["entries"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _save_index(self) -> None:
+        tmp_path = self.dir / "index.json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"signature": self.signature, "entries": self.entries}, f)
+        os.replace(tmp_path, self.dir / "index.json")
+
+    def __getstate__(self) -> dict:
+        # Workers open their own mappings
+        state = self.__dict__.copy()
+        state["_shards"] = {}
+        return state
+
+
+def module_signature(module: nn.Module) -> dict:
+    """
+    Describe a feature extractor by its scalar hyperparameters and buffers.
+
+    The result changes whenever any setting that affects the output changes
+    (sample rate, FFT size, hop length, number of mels/coefficients, ...).
+    """
+    signature = {}
+    for name, submodule in module.named_modules():
+        scalars = {
+            key: value for key, value in vars(submodule).items()
+            if not key.startswith("_") and isinstance(value, (int, float, str, bool, type(None)))
+        }
+        buffers = {
+            key: hashlib.sha1(buffer.detach().cpu().numpy().tobytes()).hexdigest()
+            for key, buffer in submodule.named_buffers(recurse=False)
+        }
+        signature[name or type(module).__name__] = {
+            "type": type(submodule).__name__, **scalars, **buffers
+        }
+    return signature
+
+
+class _StorePrecomputeDataset(Dataset):
+    """Left-aligned, padded features of the missing files of a PhonemeDataset."""
+
+    def __init__(self, dataset, feature_transform: nn.Module, indices: List[int]) -> None:
+        self.dataset = dataset
+        self.feature_transform = feature_transform
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, i: int) -> tuple:
+        idx = self.indices[i]
+        max_length = self.dataset.max_length
+        waveform = self.dataset.load_waveform(idx)[..., :max_length]
+        clip_fraction = waveform.shape[-1] / max_length
+        waveform = torch.nn.functional.pad(waveform, (0, max_length - waveform.shape[-1]))
+        return self.feature_transform(waveform), clip_fraction
+
+
+def precompute_features(
+    store: FeatureStore,
+    dataset,
+    feature_transform: nn.Module,
+    num_workers: int = 0,
+    batch_size: int = 16,
+    shard_max_bytes: int = 256 * 1024**2,
+    logger: Optional[logging.Logger] = None,
+) -> int:
+    """
+    Compute and store features for every file of `dataset` that the store lacks.
+
+    Args:
+        store: Feature store bound to the dataset's file paths
+        dataset: PhonemeDataset providing decoded waveforms and max_length
+        feature_transform: Deterministic extractor (see `build_feature_transform`)
+        num_workers: DataLoader workers used for decoding and extraction
+        batch_size: Files per DataLoader batch
+        shard_max_bytes: Approximate size at which a new shard is started
+        logger: Optional logger for messages
+
+    Returns:
+        int: Number of files that were computed
+    """
+
+    def log(msg: str):
+        if logger:
+            logger.info(msg)
+        else:
+            print(msg)
+
+    missing = store.missing()
+    log(f"Feature store {store.dir}: {len(store.keys) - len(missing)} cached, {len(missing)} to compute")
+    if not missing:
+        return 0
+
+    loader = DataLoader(
+        _StorePrecomputeDataset(dataset, feature_transform, missing),
+        batch_size=batch_size,
+        num_workers=num_workers,
+    )
+
+    itemsize = np.dtype(store.dtype).itemsize
+    pending, pending_bytes = [], 0
+    position = 0
+    with torch.no_grad():
+        for features, clip_fractions in loader:
+            for feature, clip_fraction in zip(features, clip_fractions):
+                pending.append((store.keys[missing[position]], feature, float(clip_fraction)))
+                pending_bytes += feature.numel() * itemsize
+                position += 1
+            if pending_bytes >= shard_max_bytes:
+                store.add(pending)
+                pending, pending_bytes = [], 0
+
+    store.add(pending)
+    return len(missing)
+
+
+def _content_hashes(root: Path, file_paths: Sequence[Path]) -> List[str]:
+    """
+    SHA-1 of each file's bytes, cached by (path, size, mtime) under `root`.
+    """
+    cache_path = root / "content_hashes.json"
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    hashes = []
+    changed = False
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        key = str(Path(file_path).resolve())
+        cached = cache.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            hashes.append(cached[2])
+            continue
+
+        digest = hashlib.sha1()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        cache[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        hashes.append(digest.hexdigest())
+        changed = True
+
+    if changed:
+        root.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+
+    return hashes
@@ -1,6 +1,7 @@
 # src/data/features.py
 import torch
 import torch.nn as nn
+import torchaudio.functional as F
 import torchaudio.transforms as T
 from typing import Dict, Optional
 
@@ -25,17 +26,7 @@ class MFCCExtractor(FeatureExtractor):
     ):
         super().__init__()
         
-        # Create mel spectrogram first
-        self.mel_spec = T.MelSpectrogram(
-            sample_rate=sample_rate,
-            n_fft=n_fft,
-            hop_length=hop_length,
-            n_mels=n_mels,
-            f_min=f_min,
-            f_max=f_max or sample_rate / 2
-        )
-        
-        # Then convert to MFCC
+        # T.MFCC computes its own mel spectrogram internally
         self.mfcc = T.MFCC(
             sample_rate=sample_rate,
             n_mfcc=n_mfcc,
@@ -129,6 +120,95 @@ class CombinedExtractor(FeatureExtractor):
         # Concatenate along feature dimension
         return torch.cat(features, dim=1)
 
+STFT_DEFAULTS = {"sample_rate": 16000, "n_fft": 400, "hop_length": 160}
+
+def _stft_settings(params: Dict) -> Dict:
+    """The extractor kwargs that determine the underlying spectrogram"""
+    return {key: params.get(key, default) for key, default in STFT_DEFAULTS.items()}
+
+def _clamp_top_db(x_db: torch.Tensor, top_db: float) -> torch.Tensor:
+    """The top_db clamp of torchaudio's amplitude_to_DB, applied to precomputed dB values"""
+    shape = x_db.size()
+    packed_channels = shape[-3] if x_db.dim() > 2 else 1
+    x_db = x_db.reshape(-1, packed_channels, shape[-2], shape[-1])
+    x_db = torch.max(x_db, (x_db.amax(dim=(-3, -2, -1)) - top_db).view(-1, 1, 1, 1))
+    return x_db.reshape(shape)
+
+class SpectrogramFeatureGraph(FeatureExtractor):
+    """
+    MFCC and log-mel features derived from one shared power spectrogram.
+
+    Produces the same output as a CombinedExtractor of MFCCExtractor and
+    MelSpectrogramExtractor with the same STFT settings, but computes the STFT
+    once. The mel filterbanks of both outputs are concatenated into a single
+    projection matrix, and MFCC and log-mel share the dB conversion when they
+    use the same filterbank.
+    """
+    
+    def __init__(
+        self,
+        mfcc_params: Optional[Dict] = None,
+        mel_params: Optional[Dict] = None
+    ):
+        super().__init__()
+        outputs = {name: params for name, params in (("mfcc", mfcc_params), ("mel", mel_params))
+                   if params is not None}
+        if not outputs:
+            raise ValueError("SpectrogramFeatureGraph needs at least one of mfcc_params, mel_params")
+        
+        stft = [_stft_settings(params) for params in outputs.values()]
+        if any(settings != stft[0] for settings in stft):
+            raise ValueError(f"MFCC and mel outputs must share STFT settings, got {stft}")
+        sample_rate = stft[0]["sample_rate"]
+        n_fft = stft[0]["n_fft"]
+        
+        self.spectrogram = T.Spectrogram(n_fft=n_fft, hop_length=stft[0]["hop_length"], power=2.0)
+        
+        # One column block per distinct filterbank, projected with a single matmul
+        banks: Dict[tuple, tuple] = {}
+        fbs = []
+        self.outputs = []
+        for name, params in outputs.items():
+            n_mels = params.get("n_mels", 80)
+            f_min = params.get("f_min", 0.0)
+            f_max = params.get("f_max") or sample_rate / 2
+            key = (n_mels, f_min, f_max)
+            if key not in banks:
+                start = sum(fb.shape[1] for fb in fbs)
+                banks[key] = (len(banks), start, start + n_mels)
+                fbs.append(F.melscale_fbanks(n_fft // 2 + 1, f_min, f_max, n_mels, sample_rate))
+            self.outputs.append((name, *banks[key]))
+        self.register_buffer("fb", torch.cat(fbs, dim=1))
+        
+        if mfcc_params is not None:
+            n_mfcc = mfcc_params.get("n_mfcc", 40)
+            self.register_buffer("dct", F.create_dct(n_mfcc, mfcc_params.get("n_mels", 80), "ortho"))
+        
+    def forward(self, waveform: torch.Tensor) -> torch.Tensor:
+        """
+        Returns:
+            features: [..., total_features, time_frames], MFCC rows first
+        """
+        if waveform.dim() == 1:
+            waveform = waveform.unsqueeze(0)
+        
+        spec = self.spectrogram(waveform)
+        mel = torch.matmul(spec.transpose(-1, -2), self.fb).transpose(-1, -2)
+        
+        db_per_bank = {}
+        features = []
+        for name, bank, start, end in self.outputs:
+            if bank not in db_per_bank:
+                db_per_bank[bank] = F.amplitude_to_DB(mel[..., start:end, :], 10.0, 1e-10, 0.0)
+            db = db_per_bank[bank]
+            if name == "mfcc":
+                # T.MFCC converts with top_db=80 before the DCT
+                db = _clamp_top_db(db, 80.0)
+                db = torch.matmul(db.transpose(-1, -2), self.dct).transpose(-1, -2)
+            features.append(db)
+        
+        return torch.cat(features, dim=-2)
+
 # Factory function
 def build_feature_extractor(config: Dict) -> FeatureExtractor:
     """Build feature extractor from config"""
@@ -140,6 +220,12 @@ def build_feature_extractor(config: Dict) -> FeatureExtractor:
     elif extractor_type == "mel":
         return MelSpectrogramExtractor(**config.get("mel_params", {}))
     elif extractor_type == "combined":
+        mfcc_params = config.get("mfcc_params", {}) if config.get("use_mfcc", True) else None
+        mel_params = config.get("mel_params", {}) if config.get("use_mel", False) else None
+        stft = [_stft_settings(p) for p in (mfcc_params, mel_params) if p is not None]
+        # The shared-spectrogram graph applies whenever the outputs use the same STFT
+        if stft and all(settings == stft[0] for settings in stft):
+            return SpectrogramFeatureGraph(mfcc_params=mfcc_params, mel_params=mel_params)
         extractors = {}
         if config.get("use_mfcc", True):
             extractors["mfcc"] = MFCCExtractor(**config.get("mfcc_params", {}))
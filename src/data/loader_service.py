@@ -0,0 +1,206 @@
+"""
+One long-lived DataLoader worker pool shared by every fold and epoch of a run.
+
+A DataLoader with persistent workers keeps its worker processes between
+epochs, but its dataset and batch sampler are fixed when it is built, so a
+new fold (new indices) or the validation split would normally need a new
+DataLoader and a new set of workers. `LoaderService` builds one DataLoader
+over a `RoutedDataset` (several datasets behind `(source, index)` keys) and
+a `SwitchableBatchSampler`. Batch indices are generated in the main process,
+so pointing the sampler at another dataset, index set or batch sampler
+changes what the workers load without respawning them, and their caches
+(resampling kernels, feature-store maps, imported modules) stay warm.
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import logging
+
+import numpy as np
+from torch.utils.data import BatchSampler, DataLoader, Dataset, Sampler, SequentialSampler, default_collate
+
+
+class RoutedDataset(Dataset):
+    """
+    Several named datasets behind one dataset indexed by `(source, index)` pairs.
+
+    Items come back as `(source, item)`, so `RoutedCollate` can pick the
+    collate function of their dataset.
+    """
+
+    def __init__(self, datasets: Dict[str, Dataset]) -> None:
+        self.datasets = datasets
+
+    def __getitem__(self, key: Tuple[str, int]):
+        source, index = key
+        return source, self.datasets[source][index]
+
+    def __len__(self) -> int:
+        return sum(len(dataset) for dataset in self.datasets.values())
+
+
+class RoutedCollate:
+    """Collate a batch of `(source, item)` pairs with the collate function of their source."""
+
+    def __init__(self, collate_fns: Dict[str, Callable]) -> None:
+        self.collate_fns = collate_fns
+
+    def __call__(self, batch):
+        # Batches never mix sources
+        source = batch[0][0]
+        return self.collate_fns[source]([item for _, item in batch])
+
+
+class SwitchableBatchSampler(Sampler[List[Tuple[str, int]]]):
+    """
+    Batch sampler whose source, index set and inner batch sampler can be swapped between epochs.
+
+    The inner sampler yields positions into `indices`; they are routed to
+    `(source, indices[position])` keys of a `RoutedDataset`.
+    """
+
+    def __init__(self) -> None:
+        self.source: Optional[str] = None
+        self.indices: Optional[np.ndarray] = None
+        self.batch_sampler: Optional[Sampler[List[int]]] = None
+
+    def switch(self, source: str, indices: np.ndarray, batch_sampler: Sampler[List[int]]) -> None:
+        self.source = source
+        self.indices = indices
+        self.batch_sampler = batch_sampler
+
+    def __iter__(self) -> Iterator[List[Tuple[str, int]]]:
+        source, indices = self.source, self.indices
+        for batch in self.batch_sampler:
+            yield [(source, int(i)) for i in indices[np.asarray(batch, dtype=np.int64)]]
+
+    def __len__(self) -> int:
+        return len(self.batch_sampler)
+
+
+class LoaderView:
+    """
+    Iterable over the batches of one index set, served by a `LoaderService`.
+
+    Behaves like a DataLoader in training loops (`len()`, `for batch in
+    view`). Iterating it points the shared pool at this view; starting
+    another view while this one is mid-iteration ends this one's iteration
+    with a RuntimeError instead of silently handing it the other view's batches.
+    """
+
+    def __init__(self, service: "LoaderService", source: str, indices: np.ndarray,
+                 batch_sampler: Sampler[List[int]]) -> None:
+        self.service = service
+        self.source = source
+        self.indices = indices
+        self.batch_sampler = batch_sampler
+
+    def __len__(self) -> int:
+        return len(self.batch_sampler)
+
+    def __iter__(self) -> Iterator:
+        generation = self.service._activate(self)
+        for batch in self.service.loader:
+            if self.service._generation != generation:
+                raise RuntimeError(
+                    f"LoaderService was switched to another view while iterating '{self.source}'"
+                )
+            yield batch
+
+
+class LoaderService:
+    """
+    One DataLoader worker pool serving batches from several datasets for a whole run.
+
+    Workers are started on the first iteration and live until `close()`
+    (with persistent_workers=False, until the end of each pass over a view).
+    Only one view is iterated at a time.
+
+    Args:
+        datasets: Named datasets the workers load from, e.g. {"train": ..., "eval": ...}
+        num_workers: Worker processes (0 loads in the main process)
+        collate_fn: Collate function for every dataset, or one per dataset name
+            (the DataLoader default for datasets without one)
+        worker_init_fn: Called once in each worker when the pool starts
+        pin_memory: Pin batches in page-locked memory
+        prefetch_factor: Batches loaded in advance by each worker
+        persistent_workers: Keep the workers between passes over views
+        logger: Optional logger for messages
+    """
+
+    def __init__(
+        self,
+        datasets: Dict[str, Dataset],
+        num_workers: int = 0,
+        collate_fn: Optional[Union[Callable, Dict[str, Callable]]] = None,
+        worker_init_fn: Optional[Callable[[int], None]] = None,
+        pin_memory: bool = False,
+        prefetch_factor: Optional[int] = None,
+        persistent_workers: bool = True,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.dataset = RoutedDataset(datasets)
+        self.sampler = SwitchableBatchSampler()
+        self.num_workers = num_workers
+        self.logger = logger
+        self._generation = 0
+
+        if not isinstance(collate_fn, dict):
+            collate_fn = {source: collate_fn for source in datasets}
+        collate_fns = {source: collate_fn.get(source) or default_collate for source in datasets}
+
+        worker_kwargs = {}
+        if num_workers > 0:
+            worker_kwargs["persistent_workers"] = persistent_workers
+            if prefetch_factor is not None:
+                worker_kwargs["prefetch_factor"] = prefetch_factor
+        self.loader = DataLoader(
+            self.dataset,
+            batch_sampler=self.sampler,
+            num_workers=num_workers,
+            collate_fn=RoutedCollate(collate_fns),
+            worker_init_fn=worker_init_fn,
+            pin_memory=pin_memory,
+            **worker_kwargs,
+        )
+
+    def view(
+        self,
+        source: str,
+        indices: Sequence[int],
+        batch_sampler: Optional[Sampler[List[int]]] = None,
+        batch_size: Optional[int] = None,
+    ) -> LoaderView:
+        """
+        Batches of `indices` of dataset `source`.
+
+        Args:
+            source: Name of the dataset
+            indices: Dataset indices of the split
+            batch_sampler: Batch sampler over positions 0..len(indices)-1
+                (e.g. a MultiViewBatchSampler); in-order batches of
+                `batch_size` if None
+            batch_size: Batch size of the in-order batches
+
+        Returns:
+            LoaderView
+        """
+        if source not in self.dataset.datasets:
+            raise KeyError(f"Unknown dataset '{source}', expected one of {sorted(self.dataset.datasets)}")
+        indices = np.asarray(indices, dtype=np.int64)
+        if batch_sampler is None:
+            if batch_size is None:
+                raise ValueError("Either batch_sampler or batch_size is required")
+            batch_sampler = BatchSampler(SequentialSampler(range(len(indices))), batch_size, drop_last=False)
+        return LoaderView(self, source, indices, batch_sampler)
+
+    def _activate(self, view: LoaderView) -> int:
+        self._generation += 1
+        self.sampler.switch(view.source, view.indices, view.batch_sampler)
+        return self._generation
+
+    def close(self) -> None:
+        """Stop the worker processes (they exit and run their finalizers). The service is unusable afterwards."""
+        # The pool belongs to the DataLoader's iterator, whose __del__ shuts the workers down
+        del self.loader
+        if self.logger and self.num_workers > 0:
+            self.logger.debug(f"Stopped {self.num_workers} DataLoader workers")
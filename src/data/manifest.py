@@ -0,0 +1,87 @@
+"""
+On-disk manifest of per-file audio metadata.
+
+The manifest caches the result of probing every .wav header so that repeated
+runs over the same corpus only need to stat the files, not open them.
+"""
+
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import hashlib
+import json
+import os
+
+
+@dataclass
+class ManifestRecord:
+    """
+    Metadata for a single audio file.
+
+    `path` is stored relative to the data directory so the manifest survives
+    moving the corpus. A record with a non-empty `skip_reason` describes a file
+    that could not be used (bad label or unreadable header).
+    """
+    path: str
+    size: int
+    mtime_ns: int
+    sample_rate: Optional[int] = None
+    num_frames: Optional[int] = None
+    num_channels: Optional[int] = None
+    label: Optional[str] = None
+    skip_reason: Optional[str] = None
+
+    @property
+    def usable(self) -> bool:
+        return self.skip_reason is None
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """Return True if the file on disk is unchanged since this record was probed."""
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+
+def default_manifest_path(cache_dir: Path, data_dir: Path) -> Path:
+    """
+    Return the manifest location for a data directory.
+
+    Each data directory gets its own manifest file, named after a hash of its
+    resolved path, so several corpora can share one cache directory.
+    """
+    digest = hashlib.sha1(str(data_dir.resolve()).encode()).hexdigest()[:12]
+    return cache_dir / f"manifest_{digest}.jsonl"
+
+
+def load_manifest(path: Path) -> Dict[str, ManifestRecord]:
+    """
+    Load a manifest written by `save_manifest`.
+
+    Returns an empty mapping if the file is missing or unreadable, so a corrupt
+    cache only costs a full re-probe.
+    """
+    records: Dict[str, ManifestRecord] = {}
+    if not path.exists():
+        return records
+
+    try:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = ManifestRecord(**json.loads(line))
+                    records[record.path] = record
+    except (OSError, ValueError, TypeError):
+        return {}
+
+    return records
+
+
+def save_manifest(path: Path, records: Iterable[ManifestRecord]) -> None:
+    """
+    Write records as JSON lines, replacing the file atomically.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w") as f:
+        for record in records:
+            f.write(json.dumps(asdict(record)) + "\n")
+    os.replace(tmp_path, path)
@@ -5,9 +5,13 @@ Functions for parsing a directory of .wav files into phoneme-labeled data.
 from pathlib import Path
 import torchaudio
 from typing import List, Dict, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+import os
 import re
 import logging
 
+from data_utils.manifest import ManifestRecord, load_manifest, save_manifest
+
 def extract_label(file_path: Path) -> str:
     """
     Extract the phoneme label from the start of a filename.
@@ -32,9 +36,89 @@ def extract_label(file_path: Path) -> str:
     return match.group(0)
 
 
-def parse_dataset(
+def _probe_file(wav_file: Path, rel_path: str, stat: os.stat_result) -> ManifestRecord:
+    """
+    Read the label and header of a single file into a manifest record.
+    """
+    record = ManifestRecord(path=rel_path, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    try:
+        record.label = extract_label(wav_file)
+        info = torchaudio.info(str(wav_file))
+        record.sample_rate = info.sample_rate
+        record.num_frames = info.num_frames
+        record.num_channels = info.num_channels
+    except Exception as e:
+        record.skip_reason = str(e)
+    return record
+
+
+def parse_manifest(
     data_dir: Path,
+    manifest_path: Optional[Path] = None,
+    num_workers: Optional[int] = None,
     logger: Optional[logging.Logger] = None
+) -> List[ManifestRecord]:
+    """
+    Build a manifest record for every .wav file under a directory.
+
+    Headers are probed on a thread pool. If `manifest_path` is given, records
+    from a previous run are reused for files whose size and mtime are
+    unchanged, and the updated manifest is written back.
+
+    Args:
+        data_dir (Path): Root directory containing .wav files
+        manifest_path (Path, optional): Location of the on-disk manifest cache
+        num_workers (int, optional): Number of probing threads (executor default if None)
+        logger (Logger, optional): Optional logger for messages
+
+    Returns:
+        List[ManifestRecord]: One record per file, in directory walk order
+    """
+
+    def log(msg: str):
+        if logger:
+            logger.info(msg)
+        else:
+            print(msg)
+
+    if not data_dir.exists():
+        raise FileNotFoundError(f"Data directory not found: {data_dir}")
+
+    cached = load_manifest(manifest_path) if manifest_path else {}
+
+    records: List[Optional[ManifestRecord]] = []
+    to_probe: List[Tuple[int, Path, str, os.stat_result]] = []
+
+    for wav_file in data_dir.rglob("*.wav"):
+        rel_path = wav_file.relative_to(data_dir).as_posix()
+        stat = wav_file.stat()
+        record = cached.get(rel_path)
+        if record is not None and record.matches(stat):
+            records.append(record)
+        else:
+            to_probe.append((len(records), wav_file, rel_path, stat))
+            records.append(None)
+
+    if to_probe:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            probed = executor.map(lambda job: _probe_file(*job[1:]), to_probe)
+            for (slot, *_), record in zip(to_probe, probed):
+                records[slot] = record
+
+    if manifest_path and (to_probe or len(cached) != len(records)):
+        save_manifest(manifest_path, records)
+
+    if manifest_path:
+        log(f"Manifest: {len(records) - len(to_probe)} cached, {len(to_probe)} probed")
+
+    return records
+
+
+def parse_dataset(
+    data_dir: Path,
+    logger: Optional[logging.Logger] = None,
+    manifest_path: Optional[Path] = None,
+    num_workers: Optional[int] = None
 ) -> Tuple[List[Path], List[int], Dict[str, int], List[int]]:
     """
     Recursively parse a directory of .wav files into paths and integer labels.
@@ -42,6 +126,8 @@ def parse_dataset(
     Args:
         data_dir (Path): Root directory containing .wav files
         logger (Logger, optional): Optional logger for messages
+        manifest_path (Path, optional): On-disk manifest cache, see `parse_manifest`
+        num_workers (int, optional): Number of header probing threads
 
     Returns:
         Tuple:
@@ -51,31 +137,43 @@ def parse_dataset(
             - List of audio file lengths in samples
     """
     
+    records = parse_manifest(
+        data_dir, manifest_path=manifest_path, num_workers=num_workers, logger=logger
+    )
+    return dataset_from_manifest(data_dir, records, logger=logger)
+
+
+def dataset_from_manifest(
+    data_dir: Path,
+    records: List[ManifestRecord],
+    logger: Optional[logging.Logger] = None
+) -> Tuple[List[Path], List[int], Dict[str, int], List[int]]:
+    """
+    Turn manifest records into the paths, labels and lengths returned by `parse_dataset`.
+
+    Records with a skip reason are logged and left out. The remaining records
+    keep their order, so `[r for r in records if r.usable]` lines up with the
+    returned file paths.
+    """
+
     def log(msg: str):
         if logger:
             logger.info(msg)
         else:
             print(msg)
 
-    if not data_dir.exists():
-        raise FileNotFoundError(f"Data directory not found: {data_dir}")
-
     file_paths: List[Path] = []
     string_labels: List[str] = []
     lengths: List[int] = []
 
-    for wav_file in data_dir.rglob("*.wav"):
-        try:
-            label = extract_label(wav_file)
-            info = torchaudio.info(str(wav_file))
-            num_samples = info.num_frames
-        except Exception as e:
-            log(f"Skipping file: {wav_file.name} — {e}")
+    for record in records:
+        if not record.usable:
+            log(f"Skipping file: {Path(record.path).name} — {record.skip_reason}")
             continue
 
-        file_paths.append(wav_file)
-        string_labels.append(label)
-        lengths.append(num_samples)
+        file_paths.append(data_dir / record.path)
+        string_labels.append(record.label)
+        lengths.append(record.num_frames)
 
     unique_labels = sorted(set(string_labels))
     label_map: Dict[str, int] = {label: idx for idx, label in enumerate(unique_labels)}
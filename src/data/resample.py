@@ -0,0 +1,101 @@
+"""
+Cached resampling kernels and batched resampling grouped by source rate.
+"""
+
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Sequence
+import math
+
+import torch
+import torchaudio.transforms as T
+
+
+@lru_cache(maxsize=None)
+def get_resampler(orig_sr: int, target_sr: int) -> T.Resample:
+    """
+    Return a Resample module for a rate pair, building its sinc kernel only once per process.
+    """
+    return T.Resample(orig_freq=orig_sr, new_freq=target_sr)
+
+
+def resample(waveform: torch.Tensor, orig_sr: int, target_sr: int) -> torch.Tensor:
+    """
+    Resample a [..., N] waveform using the cached kernel for (orig_sr, target_sr).
+    """
+    if orig_sr == target_sr:
+        return waveform
+    return get_resampler(orig_sr, target_sr)(waveform)
+
+
+def resampled_length(num_frames: int, orig_sr: int, target_sr: int) -> int:
+    """Number of samples `resample` produces for a clip of `num_frames` frames."""
+    gcd = math.gcd(orig_sr, target_sr)
+    return math.ceil(num_frames * (target_sr // gcd) / (orig_sr // gcd))
+
+
+def resample_batch(
+    waveforms: Sequence[torch.Tensor],
+    orig_srs: Sequence[int],
+    target_sr: int,
+    max_batch_samples: int = 1 << 25,
+) -> List[torch.Tensor]:
+    """
+    Resample many [..., N] waveforms, one batched call per source rate.
+
+    Waveforms sharing a source rate are right-padded with zeros into one
+    [B, N] tensor. The resampler zero-pads its input edges anyway, so trimming
+    each output to its own length gives the same result as resampling it alone.
+
+    Args:
+        waveforms: Waveforms of any length; leading dims are kept
+        orig_srs: Source sample rate of each waveform
+        target_sr: Output sample rate
+        max_batch_samples: Upper bound on B * N of a single padded batch
+
+    Returns:
+        List[torch.Tensor]: Resampled waveforms, in input order
+    """
+    results: List[torch.Tensor] = list(waveforms)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i, sr in enumerate(orig_srs):
+        if sr != target_sr:
+            groups[sr].append(i)
+
+    for sr, indices in groups.items():
+        # Sorting by length keeps the padding inside each chunk small
+        indices.sort(key=lambda i: waveforms[i].shape[-1])
+        chunk: List[int] = []
+        chunk_rows = 0
+        for i in indices:
+            n_rows = waveforms[i][..., 0].numel()
+            # Waveform i is the longest so far, so it sets the padded width
+            if chunk and (chunk_rows + n_rows) * waveforms[i].shape[-1] > max_batch_samples:
+                _resample_chunk(waveforms, chunk, sr, target_sr, results)
+                chunk, chunk_rows = [], 0
+            chunk.append(i)
+            chunk_rows += n_rows
+        if chunk:
+            _resample_chunk(waveforms, chunk, sr, target_sr, results)
+
+    return results
+
+
+def _resample_chunk(
+    waveforms: Sequence[torch.Tensor],
+    chunk: List[int],
+    orig_sr: int,
+    target_sr: int,
+    results: List[torch.Tensor],
+) -> None:
+    longest = max(waveforms[i].shape[-1] for i in chunk)
+    rows = [waveforms[i].reshape(-1, waveforms[i].shape[-1]) for i in chunk]
+    batch = torch.cat([torch.nn.functional.pad(r, (0, longest - r.shape[-1])) for r in rows])
+    out = resample(batch, orig_sr, target_sr)
+
+    start = 0
+    for i, r in zip(chunk, rows):
+        length = resampled_length(waveforms[i].shape[-1], orig_sr, target_sr)
+        results[i] = out[start:start + r.shape[0], :length].reshape(*waveforms[i].shape[:-1], length)
+        start += r.shape[0]
@@ -0,0 +1,218 @@
+"""
+Contiguous store of decoded, resampled mono waveforms shared by all DataLoader workers.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Literal, Optional, Sequence
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import torch
+import torchaudio
+
+from data_utils.resample import resample_batch, resampled_length
+
+INT16_SCALE = 32767.0
+
+
+class WaveformArena:
+    """
+    Every waveform of a corpus, decoded once into a single flat buffer.
+
+    The buffer lives either in torch shared memory (inherited by forked
+    workers, passed by handle to spawned ones) or in a memory-mapped file that
+    every process maps read-only and that can be reused by later runs. An
+    offsets/lengths index maps dataset indices to slices of the buffer.
+    Files that do not fit the byte budget are left out and have offset -1,
+    so callers fall back to decoding them from disk.
+    """
+
+    def __init__(
+        self,
+        buffer: torch.Tensor,
+        offsets: np.ndarray,
+        lengths: np.ndarray,
+        storage: Literal["float32", "int16"] = "float32",
+        path: Optional[Path] = None,
+    ) -> None:
+        self.buffer = buffer
+        self.offsets = offsets
+        self.lengths = lengths
+        self.storage = storage
+        self.path = path
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __contains__(self, idx: int) -> bool:
+        return 0 <= idx < len(self.offsets) and self.offsets[idx] >= 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.numel() * self.buffer.element_size()
+
+    def get(self, idx: int) -> torch.Tensor:
+        """
+        Return waveform `idx` as a 1D float32 tensor.
+
+        For float32 storage this is a view into the shared buffer, so callers
+        must not modify it in place.
+        """
+        start = int(self.offsets[idx])
+        if start < 0:
+            raise KeyError(f"Waveform {idx} is not stored in the arena")
+        waveform = self.buffer[start:start + int(self.lengths[idx])]
+        if self.storage == "int16":
+            return waveform.float() / INT16_SCALE
+        return waveform
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        if self.path is not None:
+            # Workers re-map the file instead of receiving a pickled copy
+            state["buffer"] = self.buffer.numel()
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        if isinstance(self.buffer, int):
+            self.buffer = _open_memmap(self.path, self.storage, self.buffer)
+
+    @classmethod
+    def build(
+        cls,
+        file_paths: Sequence[Path],
+        target_sr: int,
+        sample_rates: Sequence[int],
+        num_frames: Sequence[int],
+        storage: Literal["float32", "int16"] = "float32",
+        max_bytes: int = 2 * 1024**3,
+        path: Optional[Path] = None,
+        num_workers: Optional[int] = None,
+        chunk_size: int = 256,
+        logger: Optional[logging.Logger] = None,
+    ) -> "WaveformArena":
+        """
+        Decode, resample and down-mix every file into a new arena.
+
+        Args:
+            file_paths: Audio files, in dataset index order
+            target_sr: Sample rate of the stored waveforms
+            sample_rates: Source sample rate of each file (e.g. from the manifest)
+            num_frames: Source length of each file in frames
+            storage: "float32", or "int16" to halve memory at 16-bit precision
+            max_bytes: Byte budget; files past the budget are not stored
+            path: If given, back the arena by a memory-mapped file at this path
+                and reuse it on later runs when the corpus is unchanged
+            num_workers: Number of decoding threads (executor default if None)
+            chunk_size: Files decoded and batch-resampled together
+            logger: Optional logger for messages
+
+        Returns:
+            WaveformArena
+        """
+
+        def log(msg: str):
+            if logger:
+                logger.info(msg)
+            else:
+                print(msg)
+
+        dtype = torch.int16 if storage == "int16" else torch.float32
+        itemsize = torch.empty((), dtype=dtype).element_size()
+
+        lengths = np.array(
+            [resampled_length(n, sr, target_sr) for n, sr in zip(num_frames, sample_rates)],
+            dtype=np.int64,
+        )
+        offsets = np.full(len(lengths), -1, dtype=np.int64)
+        total = 0
+        for i, length in enumerate(lengths):
+            if (total + length) * itemsize > max_bytes:
+                break
+            offsets[i] = total
+            total += int(length)
+
+        stored = int((offsets >= 0).sum())
+        if stored < len(lengths):
+            log(f"Waveform arena budget of {max_bytes / 1024**2:.0f} MB holds "
+                f"{stored}/{len(lengths)} files; the rest are decoded from disk")
+
+        fingerprint = _fingerprint(file_paths[:stored], target_sr, storage)
+        if path is not None:
+            index = _read_index(path)
+            if index is not None and index.get("fingerprint") == fingerprint:
+                log(f"Reusing waveform arena at {path}")
+                buffer = _open_memmap(path, storage, total)
+                return cls(buffer, offsets, lengths, storage=storage, path=path)
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _index_path(path).unlink(missing_ok=True)
+            np.memmap(path, dtype=storage, mode="w+", shape=(max(total, 1),)).flush()
+            buffer = _open_memmap(path, storage, total, mode="r+")
+        else:
+            buffer = torch.zeros(total, dtype=dtype).share_memory_()
+
+        def write_waveform(i: int, waveform: torch.Tensor) -> None:
+            waveform = waveform.mean(dim=0)
+
+            # Header frame counts can disagree with the decoded length by a few samples
+            length = int(lengths[i])
+            waveform = torch.nn.functional.pad(waveform[:length], (0, max(0, length - waveform.shape[-1])))
+            if storage == "int16":
+                waveform = (waveform.clamp(-1.0, 1.0) * INT16_SCALE).round().to(torch.int16)
+            start = int(offsets[i])
+            buffer[start:start + length] = waveform
+
+        # Decode a chunk of files on threads, then resample it in one batch per source rate
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            for chunk_start in range(0, stored, chunk_size):
+                chunk = range(chunk_start, min(stored, chunk_start + chunk_size))
+                decoded = list(executor.map(lambda i: torchaudio.load(file_paths[i]), chunk))
+                resampled = resample_batch(
+                    [waveform for waveform, _ in decoded], [sr for _, sr in decoded], target_sr
+                )
+                for i, waveform in zip(chunk, resampled):
+                    write_waveform(i, waveform)
+
+        if path is not None:
+            _write_index(path, fingerprint)
+            buffer = _open_memmap(path, storage, total)
+
+        log(f"Waveform arena: {stored} files, {total * itemsize / 1024**2:.1f} MB ({storage})")
+        return cls(buffer, offsets, lengths, storage=storage, path=path)
+
+
+def _open_memmap(path: Path, storage: str, total: int, mode: str = "c") -> torch.Tensor:
+    # Copy-on-write mapping gives writable (zero-copy) tensors without touching the file
+    array = np.memmap(path, dtype=storage, mode=mode, shape=(max(total, 1),))
+    return torch.from_numpy(array)
+
+
+def _fingerprint(file_paths: Sequence[Path], target_sr: int, storage: str) -> str:
+    digest = hashlib.sha1(f"{target_sr}:{storage}".encode())
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        digest.update(f"{file_path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_suffix(path.suffix + ".json")
+
+
+def _read_index(path: Path) -> Optional[dict]:
+    try:
+        with open(_index_path(path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_index(path: Path, fingerprint: str) -> None:
+    with open(_index_path(path), "w") as f:
+        json.dump({"fingerprint": fingerprint}, f)
@@ -0,0 +1,171 @@
+# src/experiment/distributed.py
+
+"""
+Data-parallel training over several processes with torch.distributed.
+
+Every rank runs the same `Experiment` on its own model replica:
+- The contrastive batch sampler is sharded by rank.
+- DistributedDataParallel averages the gradients.
+- Embeddings and labels are gathered across ranks, so the supervised
+  contrastive loss sees the negatives of the global batch.
+- Only rank 0 writes to the run directory.
+
+The default gloo backend runs on CPU, so several processes can share one
+host without a GPU. Launch with torchrun
+(`torchrun --nproc-per-node=4 main.py`), which sets RANK, WORLD_SIZE,
+MASTER_ADDR and MASTER_PORT, or call `launch(params)`, which spawns
+`params.world_size` processes on this host.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+import os
+import socket
+
+import torch
+import torch.distributed as dist
+import torch.nn as nn
+
+from experiment.exp_params import ExpParams
+
+
+@dataclass(frozen=True)
+class DistributedContext:
+    """Rank and world size of this process (rank 0 of 1 when not distributed)."""
+
+    rank: int = 0
+    world_size: int = 1
+
+    @property
+    def enabled(self) -> bool:
+        return self.world_size > 1
+
+    @property
+    def is_main(self) -> bool:
+        return self.rank == 0
+
+    def broadcast(self, obj: Any) -> Any:
+        """Return rank 0's `obj` on every rank."""
+        if not self.enabled:
+            return obj
+        objects = [obj]
+        dist.broadcast_object_list(objects, src=0)
+        return objects[0]
+
+    def barrier(self) -> None:
+        if self.enabled:
+            dist.barrier()
+
+
+@contextmanager
+def main_process_first(ctx: DistributedContext):
+    """Let rank 0 run the block (e.g. filling shared caches) before the other ranks do."""
+    if not ctx.is_main:
+        ctx.barrier()
+    yield
+    if ctx.is_main:
+        ctx.barrier()
+
+
+def init_from_env(backend: str = "gloo") -> DistributedContext:
+    """
+    Join the process group described by torchrun's environment variables.
+
+    Returns a single-process context when the script was not launched by torchrun.
+    """
+    if int(os.environ.get("WORLD_SIZE", "1")) <= 1:
+        return DistributedContext()
+    if not dist.is_initialized():
+        dist.init_process_group(backend, init_method="env://")
+    return DistributedContext(dist.get_rank(), dist.get_world_size())
+
+
+def launch(params: ExpParams) -> None:
+    """Spawn `params.world_size` training processes on this host and wait for them."""
+    torch.multiprocessing.spawn(
+        _run_rank,
+        args=(params.world_size, params, _free_port()),
+        nprocs=params.world_size,
+        join=True,
+    )
+
+
+def _run_rank(rank: int, world_size: int, params: ExpParams, port: int) -> None:
+    # Imported here: experiment.py imports this module
+    from experiment.experiment import Experiment
+
+    os.environ["MASTER_ADDR"] = "127.0.0.1"
+    os.environ["MASTER_PORT"] = str(port)
+    dist.init_process_group(params.dist_backend, rank=rank, world_size=world_size)
+    try:
+        ctx = DistributedContext(rank, world_size)
+        Experiment(params, dist_ctx=ctx).train()
+        # Rank 0 hosts the store and finishes last (it evaluates), so the others wait for it before teardown
+        ctx.barrier()
+    finally:
+        dist.destroy_process_group()
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class _GatherWithGrad(torch.autograd.Function):
+    """
+    all_gather whose backward returns this rank's slice of the summed gradient.
+
+    Every rank computes the same loss over the gathered batch, so the
+    gradients of a rank's own embeddings are summed over the ranks' losses.
+    DDP then averages parameter gradients over the ranks, which cancels that
+    factor and leaves the gradient of the global loss.
+    """
+
+    @staticmethod
+    def forward(ctx, x: torch.Tensor) -> torch.Tensor:
+        parts = [torch.empty_like(x) for _ in range(dist.get_world_size())]
+        dist.all_gather(parts, x.contiguous())
+        ctx.batch_size = x.shape[0]
+        return torch.cat(parts)
+
+    @staticmethod
+    def backward(ctx, grad: torch.Tensor) -> torch.Tensor:
+        grad = grad.contiguous()
+        dist.all_reduce(grad)
+        start = dist.get_rank() * ctx.batch_size
+        return grad[start:start + ctx.batch_size]
+
+
+def gather_embeddings(x: torch.Tensor) -> torch.Tensor:
+    """Concatenate [B, ...] tensors of every rank in rank order, keeping gradients to the local part."""
+    return _GatherWithGrad.apply(x)
+
+
+def gather_labels(y: torch.Tensor) -> torch.Tensor:
+    """Concatenate [B, ...] tensors of every rank in rank order, without gradients."""
+    parts = [torch.empty_like(y) for _ in range(dist.get_world_size())]
+    dist.all_gather(parts, y.detach().contiguous())
+    return torch.cat(parts)
+
+
+class GlobalBatchLoss(nn.Module):
+    """
+    A contrastive loss over the embeddings and labels of all ranks.
+
+    Every rank must pass batches of the same size (as the sharded
+    contrastive samplers produce). Outside a process group it is the
+    wrapped loss.
+    """
+
+    def __init__(self, criterion: nn.Module) -> None:
+        super().__init__()
+        self.criterion = criterion
+
+    def forward(self, embeddings: torch.Tensor, labels: torch.Tensor, **kwargs) -> torch.Tensor:
+        """Extra tensor arguments (e.g. momentum-encoder keys) are gathered without gradients."""
+        if dist.is_initialized() and dist.get_world_size() > 1:
+            embeddings, labels = gather_embeddings(embeddings), gather_labels(labels)
+            kwargs = {name: gather_labels(value) for name, value in kwargs.items()}
+        return self.criterion(embeddings, labels, **kwargs)
@@ -13,6 +13,7 @@ class ExpParams(BaseModel):
     output_dir: Path = Path("outputs")
     log_dir: Path = Path("logs")
     run_base_dir: Path = Path("runs")
+    cache_dir: Path = Path("cache")
 
     # === Audio ===
     target_sr: int = 16000
@@ -20,7 +21,23 @@ class ExpParams(BaseModel):
 
     # === Dataset ===
     n_augment: int = 1
-    pad_strategy: Literal["random", "left", "right"] = "random"
+    n_views: int = 1  # Views per decoded clip; > 1 stacks independently augmented views
+    pad_strategy: Literal["random", "left", "right", "center"] = "random"
+    dynamic_padding: bool = False
+    length_bucketing: bool = False
+    use_manifest: bool = True
+    num_probe_workers: Optional[int] = None
+
+    # === Waveform arena ===
+    use_waveform_arena: bool = False
+    arena_storage: Literal["float32", "int16"] = "float32"
+    arena_max_bytes: int = 2 * 1024**3
+    arena_path: Optional[Path] = None
+
+    # === Feature store ===
+    use_feature_store: bool = False
+    feature_store_dir: Path = Path("cache/features")
+    feature_store_dtype: Literal["float16", "float32"] = "float16"
 
     # === Transforms ===
     use_mfcc: bool = True
@@ -29,6 +46,7 @@ class ExpParams(BaseModel):
     use_time_mask: bool = True
     use_freq_mask: bool = True
     use_noise: bool = True
+    batched_features: bool = False
 
     time_mask_p: float = 0.5
     time_mask_param: int = 30
@@ -36,6 +54,9 @@ class ExpParams(BaseModel):
     freq_mask_param: int = 10
     noise_std: float = 0.005
     noise_p: float = 0.3
+    wavelet: str = "db4"
+    wavelet_level: int = 5
+    wavelet_mode: Literal["zero", "constant", "symmetric", "reflect", "periodic", "periodization"] = "zero"
 
     # === Device ===
     device: Literal["auto", "cuda", "cpu", "mps"] = "auto"
@@ -46,23 +67,55 @@ class ExpParams(BaseModel):
     learning_rate: float = 3e-4
     num_workers: int = 1
     pin_memory: Optional[bool] = None
+    prefetch_factor: Optional[int] = None
+    persistent_workers: bool = True  # False restarts the workers for every epoch and evaluation pass
+    autotune_dataloader: bool = False
+    autotune_batches: int = 20
     drop_last: bool = False
 
+    # === Acceleration ===
+    precision: Literal["fp32", "bf16", "fp16"] = "fp32"
+    compile_model: bool = False
+    compile_mode: Optional[str] = None
+    memory_format: Literal["contiguous", "channels_last"] = "contiguous"
+    throughput_benchmark_steps: int = 0
+
     # === Model ===
     embedding_dim: int = 128
     use_attention: bool = True
     temperature: float = 0.07
     loss_type: Literal["supervised", "ntxent"] = "supervised"
+    queue_size: int = 0
+    queue_momentum: float = 0.0
+
+    # === Logging ===
+    metrics_flush_every: int = 50
+
+    # === Profiling ===
+    profile_stages: bool = False
+    profile_trace_start: int = 5
+    profile_trace_steps: int = 0
 
     # === Evaluation ===
     eval_classifier_every: int = 5
+    eval_probe: Literal["knn", "ridge", "centroid", "random_forest"] = "knn"
+    eval_probe_test_size: float = 0.2
+    eval_knn_k: int = 5
+    eval_ridge_alpha: float = 1.0
+    eval_pad_strategy: Literal["left", "right", "center"] = "center"
+    cache_eval_set: bool = True
 
     # === Cross-validation ===
     use_kfold: bool = True
     n_splits: int = 5
+    parallel_folds: int = 1
+
+    # === Distributed ===
+    world_size: int = 1
+    dist_backend: Literal["gloo", "nccl"] = "gloo"
 
     # === Experiment control ===
-    mode: Literal["train", "evaluate", "visualize"] = "train"
+    mode: Literal["train", "evaluate", "visualize", "precompute"] = "train"
     console_log_level: Literal["info", "debug"] = "info"
 
     def generate_run_id(self) -> str:
@@ -1,112 +1,374 @@
 # experiment.py
 
+import copy
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Optional
 from experiment.exp_params import ExpParams
-from data_utils.parser import parse_dataset
+from experiment.distributed import DistributedContext, GlobalBatchLoss, main_process_first
+from data_utils.parser import parse_manifest, dataset_from_manifest
+from data_utils.manifest import default_manifest_path
 from data_utils.dataset import PhonemeDataset
+from data_utils.waveform_arena import WaveformArena
+from data_utils.feature_store import FeatureStore, module_signature, precompute_features
+from data_utils.collate import (
+    pad_collate, multiview_collate, multiview_pad_collate, unpack_batch, embed,
+)
+from data_utils.resample import resampled_length
+from data_utils.eval_set import EvalSet, eval_indices
+from data_utils.loader_service import LoaderService
 from utils.device import get_best_device
 from utils.logging import create_logger
-from utils.system_resources import adjust_exp_params_for_system
-from transforms.build_transforms import build_transforms
+from utils.system_resources import adjust_exp_params_for_system, fold_resource_shares
+from utils.dataloader_tuning import apply_tuned_settings, autotune_dataloader, dataloader_kwargs
+from utils import profiler
+from utils.profiler import Profiled, WorkerInit, aggregate_profiles, trace_window
+from utils.metrics import MetricsWriter, StepMetrics, memory_usage_mb, reset_peak_memory, summarize_folds
+from utils.acceleration import (
+    CompiledCallable, autocast_context, make_grad_scaler, resolve_precision, time_steps,
+    to_memory_format,
+)
+from transforms.build_transforms import (
+    build_transforms, build_feature_transform, build_augment_transforms, build_batch_transform,
+    build_eval_transforms,
+)
+from transforms.compose import Compose
 from models.phoneme_net import PhonemeNet
 from models.losses import SupervisedContrastiveLoss
+from models.memory_bank import MomentumEncoder, QueueContrastiveLoss
 from utils.evaluate_latent_classification import evaluate_latent_classification
-from utils.samplers import MultiViewBatchSampler
+from utils.samplers import MultiViewBatchSampler, BucketBatchSampler
 
-from torch.utils.data import DataLoader, Subset
+from torch.utils.data import default_collate
+from torch.nn.parallel import DistributedDataParallel
 from sklearn.model_selection import KFold
 import torch
 import numpy as np
 import csv
+import time
 from tqdm import tqdm
 
 
 class Experiment:
-    def __init__(self, params: ExpParams) -> None:
+    def __init__(
+        self,
+        params: ExpParams,
+        run_dir: Optional[Path] = None,
+        log_dir: Optional[Path] = None,
+        dist_ctx: Optional[DistributedContext] = None,
+    ) -> None:
+        """
+        Args:
+            params: Experiment parameters
+            run_dir: Existing run directory to work in. Used by fold worker
+                processes, whose params are already adjusted for the system
+            log_dir: Log directory (`run_dir / "logs"` if None)
+            dist_ctx: Rank and world size for data-parallel training (see
+                `experiment.distributed`). Only rank 0 writes to the run
+                directory; the other ranks take its run directory and params
+        """
         self.device = get_best_device(device_str=params.device)
-
-        run_id = params.generate_run_id()
-        self.run_dir = params.run_base_dir / run_id
-        self.run_dir.mkdir(parents=True, exist_ok=True)
-
-        self.logger = create_logger(
-            self.run_dir / "logs", console_log_level=params.console_log_level
-        )
+        self.dist = dist_ctx or DistributedContext()
+
+        is_worker = run_dir is not None
+        if self.dist.is_main:
+            if run_dir is None:
+                run_id = params.generate_run_id()
+                run_dir = params.run_base_dir / run_id
+            run_dir.mkdir(parents=True, exist_ok=True)
+            self.logger = create_logger(
+                log_dir or run_dir / "logs", console_log_level=params.console_log_level
+            )
+        else:
+            self.logger = create_logger(None, console_log_level="warning")
+        self.run_dir = run_dir
         self.logger.info(f"Using device: {self.device}")
         self.logger.info(f"Run directory: {self.run_dir}")
 
-        self.params = adjust_exp_params_for_system(params, self.device, logger=self.logger)
-
-        self.logger.debug("Adjusted experiment parameters:")
-        self.logger.debug(self.params.model_dump_json(indent=2))
-
-        self.params.to_json(self.run_dir / "config.json")
+        if is_worker:
+            self.params = params
+        elif self.dist.is_main:
+            self.params = adjust_exp_params_for_system(params, self.device, logger=self.logger)
+            if self.dist.enabled:
+                # The ranks share this host's cores, like parallel folds do
+                _, num_workers = fold_resource_shares(self.dist.world_size)
+                self.params.num_workers = min(self.params.num_workers, num_workers)
+
+            self.logger.debug("Adjusted experiment parameters:")
+            self.logger.debug(self.params.model_dump_json(indent=2))
+
+            self.params.to_json(self.run_dir / "config.json")
+
+        if self.dist.enabled:
+            self.run_dir, self.params = self.dist.broadcast(
+                (self.run_dir, self.params if self.dist.is_main else None)
+            )
+            num_threads, _ = fold_resource_shares(self.dist.world_size)
+            torch.set_num_threads(num_threads)
+
+        # Set by train() when feature extraction runs per batch on the device
+        self.batch_transform = None
+        # Clip lengths at target_sr, used for length bucketing
+        self.clip_lengths = None
+        # Deterministic evaluation view of the corpus (fixed padding, no augmentation)
+        self.eval_dataset = None
+        self.eval_batch_transform = None
+        # DataLoader worker pool shared by every fold (restarted per fold when profiling), started on first use
+        self.loader_service = None
 
     def train(self) -> None:
         self.logger.info("Starting training...")
+        if self.dist.enabled and self.params.parallel_folds > 1:
+            raise ValueError("parallel_folds > 1 cannot be combined with distributed training")
+
+        # Rank 0 fills the shared caches (manifest, arena file, feature store) first
+        with main_process_first(self.dist):
+            dataset, int_labels = self._build_dataset()
+
+        if self.params.autotune_dataloader:
+            tuned = None
+            if self.dist.is_main:
+                tuned = autotune_dataloader(
+                    dataset, self.params,
+                    cache_path=self.params.cache_dir / "dataloader_autotune.json",
+                    collate_fn=self._train_collate_fn(),
+                    n_batches=self.params.autotune_batches,
+                    logger=self.logger,
+                )
+            apply_tuned_settings(self.params, self.dist.broadcast(tuned))
+            if self.dist.is_main:
+                self.params.to_json(self.run_dir / "config.json")
+
+        try:
+            if self.params.use_kfold:
+                self._run_kfold_training(dataset, int_labels)
+            else:
+                self._run_single_fold(dataset, list(range(len(dataset))), fold_id=None)
+        finally:
+            self._close_loader_service()
+
+    def _build_dataset(self):
+        file_paths, int_labels, lengths, records = self._load_corpus()
+        arena = self._build_waveform_arena(file_paths, records)
+        self.clip_lengths = np.array(
+            [resampled_length(r.num_frames, r.sample_rate, self.params.target_sr) for r in records],
+            dtype=np.int64,
+        )
 
-        file_paths, int_labels, label_map, _ = parse_dataset(
-            self.params.data_path, logger=self.logger
+        feature_store = None
+        if self.params.use_feature_store:
+            feature_store = self._build_feature_store(file_paths, int_labels, lengths, arena)
+            if self.params.batched_features:
+                transform = Compose([])
+                self.batch_transform = build_batch_transform(self.params, include_feature=False)
+            else:
+                transform = Compose(build_augment_transforms(self.params))
+        elif self.params.batched_features:
+            transform, self.batch_transform = build_transforms(self.params, split=True)
+        else:
+            transform = build_transforms(self.params)
+        self.logger.debug(f"Transform pipeline: {transform}")
+        if self.batch_transform is not None:
+            self.logger.debug(f"Batch transform: {self.batch_transform}")
+
+        dataset = PhonemeDataset(
+            file_paths, int_labels, params=self.params, transform=transform,
+            lengths=lengths, arena=arena, feature_store=feature_store,
+        )
+
+        eval_transform, self.eval_batch_transform = build_eval_transforms(
+            self.params, include_feature=feature_store is None
+        )
+        eval_params = self.params.model_copy(update={
+            "pad_strategy": self.params.eval_pad_strategy, "n_augment": 1, "n_views": 1,
+        })
+        self.eval_dataset = PhonemeDataset(
+            file_paths, int_labels, params=eval_params, transform=eval_transform,
+            lengths=lengths, arena=arena, feature_store=feature_store,
+        )
+        return dataset, int_labels
+
+    def precompute_features(self) -> None:
+        """Fill the feature store for the corpus without training."""
+        self.logger.info("Precomputing features...")
+        file_paths, int_labels, lengths, records = self._load_corpus()
+        arena = self._build_waveform_arena(file_paths, records)
+        self._build_feature_store(file_paths, int_labels, lengths, arena)
+
+    def _load_corpus(self):
+        manifest_path = (
+            default_manifest_path(self.params.cache_dir, self.params.data_path)
+            if self.params.use_manifest else None
+        )
+        records = parse_manifest(
+            self.params.data_path,
+            manifest_path=manifest_path,
+            num_workers=self.params.num_probe_workers,
+            logger=self.logger,
+        )
+        file_paths, int_labels, label_map, lengths = dataset_from_manifest(
+            self.params.data_path, records, logger=self.logger
         )
 
         self.logger.info(f"Found {len(file_paths)} usable audio files")
         self.logger.info(f"Detected {len(label_map)} unique phoneme labels")
         self.logger.debug(f"Phoneme labels: {sorted(label_map.keys())}")
 
-        transform = build_transforms(self.params)
-        self.logger.debug(f"Transform pipeline: {transform}")
+        return file_paths, int_labels, lengths, [r for r in records if r.usable]
+
+    def _build_waveform_arena(self, file_paths, records):
+        if not self.params.use_waveform_arena:
+            return None
+
+        return WaveformArena.build(
+            file_paths,
+            target_sr=self.params.target_sr,
+            sample_rates=[r.sample_rate for r in records],
+            num_frames=[r.num_frames for r in records],
+            storage=self.params.arena_storage,
+            max_bytes=self.params.arena_max_bytes,
+            path=self.params.arena_path,
+            num_workers=self.params.num_probe_workers,
+            logger=self.logger,
+        )
 
-        dataset = PhonemeDataset(file_paths, int_labels, params=self.params, transform=transform)
+    def _build_feature_store(self, file_paths, labels, lengths, arena):
+        feature_transform = build_feature_transform(self.params)
+        if feature_transform is None:
+            raise ValueError("The feature store requires use_mfcc or use_log_mel")
 
-        if self.params.use_kfold:
-            self._run_kfold_training(dataset, int_labels)
-        else:
-            self._run_single_fold(dataset, list(range(len(dataset))), fold_id=None)
+        # Stored features are computed with fixed, left-aligned padding
+        store_params = self.params.model_copy(update={"pad_strategy": "left", "n_augment": 1, "n_views": 1})
+        source = PhonemeDataset(
+            file_paths, labels, params=store_params, lengths=lengths, arena=arena
+        )
+
+        store = FeatureStore(
+            self.params.feature_store_dir,
+            signature={
+                "extractor": module_signature(feature_transform),
+                "target_sr": self.params.target_sr,
+                "max_length": source.max_length,
+            },
+            dtype=self.params.feature_store_dtype,
+        )
+        store.bind(file_paths)
+        precompute_features(
+            store, source, feature_transform,
+            num_workers=self.params.num_workers, logger=self.logger,
+        )
+        return store
 
     def _run_kfold_training(self, dataset, labels):
         kf = KFold(n_splits=self.params.n_splits, shuffle=True, random_state=42)
-        for fold_idx, (train_idx, val_idx) in enumerate(kf.split(np.zeros(len(labels)))):
-            self.logger.info(f"--- Fold {fold_idx + 1}/{self.params.n_splits} ---")
-            self._run_single_fold(dataset, train_idx, val_idx, fold_id=fold_idx)
+        splits = list(kf.split(np.zeros(len(labels))))
+
+        if self.params.parallel_folds > 1:
+            self._run_parallel_folds(dataset, splits)
+        else:
+            for fold_idx, (train_idx, val_idx) in enumerate(splits):
+                self.logger.info(f"--- Fold {fold_idx + 1}/{self.params.n_splits} ---")
+                self._run_single_fold(dataset, train_idx, val_idx, fold_id=fold_idx)
+
+        if self.dist.is_main:
+            summarize_folds(self.run_dir, list(range(len(splits))), logger=self.logger)
+
+    def _run_parallel_folds(self, dataset, splits):
+        n_parallel = min(self.params.parallel_folds, len(splits))
+        num_threads, num_workers = fold_resource_shares(n_parallel)
+        fold_params = self.params.model_copy(update={"num_workers": num_workers})
+        self.logger.info(
+            f"Running {len(splits)} folds, {n_parallel} at a time | "
+            f"per fold: {num_threads} torch threads, {num_workers} DataLoader workers"
+        )
+
+        # Spawned processes avoid forking a parent with live torch thread pools
+        with ProcessPoolExecutor(
+            max_workers=n_parallel, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _run_fold_process, fold_params, self.run_dir, fold_idx, train_idx, val_idx,
+                    dataset, self.eval_dataset, self.batch_transform, self.eval_batch_transform,
+                    self.clip_lengths, num_threads,
+                ): fold_idx
+                for fold_idx, (train_idx, val_idx) in enumerate(splits)
+            }
+            for future in futures:
+                best_acc = future.result()
+                self.logger.info(f"Fold {futures[future] + 1}/{len(splits)} finished | best accuracy {best_acc:.4f}")
 
     def _run_single_fold(self, dataset, train_idx, val_idx=None, fold_id=None):
         fold_dir = self.run_dir / f"fold_{fold_id}" if fold_id is not None else self.run_dir
-        (fold_dir / "models").mkdir(parents=True, exist_ok=True)
-        (fold_dir / "metrics").mkdir(parents=True, exist_ok=True)
+        if self.dist.is_main:
+            (fold_dir / "models").mkdir(parents=True, exist_ok=True)
+            (fold_dir / "metrics").mkdir(parents=True, exist_ok=True)
 
         if val_idx is None:
             val_split = int(0.8 * len(train_idx))
             val_idx = train_idx[val_split:]
             train_idx = train_idx[:val_split]
 
-        train_labels = [dataset[i][1] for i in train_idx]
-        sampler = MultiViewBatchSampler(
-            labels=train_labels,
-            n_views=2,
-            n_classes_per_batch=self.params.batch_size // 2
-        )
-
-        train_loader = DataLoader(
-            Subset(dataset, train_idx),
-            batch_sampler=sampler,
-            num_workers=self.params.num_workers,
-            pin_memory=bool(self.params.pin_memory),
-        )
+        train_labels = dataset.labels_for(train_idx)
+        train_lengths = None
+        if self.params.length_bucketing:
+            train_lengths = self._clip_lengths_for(train_idx)
 
-        val_loader = DataLoader(
-            Subset(dataset, val_idx),
+        # Multi-view datasets return n_views views per index, so batch_size counts views.
+        # Each rank iterates its own share of the epoch's batches.
+        sampler = MultiViewBatchSampler.for_batch_size(
+            train_labels,
             batch_size=self.params.batch_size,
-            shuffle=False,
-            num_workers=self.params.num_workers,
-            pin_memory=bool(self.params.pin_memory),
-            drop_last=False,
+            n_views=self.params.n_views,
+            lengths=train_lengths,
+            rank=self.dist.rank,
+            world_size=self.dist.world_size,
         )
 
+        # Stage timings of this process and of the DataLoader workers go to fold_k/profile/
+        profile_dir = fold_dir / "profile"
+        if self._profiling:
+            profiler.enable(profile_dir, device=self.device)
+
+        # The fold's splits are served by the run's worker pool, so no workers are started here
+        loaders = self._get_loader_service(dataset, profile_dir)
+        train_loader = loaders.view("train", train_idx, batch_sampler=sampler)
+
+        val_idx = eval_indices(val_idx, len(self.eval_dataset.file_paths))
+        eval_batch_transform = None
+        if self.eval_batch_transform is not None:
+            eval_batch_transform = self.eval_batch_transform.to(self.device)
+
+        if not self.dist.is_main:
+            # Only rank 0 evaluates
+            val_data = None
+        elif self.params.cache_eval_set:
+            # Decode and featurize the validation split once for the whole fold
+            val_data = EvalSet.materialize(
+                self.eval_dataset, val_idx, self.device,
+                batch_transform=eval_batch_transform,
+                loader=loaders.view("eval", val_idx, batch_size=self.params.batch_size),
+            )
+            eval_batch_transform = None
+            self.logger.info(
+                f"Cached {len(val_data)} validation inputs on {self.device} "
+                f"({val_data.nbytes / 1024**2:.1f} MB)"
+            )
+        else:
+            val_sampler = None
+            if self.params.length_bucketing:
+                val_sampler = BucketBatchSampler(
+                    self._clip_lengths_for(val_idx), batch_size=self.params.batch_size, shuffle=False
+                )
+            val_data = loaders.view("eval", val_idx, batch_sampler=val_sampler, batch_size=self.params.batch_size)
+
         self.logger.debug(
             "Dataloader settings:\n"
             f"  Batch size:   {self.params.batch_size}\n"
             f"  Num workers:  {self.params.num_workers}\n"
+            f"  Prefetch:     {self.params.prefetch_factor} (workers shared by all folds)\n"
             f"  Pin memory:   {self.params.pin_memory}\n"
             f"  Drop last:    {self.params.drop_last}"
         )
@@ -123,53 +385,340 @@ class Experiment:
         )
         self.logger.debug(str(model))
 
+        batch_transform = None
+        if self.batch_transform is not None:
+            batch_transform = self.batch_transform.to(self.device)
+
         optimizer = torch.optim.Adam(model.parameters(), lr=self.params.learning_rate)
         
-        criterion = SupervisedContrastiveLoss(
-            temperature=self.params.temperature,
-            logger=self.logger
-        )
-
+        if self.params.queue_size > 0:
+            # Small batches contrast against a queue of earlier embeddings as well
+            criterion = QueueContrastiveLoss(
+                temperature=self.params.temperature,
+                queue_size=self.params.queue_size,
+                embedding_dim=self.params.embedding_dim,
+                loss_type=self.params.loss_type,
+            ).to(self.device)
+            self.logger.info(
+                f"Loss function: QueueContrastiveLoss ({self.params.loss_type}, temperature={self.params.temperature}, "
+                f"queue_size={self.params.queue_size}, momentum={self.params.queue_momentum})"
+            )
+        else:
+            criterion = SupervisedContrastiveLoss(
+                temperature=self.params.temperature,
+                logger=self.logger
+            )
+            self.logger.info(f"Loss function: SupervisedContrastiveLoss (temperature={self.params.temperature})")
 
         self.logger.debug(f"Optimizer: Adam (lr={self.params.learning_rate})")
-        self.logger.info(f"Loss function: SupervisedContrastiveLoss (temperature={self.params.temperature})")
+
+        if self.params.memory_format == "channels_last":
+            model = model.to(memory_format=torch.channels_last)
+
+        autocast_dtype = resolve_precision(self.device, self.params.precision, logger=self.logger)
+        scaler = make_grad_scaler(self.device, autocast_dtype)
+
+        # Compiled callables for training; `model` stays eager for evaluation and checkpoints
+        train_model, train_criterion = model, criterion
+        if self.dist.enabled:
+            # Gradients are averaged over the ranks, and the loss sees every rank's embeddings
+            train_model = DistributedDataParallel(model)
+            train_criterion = GlobalBatchLoss(criterion)
+            views_per_batch = sampler.classes_per_batch * sampler.samples_per_class * sampler.n_views
+            self.logger.info(
+                f"Data-parallel training on {self.dist.world_size} ranks | "
+                f"global batch of {self.dist.world_size * views_per_batch} views"
+            )
+
+        # Queue keys from a slowly moving copy of the model stay comparable across the queue.
+        # Built after the DDP wrap, which has copied rank 0's weights into `model`.
+        momentum_encoder = None
+        if self.params.queue_size > 0 and self.params.queue_momentum > 0:
+            momentum_encoder = MomentumEncoder(model, momentum=self.params.queue_momentum)
+
+        if self.params.compile_model:
+            train_model = CompiledCallable(train_model, "PhonemeNet", mode=self.params.compile_mode, logger=self.logger)
+            train_criterion = CompiledCallable(train_criterion, "loss", mode=self.params.compile_mode, logger=self.logger)
+
+        self.logger.info(
+            f"Acceleration | autocast={autocast_dtype or 'off'}, grad_scaler={scaler.is_enabled()}, "
+            f"compile={self.params.compile_model}, memory_format={self.params.memory_format}"
+        )
+        if self.params.throughput_benchmark_steps > 0:
+            self._log_throughput_gain(
+                model, criterion, train_model, train_criterion, scaler, autocast_dtype,
+                train_loader, batch_transform,
+            )
+            optimizer.zero_grad(set_to_none=True)
+            if isinstance(criterion, QueueContrastiveLoss):
+                criterion.queue.reset()
 
         best_acc = 0.0
-        acc_file = fold_dir / "metrics" / "accuracy.csv"
-        with acc_file.open("w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["epoch", "accuracy"])
-
-        for epoch in range(self.params.epochs):
-            self.logger.info(f"Epoch {epoch + 1}/{self.params.epochs}")
-            model.train()
-            total_loss = 0.0
-
-            for x, y in tqdm(train_loader, desc=f"Training Epoch {epoch + 1}"):
-                x, y = x.to(self.device), y.to(self.device)
-                optimizer.zero_grad()
-                embeddings = model(x)
-                self.logger.debug(f"Embeddings mean: {embeddings.mean().item():.4f}, std: {embeddings.std().item():.4f}")
-                loss = criterion(embeddings, y)
-                loss.backward()
-                self.logger.debug(f"Contrastive loss (batch): {loss.item():.6f}")
-                optimizer.step()
-                total_loss += loss.item()
-
-            avg_loss = total_loss / len(train_loader)
-            self.logger.info(f"Epoch {epoch + 1} completed | Avg Loss: {avg_loss:.4f}")
-
-            if (epoch + 1) % self.params.eval_classifier_every == 0:
-                acc = evaluate_latent_classification(model, val_loader, device=self.device)
-                self.logger.info(f"Diagnostic classifier accuracy: {acc:.4f}")
-                with acc_file.open("a", newline="") as f:
-                    writer = csv.writer(f)
-                    writer.writerow([epoch + 1, acc])
-
-                if acc > best_acc:
-                    best_acc = acc
-                    torch.save(model.state_dict(), fold_dir / "models" / "best.pt")
-                    self.logger.info(f"Saved new best model with accuracy {acc:.4f}")
-
-        torch.save(model.state_dict(), fold_dir / "models" / "last.pt")
-        self.logger.info("Final model saved.")
+        acc_handle = acc_writer = metrics_writer = None
+        if self.dist.is_main:
+            # accuracy.csv stays open for the fold; it is flushed after every row
+            acc_handle = (fold_dir / "metrics" / "accuracy.csv").open("w", newline="")
+            acc_writer = csv.writer(acc_handle)
+            acc_writer.writerow(["epoch", "accuracy"])
+            acc_handle.flush()
+
+            # Structured step/epoch/eval records, written in the background
+            metrics_writer = MetricsWriter(fold_dir / "metrics" / "metrics.jsonl")
+
+        # Loss (and debug statistics) stay on the device between flushes
+        step_metrics = StepMetrics(
+            flush_every=self.params.metrics_flush_every,
+            debug=self.params.console_log_level == "debug",
+            logger=self.logger,
+            writer=metrics_writer,
+        )
+
+        trace = None
+        if self.params.profile_trace_steps > 0 and self.dist.is_main:
+            trace = trace_window(
+                profile_dir / "trace.json", self.params.profile_trace_start,
+                self.params.profile_trace_steps, device=self.device,
+            )
+            trace.start()
+
+        try:
+            for epoch in range(self.params.epochs):
+                self.logger.info(f"Epoch {epoch + 1}/{self.params.epochs}")
+                sampler.set_epoch(epoch)
+                model.train()
+                step_metrics.reset()
+                n_samples = 0
+                data_wait, compute = 0.0, 0.0
+                reset_peak_memory(self.device)
+                epoch_start = step_end = time.perf_counter()
+
+                for batch in tqdm(train_loader, desc=f"Training Epoch {epoch + 1}"):
+                    step_start = time.perf_counter()
+                    profiler.record("data_wait", step_start - step_end)
+                    x, y, mask = unpack_batch(batch)
+                    with profiler.stage("host_to_device"):
+                        x, y = x.to(self.device), y.to(self.device)
+                        if mask is not None:
+                            mask = mask.to(self.device)
+                    if batch_transform is not None:
+                        with profiler.stage("batch_transform"):
+                            x = batch_transform(x, mask=mask)
+                    x = to_memory_format(x, self.params.memory_format)
+                    optimizer.zero_grad()
+                    with profiler.stage("forward_backward"):
+                        embeddings, loss = self._forward_backward(
+                            train_model, train_criterion, scaler, autocast_dtype, x, y, mask,
+                            momentum_encoder=momentum_encoder,
+                        )
+                    with profiler.stage("optimizer"):
+                        scaler.step(optimizer)
+                        scaler.update()
+                        if momentum_encoder is not None:
+                            momentum_encoder.update(model)
+                    if trace is not None:
+                        trace.step()
+                    # Host-side timings; device work may still be queued for compute
+                    now = time.perf_counter()
+                    step_metrics.update(
+                        loss, embeddings, epoch=epoch + 1, samples=len(y),
+                        samples_per_s=len(y) / (now - step_end),
+                        data_wait_s=step_start - step_end, compute_s=now - step_start,
+                    )
+                    data_wait += step_start - step_end
+                    compute += now - step_start
+                    n_samples += len(y)
+                    step_end = now
+
+                avg_loss = step_metrics.mean_loss()
+                epoch_time = time.perf_counter() - epoch_start
+                throughput = n_samples / epoch_time
+                self.logger.info(
+                    f"Epoch {epoch + 1} completed | Avg Loss: {avg_loss:.4f} | {throughput:.1f} samples/s"
+                )
+                if metrics_writer is not None:
+                    metrics_writer.log(
+                        "epoch", epoch=epoch + 1, loss=avg_loss, samples=n_samples,
+                        samples_per_s=throughput, data_wait_s=data_wait, compute_s=compute,
+                        epoch_time_s=epoch_time, **memory_usage_mb(self.device),
+                    )
+
+                # The other ranks go on to the next epoch and wait for rank 0 in its first backward pass
+                if self.dist.is_main and (epoch + 1) % self.params.eval_classifier_every == 0:
+                    eval_start = time.perf_counter()
+                    with profiler.stage("eval"):
+                        acc, n_held_out = evaluate_latent_classification(
+                            model, val_data, device=self.device, batch_transform=eval_batch_transform,
+                            probe=self.params.eval_probe,
+                            test_size=self.params.eval_probe_test_size,
+                            return_n_test=True,
+                            k=self.params.eval_knn_k,
+                            alpha=self.params.eval_ridge_alpha,
+                        )
+                    eval_time = time.perf_counter() - eval_start
+                    self.logger.info(
+                        f"Diagnostic classifier accuracy ({self.params.eval_probe}): {acc:.4f} "
+                        f"on {n_held_out} held-out samples"
+                    )
+                    acc_writer.writerow([epoch + 1, acc])
+                    acc_handle.flush()
+                    metrics_writer.log(
+                        "eval", epoch=epoch + 1, accuracy=acc, n_held_out=n_held_out,
+                        probe=self.params.eval_probe, eval_time_s=eval_time,
+                        **memory_usage_mb(self.device),
+                    )
+
+                    if acc > best_acc:
+                        best_acc = acc
+                        torch.save(model.state_dict(), fold_dir / "models" / "best.pt")
+                        self.logger.info(f"Saved new best model with accuracy {acc:.4f}")
+        finally:
+            if trace is not None:
+                trace.stop()
+            if metrics_writer is not None:
+                metrics_writer.close()
+                acc_handle.close()
+
+        if self._profiling:
+            # Workers write their timings when they exit, so a profiled run stops the pool after every fold
+            self._close_loader_service()
+            profiler.get().dump()
+            profiler.disable()
+            aggregate_profiles(profile_dir, fold_dir / "profile.json", logger=self.logger)
+
+        if self.dist.is_main:
+            torch.save(model.state_dict(), fold_dir / "models" / "last.pt")
+            self.logger.info("Final model saved.")
+        return best_acc
+
+    def _get_loader_service(self, dataset, profile_dir: Path) -> LoaderService:
+        """
+        The run's DataLoader worker pool over the training and evaluation datasets.
+
+        When profiling, workers write their stage timings to `profile_dir`
+        (the directory of the fold that started the pool).
+        """
+        if self.loader_service is None:
+            # Per-batch padding returns (x, y, mask) batches
+            collate_fns = {
+                "train": self._train_collate_fn() or default_collate,
+                "eval": pad_collate if self.params.dynamic_padding else default_collate,
+            }
+            worker_init_fn = None
+            if self._profiling:
+                collate_fns = {source: Profiled(fn, "collate") for source, fn in collate_fns.items()}
+                worker_init_fn = WorkerInit(profile_dir)
+            self.loader_service = LoaderService(
+                {"train": dataset, "eval": self.eval_dataset},
+                collate_fn=collate_fns,
+                worker_init_fn=worker_init_fn,
+                logger=self.logger,
+                **dataloader_kwargs(self.params),
+            )
+        return self.loader_service
+
+    @property
+    def _profiling(self) -> bool:
+        # Profiles are run artifacts, so only rank 0 records them
+        return self.params.profile_stages and self.dist.is_main
+
+    def _train_collate_fn(self):
+        """Collate for training batches; None means the DataLoader default."""
+        if self.params.n_views > 1:
+            return multiview_pad_collate if self.params.dynamic_padding else multiview_collate
+        return pad_collate if self.params.dynamic_padding else None
+
+    def _close_loader_service(self) -> None:
+        if self.loader_service is not None:
+            self.loader_service.close()
+            self.loader_service = None
+
+    def _forward_backward(self, model, criterion, scaler, autocast_dtype, x, y, mask, momentum_encoder=None):
+        with autocast_context(self.device, autocast_dtype):
+            embeddings = embed(model, x, mask)
+            if momentum_encoder is not None:
+                with torch.no_grad():
+                    keys = embed(momentum_encoder.encoder, x, mask)
+        # The contrastive loss is computed in fp32 for numerical stability
+        if momentum_encoder is not None:
+            loss = criterion(embeddings.float(), y, keys=keys.float())
+        else:
+            loss = criterion(embeddings.float(), y)
+        scaler.scale(loss).backward()
+        return embeddings, loss
+
+    def _log_throughput_gain(
+        self, model, criterion, train_model, train_criterion, scaler, autocast_dtype,
+        train_loader, batch_transform,
+    ):
+        """
+        Time forward/backward steps on one batch, eager fp32 against the accelerated setup.
+
+        The timed steps update BatchNorm running statistics and the grad
+        scaler, so both are restored afterwards; the caller clears the gradients.
+        """
+        x, y, mask = unpack_batch(next(iter(train_loader)))
+        x, y = x.to(self.device), y.to(self.device)
+        if mask is not None:
+            mask = mask.to(self.device)
+        if batch_transform is not None:
+            with torch.no_grad():
+                x = batch_transform(x, mask=mask)
+        x_accel = to_memory_format(x, self.params.memory_format)
+        eager_scaler = torch.amp.GradScaler(self.device.type, enabled=False)
+
+        model_state = copy.deepcopy(model.state_dict())
+        scaler_state = scaler.state_dict()
+        model.train()
+        n_steps = self.params.throughput_benchmark_steps
+        try:
+            eager = time_steps(
+                lambda: self._forward_backward(model, criterion, eager_scaler, None, x.contiguous(), y, mask),
+                self.device, n_steps,
+            )
+            accelerated = time_steps(
+                lambda: self._forward_backward(train_model, train_criterion, scaler, autocast_dtype, x_accel, y, mask),
+                self.device, n_steps,
+            )
+        finally:
+            model.load_state_dict(model_state)
+            scaler.load_state_dict(scaler_state)
+        self.logger.info(
+            f"Throughput on {len(y)}-sample batches: eager fp32 {len(y) / eager:.1f} samples/s, "
+            f"accelerated {len(y) / accelerated:.1f} samples/s ({eager / accelerated:.2f}x)"
+        )
+
+    def _clip_lengths_for(self, indices) -> np.ndarray:
+        # Dataset indices wrap around the n_augment copies of the corpus
+        return self.clip_lengths[np.asarray(indices, dtype=np.int64) % len(self.clip_lengths)]
+
+
+def _run_fold_process(
+    params: ExpParams,
+    run_dir: Path,
+    fold_idx: int,
+    train_idx,
+    val_idx,
+    dataset: PhonemeDataset,
+    eval_dataset: PhonemeDataset,
+    batch_transform,
+    eval_batch_transform,
+    clip_lengths,
+    num_threads: int,
+) -> float:
+    """
+    Train one fold in a worker process of `Experiment._run_parallel_folds`.
+
+    The dataset arrives pickled: a shared-memory waveform arena is passed by
+    handle and memory-mapped stores are re-opened, so nothing is decoded again.
+    """
+    torch.set_num_threads(num_threads)
+    experiment = Experiment(params, run_dir=run_dir, log_dir=run_dir / f"fold_{fold_idx}" / "logs")
+    experiment.batch_transform = batch_transform
+    experiment.eval_dataset = eval_dataset
+    experiment.eval_batch_transform = eval_batch_transform
+    experiment.clip_lengths = clip_lengths
+    experiment.logger.info(f"--- Fold {fold_idx + 1}/{params.n_splits} (pid {multiprocessing.current_process().pid}) ---")
+    try:
+        return experiment._run_single_fold(dataset, train_idx, val_idx, fold_id=fold_idx)
+    finally:
+        experiment._close_loader_service()
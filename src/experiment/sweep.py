@@ -0,0 +1,284 @@
+# src/experiment/sweep.py
+
+"""
+Hyperparameter sweeps over ExpParams with asynchronous successive halving (ASHA).
+
+Each trial is a full training run in its own process. The driver polls the
+diagnostic accuracy each trial writes to `metrics/accuracy.csv` and, at every
+rung (min_epochs * reduction_factor**k epochs), stops trials that are not in
+the top 1/reduction_factor of the trials that reached that rung. A stopped
+trial's process is terminated at once and its slot goes to the next trial.
+
+Example:
+    space = {
+        "temperature": Uniform(0.03, 0.3, log=True),
+        "learning_rate": Uniform(1e-4, 3e-3, log=True),
+        "embedding_dim": Choice([64, 128, 256]),
+        "noise_p": Uniform(0.0, 0.5),
+    }
+    trials = run_sweep(ExpParams(epochs=30), space, n_trials=24, max_concurrent=4)
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+import csv
+import json
+import logging
+import math
+import multiprocessing
+import time
+
+import numpy as np
+
+from experiment.exp_params import ExpParams
+from utils.metrics import read_accuracy_file
+from utils.system_resources import fold_resource_shares
+
+
+@dataclass
+class Uniform:
+    """Continuous range, sampled uniformly or log-uniformly."""
+
+    low: float
+    high: float
+    log: bool = False
+
+    def sample(self, rng: np.random.RandomState) -> float:
+        if self.log:
+            return float(math.exp(rng.uniform(math.log(self.low), math.log(self.high))))
+        return float(rng.uniform(self.low, self.high))
+
+
+@dataclass
+class Choice:
+    """Discrete set of values."""
+
+    values: list
+
+    def sample(self, rng: np.random.RandomState) -> Any:
+        return self.values[rng.randint(len(self.values))]
+
+
+SearchSpace = Dict[str, Union[Uniform, Choice]]
+
+
+def sample_configs(space: SearchSpace, n_trials: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Draw `n_trials` random ExpParams overrides from a search space.
+
+    Raises:
+        ValueError: If the space names a field ExpParams does not have
+    """
+    unknown = set(space) - set(ExpParams.model_fields)
+    if unknown:
+        raise ValueError(f"Unknown ExpParams fields in search space: {sorted(unknown)}")
+
+    rng = np.random.RandomState(seed)
+    return [{name: spec.sample(rng) for name, spec in space.items()} for _ in range(n_trials)]
+
+
+class SuccessiveHalving:
+    """
+    Asynchronous successive-halving pruning rule.
+
+    Rungs sit at min_epochs * reduction_factor**k epochs, up to max_epochs.
+    A trial reaching a rung continues only if its accuracy is among the top
+    1/reduction_factor of all accuracies recorded at that rung so far
+    (the best one always continues).
+    """
+
+    def __init__(self, min_epochs: int, max_epochs: int, reduction_factor: int = 3) -> None:
+        self.reduction_factor = reduction_factor
+        self.rungs: List[int] = []
+        epochs = min_epochs
+        while epochs < max_epochs:
+            self.rungs.append(epochs)
+            epochs *= reduction_factor
+        self.results: Dict[int, Dict[int, float]] = {rung: {} for rung in self.rungs}
+
+    def report(self, trial_id: int, epoch: int, accuracy: float) -> bool:
+        """
+        Record a trial's accuracy after `epoch` epochs.
+
+        Returns:
+            bool: False if the trial should be stopped
+        """
+        for rung in self.rungs:
+            if rung > epoch or trial_id in self.results[rung]:
+                continue
+            self.results[rung][trial_id] = accuracy
+            if not self._promotable(rung, accuracy):
+                return False
+        return True
+
+    def _promotable(self, rung: int, accuracy: float) -> bool:
+        values = sorted(self.results[rung].values(), reverse=True)
+        top_k = max(1, len(values) // self.reduction_factor)
+        return accuracy >= values[top_k - 1]
+
+
+@dataclass
+class Trial:
+    trial_id: int
+    overrides: Dict[str, Any]
+    trial_dir: Path
+    status: str = "pending"  # pending, running, pruned, completed, failed
+    accuracies: List[tuple] = field(default_factory=list)
+    process: Optional[multiprocessing.Process] = None
+
+    @property
+    def best_accuracy(self) -> Optional[float]:
+        return max((acc for _, acc in self.accuracies), default=None)
+
+    @property
+    def epochs_run(self) -> int:
+        return self.accuracies[-1][0] if self.accuracies else 0
+
+
+def run_sweep(
+    base_params: ExpParams,
+    space: SearchSpace,
+    n_trials: int,
+    max_concurrent: int = 1,
+    min_epochs: Optional[int] = None,
+    reduction_factor: int = 3,
+    seed: int = 0,
+    sweep_dir: Optional[Path] = None,
+    poll_interval: float = 5.0,
+    trial_fn: Optional[Callable] = None,
+    logger: Optional[logging.Logger] = None,
+) -> List[Trial]:
+    """
+    Run a sweep of random configurations with ASHA early stopping.
+
+    Trials train on a single split (`use_kfold=False`) so that their
+    accuracy curves are comparable while they run.
+
+    Args:
+        base_params: Parameters shared by all trials
+        space: Search space over ExpParams fields
+        n_trials: Number of configurations to try
+        max_concurrent: Trials running at the same time; cores are split between them
+        min_epochs: First rung (defaults to `eval_classifier_every`)
+        reduction_factor: Fraction 1/reduction_factor of trials kept at each rung
+        seed: Seed for sampling configurations
+        sweep_dir: Output directory (a new `sweep_<id>` under `run_base_dir` if None)
+        poll_interval: Seconds between reads of the trials' accuracy files
+        trial_fn: Function run in each trial process as
+            `trial_fn(params, trial_dir, num_threads)` (defaults to a full training run)
+        logger: Optional logger for messages
+
+    Returns:
+        List[Trial]: All trials with their status and accuracy curves
+    """
+
+    def log(msg: str):
+        if logger:
+            logger.info(msg)
+        else:
+            print(msg)
+
+    sweep_dir = sweep_dir or base_params.run_base_dir / f"sweep_{base_params.generate_run_id()}"
+    sweep_dir.mkdir(parents=True, exist_ok=True)
+    trial_fn = trial_fn or _run_trial
+
+    min_epochs = min_epochs or base_params.eval_classifier_every
+    pruner = SuccessiveHalving(min_epochs, base_params.epochs, reduction_factor)
+    num_threads, num_workers = fold_resource_shares(max_concurrent)
+    log(f"Sweep of {n_trials} trials in {sweep_dir} | {max_concurrent} concurrent, "
+        f"rungs at epochs {pruner.rungs}, {num_threads} threads and {num_workers} workers per trial")
+
+    trials = [
+        Trial(trial_id, overrides, sweep_dir / f"trial_{trial_id:03d}")
+        for trial_id, overrides in enumerate(sample_configs(space, n_trials, seed))
+    ]
+    pending = list(trials)
+    running: List[Trial] = []
+    context = multiprocessing.get_context("spawn")
+
+    try:
+        while pending or running:
+            while pending and len(running) < max_concurrent:
+                trial = pending.pop(0)
+                params = base_params.model_copy(update={
+                    **trial.overrides, "use_kfold": False, "num_workers": num_workers,
+                })
+                trial.process = context.Process(
+                    target=trial_fn, args=(params, trial.trial_dir, num_threads), daemon=False
+                )
+                trial.process.start()
+                trial.status = "running"
+                running.append(trial)
+                log(f"Trial {trial.trial_id} started: {trial.overrides}")
+
+            time.sleep(poll_interval)
+
+            for trial in list(running):
+                rows = read_accuracy_file(trial.trial_dir / "metrics" / "accuracy.csv")
+                new_rows, trial.accuracies = rows[len(trial.accuracies):], rows
+                keep = all(pruner.report(trial.trial_id, epoch, acc) for epoch, acc in new_rows)
+
+                if not keep and trial.process.is_alive():
+                    # Free the trial's cores for the next one right away
+                    trial.process.terminate()
+                    trial.process.join()
+                    trial.status = "pruned"
+                    log(f"Trial {trial.trial_id} pruned at epoch {trial.epochs_run} "
+                        f"(accuracy {trial.accuracies[-1][1]:.4f})")
+                elif not trial.process.is_alive():
+                    trial.process.join()
+                    # Pick up rows written between the last poll and the exit
+                    rows = read_accuracy_file(trial.trial_dir / "metrics" / "accuracy.csv")
+                    for epoch, acc in rows[len(trial.accuracies):]:
+                        pruner.report(trial.trial_id, epoch, acc)
+                    trial.accuracies = rows
+                    trial.status = "completed" if trial.process.exitcode == 0 else "failed"
+                    log(f"Trial {trial.trial_id} {trial.status} | best accuracy {trial.best_accuracy}")
+                else:
+                    continue
+                running.remove(trial)
+    finally:
+        for trial in running:
+            trial.process.terminate()
+            trial.process.join()
+        _write_results(sweep_dir, trials)
+
+    best = max((t for t in trials if t.best_accuracy is not None), key=lambda t: t.best_accuracy, default=None)
+    if best is not None:
+        log(f"Best trial {best.trial_id}: accuracy {best.best_accuracy:.4f} with {best.overrides}")
+    return trials
+
+
+def _run_trial(params: ExpParams, trial_dir: Path, num_threads: int) -> None:
+    # Imported here so the driver process does not load the model code
+    import torch
+    from experiment.experiment import Experiment
+
+    torch.set_num_threads(num_threads)
+    trial_dir.mkdir(parents=True, exist_ok=True)
+    params.to_json(trial_dir / "config.json")
+    Experiment(params, run_dir=trial_dir).train()
+
+
+def _write_results(sweep_dir: Path, trials: List[Trial]) -> None:
+    names = sorted({name for trial in trials for name in trial.overrides})
+    with (sweep_dir / "trials.csv").open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["trial", "status", "epochs_run", "best_accuracy", *names])
+        for trial in trials:
+            writer.writerow([
+                trial.trial_id, trial.status, trial.epochs_run, trial.best_accuracy,
+                *(trial.overrides.get(name) for name in names),
+            ])
+
+    with (sweep_dir / "trials.json").open("w") as f:
+        json.dump([
+            {
+                "trial": trial.trial_id,
+                "status": trial.status,
+                "overrides": trial.overrides,
+                "accuracies": trial.accuracies,
+            }
+            for trial in trials
+        ], f, indent=4, default=str)
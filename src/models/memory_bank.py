@@ -0,0 +1,176 @@
+# src/models/memory_bank.py
+
+"""
+Queue of recent embeddings that contrastive losses use as extra negatives and positives.
+
+With batches of 2-4 clips (CPU training), a contrastive loss over the batch
+alone sees almost no negatives. `QueueContrastiveLoss` contrasts every
+anchor against the batch and a fixed-size FIFO of earlier embeddings with
+their labels. That gives the negative count of a large batch at the cost
+of a [queue_size, dim] buffer and one extra matrix product. Queued entries
+are detached, so no gradients flow into them.
+
+Embeddings in the queue come from an older version of the encoder. A
+`MomentumEncoder` (an exponential moving average of the encoder, as in
+MoCo) changes slowly, so keys computed with it stay consistent with each
+other over the length of the queue.
+"""
+
+from typing import Literal, Optional, Tuple
+import copy
+
+import torch
+import torch.distributed as dist
+import torch.nn as nn
+import torch.nn.functional as F
+
+
+class FeatureQueue(nn.Module):
+    """
+    Fixed-size FIFO of detached embeddings and their labels.
+
+    Kept as buffers, so it follows the module across devices.
+    """
+
+    def __init__(self, size: int, dim: int) -> None:
+        super().__init__()
+        self.size = size
+        self.register_buffer("embeddings", torch.zeros(size, dim), persistent=False)
+        self.register_buffer("labels", torch.full((size,), -1, dtype=torch.long), persistent=False)
+        self.ptr = 0
+        self.n_filled = 0
+
+    def __len__(self) -> int:
+        return self.n_filled
+
+    @torch.no_grad()
+    def enqueue(self, embeddings: torch.Tensor, labels: torch.Tensor) -> None:
+        """Add a batch, overwriting the oldest entries once the queue is full."""
+        embeddings, labels = embeddings.detach()[-self.size:], labels.detach()[-self.size:]
+        positions = (self.ptr + torch.arange(len(labels), device=self.labels.device)) % self.size
+        self.embeddings[positions] = embeddings.to(self.embeddings.dtype)
+        self.labels[positions] = labels.to(self.labels.device)
+        self.ptr = (self.ptr + len(labels)) % self.size
+        self.n_filled = min(self.n_filled + len(labels), self.size)
+
+    def contents(self) -> Tuple[torch.Tensor, torch.Tensor]:
+        """The queued embeddings [n, dim] and labels [n] (n < size until the queue fills up)."""
+        return self.embeddings[:self.n_filled], self.labels[:self.n_filled]
+
+    def reset(self) -> None:
+        self.ptr = 0
+        self.n_filled = 0
+
+
+class MomentumEncoder(nn.Module):
+    """
+    Exponential moving average of an encoder, used to compute queue keys.
+
+    Its parameters never receive gradients; call `update(encoder)` after
+    every optimizer step. Inside a process group it starts from rank 0's
+    weights, so every rank computes the same keys.
+    """
+
+    def __init__(self, encoder: nn.Module, momentum: float = 0.999) -> None:
+        super().__init__()
+        self.encoder = copy.deepcopy(encoder)
+        self.momentum = momentum
+        for param in self.encoder.parameters():
+            param.requires_grad_(False)
+        if dist.is_initialized() and dist.get_world_size() > 1:
+            for tensor in self.encoder.state_dict().values():
+                dist.broadcast(tensor, src=0)
+
+    @torch.no_grad()
+    def update(self, encoder: nn.Module) -> None:
+        for ema, param in zip(self.encoder.parameters(), encoder.parameters()):
+            ema.mul_(self.momentum).add_(param.detach(), alpha=1 - self.momentum)
+        for ema, buffer in zip(self.encoder.buffers(), encoder.buffers()):
+            ema.copy_(buffer)
+
+    @torch.no_grad()
+    def forward(self, *args, **kwargs) -> torch.Tensor:
+        return self.encoder(*args, **kwargs)
+
+
+class QueueContrastiveLoss(nn.Module):
+    """
+    Contrastive loss over the batch plus a queue of earlier embeddings.
+
+    Each anchor is contrasted against the batch's embeddings (or, when
+    given, keys from a momentum encoder) and every queued embedding. The
+    current batch is enqueued after the loss is computed.
+
+    With loss_type="supervised" (SupCon), every entry with the anchor's
+    label is a positive, queued ones included. With loss_type="ntxent",
+    queued entries are negatives only; positives come from the batch
+    (labels there identify the views of one instance).
+
+    Args:
+        temperature: Softmax temperature
+        queue_size: Number of queued embeddings
+        embedding_dim: Embedding dimension
+        loss_type: "supervised" or "ntxent"
+    """
+
+    def __init__(
+        self,
+        temperature: float = 0.07,
+        queue_size: int = 4096,
+        embedding_dim: int = 128,
+        loss_type: Literal["supervised", "ntxent"] = "supervised",
+    ) -> None:
+        super().__init__()
+        self.temperature = temperature
+        self.loss_type = loss_type
+        self.queue = FeatureQueue(queue_size, embedding_dim)
+
+    def forward(
+        self,
+        embeddings: torch.Tensor,
+        labels: torch.Tensor,
+        keys: Optional[torch.Tensor] = None,
+    ) -> torch.Tensor:
+        """
+        Args:
+            embeddings: Anchor embeddings [B, dim]
+            labels: Labels [B]
+            keys: Momentum-encoder embeddings of the same batch [B, dim]; they
+                replace the batch side of the contrast set and are what gets
+                enqueued. The anchor's own key then counts as a positive.
+
+        Returns:
+            torch.Tensor: Mean loss over anchors that have at least one positive
+        """
+        anchors = F.normalize(embeddings, dim=1)
+        batch_side = anchors if keys is None else F.normalize(keys, dim=1).detach()
+
+        queued, queued_labels = self.queue.contents()
+        if self.loss_type != "supervised":
+            queued_labels = torch.full_like(queued_labels, -1)
+        contrast = torch.cat([batch_side, queued.to(anchors.dtype)])
+        contrast_labels = torch.cat([labels, queued_labels.to(labels.device)])
+
+        logits = anchors @ contrast.T / self.temperature
+
+        # An anchor never contrasts with itself (its momentum key is a different entry)
+        n = len(labels)
+        self_mask = torch.zeros_like(logits, dtype=torch.bool)
+        if keys is None:
+            self_mask[:, :n] = torch.eye(n, dtype=torch.bool, device=logits.device)
+        logits = logits.masked_fill(self_mask, float("-inf"))
+
+        positives = (labels[:, None] == contrast_labels[None, :]) & ~self_mask
+        log_prob = logits - torch.logsumexp(logits, dim=1, keepdim=True)
+        n_positives = positives.sum(dim=1)
+        mean_log_prob = log_prob.masked_fill(~positives, 0.0).sum(dim=1) / n_positives.clamp(min=1)
+
+        has_positive = n_positives > 0
+        if has_positive.any():
+            loss = -mean_log_prob[has_positive].mean()
+        else:
+            # Keeps the graph connected when no anchor has a positive yet
+            loss = logits.masked_fill(self_mask, 0.0).sum() * 0.0
+
+        self.queue.enqueue(batch_side, labels)
+        return loss
@@ -0,0 +1,55 @@
+from typing import Callable, Optional
+import torch
+import torch.nn as nn
+
+from data_utils.collate import apply_mask, resize_mask
+
+
+class PerExample:
+    """
+    Apply a per-sample transform independently to every example of a batch.
+    """
+
+    def __init__(self, transform: Callable[[torch.Tensor], torch.Tensor]) -> None:
+        self.transform = transform
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        return torch.stack([self.transform(example) for example in x])
+
+    def __repr__(self) -> str:
+        return f"PerExample({self.transform!r})"
+
+
+class BatchFeatureStage(nn.Module):
+    """
+    Feature extraction and augmentation for a whole collated batch.
+
+    Takes [B, N] waveforms (or [B, 1, F, T] features when `feature` is None)
+    and returns [B, 1, F, T], the same layout the per-sample pipeline produces
+    after collation. Running the extractor once per batch on the training
+    device replaces B small STFTs in the DataLoader workers with one large one.
+
+    With dynamic padding, pass the [B, N] mask from `pad_collate` so padded
+    frames are zeroed after augmentation (added noise would fill them otherwise).
+    """
+
+    def __init__(
+        self,
+        feature: Optional[nn.Module],
+        augmentations: list[Callable[[torch.Tensor], torch.Tensor]],
+    ) -> None:
+        super().__init__()
+        self.feature = feature
+        self.augmentations = augmentations
+
+    def forward(self, x: torch.Tensor, mask: Optional[torch.Tensor] = None) -> torch.Tensor:
+        if self.feature is not None:
+            # Keep a channel dim so dB clamping stays per example, not per batch
+            if x.ndim == 2:
+                x = x.unsqueeze(1)
+            x = self.feature(x)
+        for augmentation in self.augmentations:
+            x = augmentation(x)
+        if mask is not None:
+            x = apply_mask(x, resize_mask(mask, x.shape[-1]))
+        return x
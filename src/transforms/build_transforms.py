@@ -1,25 +1,90 @@
+from typing import Optional
+import torch.nn as nn
+
 from transforms.compose import Compose
 from transforms.mfcc import MFCC
 from transforms.log_mel import LogMelSpectrogram
-from transforms.masking import RandomTimeMask, RandomFreqMask
-from transforms.noise import AddNoise
+from transforms.wavelet import TorchWaveletTransform
+from transforms.masking import RandomTimeMask, RandomFreqMask, BatchRandomTimeMask, BatchRandomFreqMask
+from transforms.noise import AddNoise, BatchAddNoise
+from transforms.batched import BatchFeatureStage
 from experiment.exp_params import ExpParams
 
-def build_transforms(params: ExpParams):
-    transforms = []
-
+def build_feature_transform(params: ExpParams) -> Optional[nn.Module]:
+    """
+    Build the deterministic feature extractor of the pipeline, or None for raw waveforms.
+    """
     if params.use_mfcc:
-        transforms.append(MFCC(sample_rate=params.target_sr))
+        return MFCC(sample_rate=params.target_sr)
     elif params.use_log_mel:
-        transforms.append(LogMelSpectrogram(sample_rate=params.target_sr))
+        return LogMelSpectrogram(sample_rate=params.target_sr)
+    elif params.use_wavelet:
+        return TorchWaveletTransform(
+            wavelet=params.wavelet, level=params.wavelet_level, mode=params.wavelet_mode
+        )
+    return None
+
+def build_augment_transforms(params: ExpParams, batched: bool = False) -> list:
+    """
+    Build the random augmentations applied on top of the extracted features.
+
+    With `batched=True`, return the vectorized versions that augment every
+    example of a [B, ..., F, T] batch independently.
+    """
+    transforms = []
+    time_mask = BatchRandomTimeMask if batched else RandomTimeMask
+    freq_mask = BatchRandomFreqMask if batched else RandomFreqMask
+    noise = BatchAddNoise if batched else AddNoise
 
     if params.use_time_mask:
-        transforms.append(RandomTimeMask(max_width=params.time_mask_param, p=params.time_mask_p))
+        transforms.append(time_mask(max_width=params.time_mask_param, p=params.time_mask_p))
 
     if params.use_freq_mask:
-        transforms.append(RandomFreqMask(max_width=params.freq_mask_param, p=params.freq_mask_p))
+        transforms.append(freq_mask(max_width=params.freq_mask_param, p=params.freq_mask_p))
 
     if params.use_noise:
-        transforms.append(AddNoise(std=params.noise_std, p=params.noise_p))
+        transforms.append(noise(std=params.noise_std, p=params.noise_p))
+
+    return transforms
+
+def build_batch_transform(params: ExpParams, include_feature: bool = True) -> BatchFeatureStage:
+    """
+    Build the stage that runs once per collated batch on the training device.
+
+    Set `include_feature=False` when the inputs are already features (e.g. from the feature store).
+    """
+    feature = build_feature_transform(params) if include_feature else None
+    return BatchFeatureStage(feature, build_augment_transforms(params, batched=True))
+
+def build_eval_transforms(params: ExpParams, include_feature: bool = True):
+    """
+    Build the deterministic evaluation pipeline: feature extraction only, no augmentation.
+
+    Returns `(sample_transform, batch_transform)` where `batch_transform` is
+    None unless `params.batched_features` is set.
+    """
+    feature = build_feature_transform(params) if include_feature else None
+    if params.batched_features:
+        return Compose([]), BatchFeatureStage(feature, [])
+    return Compose([feature] if feature is not None else []), None
+
+def build_transforms(params: ExpParams, split: bool = False):
+    """
+    Build the transform pipeline.
+
+    With `split=True`, return `(sample_transform, batch_transform)`: a light
+    per-sample stage for the DataLoader workers and a `BatchFeatureStage`
+    to apply to each collated batch.
+    """
+    if split:
+        return Compose([]), build_batch_transform(params)
+
+    transforms = []
+
+    feature = build_feature_transform(params)
+    if feature is not None:
+        transforms.append(feature)
+
+    transforms.extend(build_augment_transforms(params))
 
     return Compose(transforms)
@@ -28,3 +28,46 @@ class RandomFreqMask:
                 x = x.unsqueeze(0)
             return masker(x)
         return x
+
+def _mask_along_axis_per_example(x: torch.Tensor, max_width: int, p: float, axis: int) -> torch.Tensor:
+    """
+    Vectorized T.TimeMasking/T.FrequencyMasking with an independent mask per example.
+
+    Widths and starts are drawn exactly like `torchaudio.functional.mask_along_axis`,
+    and each example is masked with probability p.
+    """
+    if x.ndim < 3:
+        raise ValueError(f"Expected a batch of spectrograms [B, ..., F, T], got shape {tuple(x.shape)}")
+
+    batch, size = x.shape[0], x.shape[axis]
+    rand = torch.rand(3, batch, device=x.device)
+    value = rand[0] * max_width
+    start = (rand[1] * (size - value)).long()
+    end = torch.where(rand[2] < p, start + value.long(), start)
+
+    positions = torch.arange(size, device=x.device)
+    mask = (positions >= start[:, None]) & (positions < end[:, None])
+
+    shape = [batch] + [1] * (x.ndim - 1)
+    shape[axis] = size
+    return x.masked_fill(mask.view(shape), 0.0)
+
+class BatchRandomTimeMask:
+    """RandomTimeMask for a whole [B, ..., F, T] batch, one mask and p-decision per example."""
+
+    def __init__(self, max_width: int = 30, p: float = 0.5):
+        self.max_width = max_width
+        self.p = p
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        return _mask_along_axis_per_example(x, self.max_width, self.p, axis=-1)
+
+class BatchRandomFreqMask:
+    """RandomFreqMask for a whole [B, ..., F, T] batch, one mask and p-decision per example."""
+
+    def __init__(self, max_width: int = 10, p: float = 0.5):
+        self.max_width = max_width
+        self.p = p
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        return _mask_along_axis_per_example(x, self.max_width, self.p, axis=-2)
@@ -14,3 +14,17 @@ class AddNoise:
             noise = torch.randn_like(x) * self.std
             return x + noise
         return x
+
+class BatchAddNoise:
+    """AddNoise for a whole batch: every example independently gets noise with probability p."""
+
+    def __init__(self,
+                 std: float = 0.005,
+                 p: float = 0.5):
+        self.std = std
+        self.p = p
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        apply = torch.rand(x.shape[0], device=x.device) < self.p
+        scale = apply.to(x.dtype).view([-1] + [1] * (x.ndim - 1)) * self.std
+        return x + torch.randn_like(x) * scale
@@ -3,6 +3,7 @@ import torch
 import torchaudio
 import pywt
 import numpy as np
+import torch.nn as nn
 from typing import Callable
 
 class WaveletTransform:
@@ -41,4 +42,105 @@ class WaveletTransform:
         elif len(arr) > length:
             return arr[:length]
         else:
-            return np.pad(arr, (0, length - len(arr)), mode='constant')
\ No newline at end of file
+            return np.pad(arr, (0, length - len(arr)), mode='constant')
+
+class TorchWaveletTransform(nn.Module):
+    SUPPORTED_MODES = ("zero", "constant", "symmetric", "reflect", "periodic", "periodization")
+
+    def __init__(self,
+                 wavelet: str = "db4",
+                 level: int = 5,
+                 mode: str = "zero"):
+        """
+        Multi-level discrete wavelet transform as a strided convolutional filter bank.
+
+        Produces the same coefficients as `WaveletTransform` (pywt.wavedec, with
+        every level cut or zero-padded to the length of the coarsest one), but
+        works on [..., N] tensors on any device, so a whole batch is transformed
+        with one conv1d per level.
+
+        Args:
+            wavelet: Name of the wavelet (e.g., 'db4', 'coif1'); any pywt discrete wavelet
+            level: Number of decomposition levels
+            mode: Padding mode, one of SUPPORTED_MODES
+        """
+        super().__init__()
+        if mode not in self.SUPPORTED_MODES:
+            raise ValueError(f"Unsupported wavelet mode: {mode} (supported: {self.SUPPORTED_MODES})")
+
+        w = pywt.Wavelet(wavelet)
+        self.wavelet = wavelet
+        self.level = level
+        self.mode = mode
+        self.filter_length = w.dec_len
+
+        # conv1d computes a correlation, so the decomposition filters are reversed
+        filters = torch.tensor([w.dec_lo[::-1], w.dec_hi[::-1]], dtype=torch.float64)
+        self.register_buffer("filters", filters.unsqueeze(1))
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """
+        Args:
+            x: Waveforms [..., N]; a single [N] waveform is treated as [1, N]
+
+        Returns:
+            Coefficients [..., level + 1, L] ordered [cA_level, cD_level, ..., cD_1]
+        """
+        # Keep a channel dim like MFCC, so per-sample and batched pipelines agree
+        if x.ndim == 1:
+            x = x.unsqueeze(0)
+        batch_shape = x.shape[:-1]
+        approx = x.reshape(-1, x.shape[-1])
+
+        coeffs = []
+        for _ in range(self.level):
+            approx, detail = self._dwt(approx)
+            coeffs.append(detail)
+        coeffs.append(approx)
+        coeffs.reverse()
+
+        length = coeffs[0].shape[-1]
+        coeffs = [
+            torch.nn.functional.pad(c[..., :length], (0, max(0, length - c.shape[-1])))
+            for c in coeffs
+        ]
+        out = torch.stack(coeffs, dim=-2)
+        return out.reshape(*batch_shape, *out.shape[-2:])
+
+    def _dwt(self, x: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+        """Single-level DWT of [B, N] signals, matching pywt.dwt."""
+        L = self.filter_length
+        if self.mode == "periodization":
+            if x.shape[-1] % 2:
+                x = torch.cat([x, x[..., -1:]], dim=-1)
+            n = x.shape[-1]
+            index = (torch.arange(-(L - 1), n, device=x.device) + L // 2) % n
+            start = 0
+        else:
+            n = x.shape[-1]
+            index = torch.arange(-(L - 1), n + L - 1, device=x.device)
+            start = 1
+
+        extended = self._extend(x, index)
+        out = torch.nn.functional.conv1d(extended.unsqueeze(1), self.filters.to(x.dtype))
+        out = out[..., start::2]
+        return out[:, 0], out[:, 1]
+
+    def _extend(self, x: torch.Tensor, index: torch.Tensor) -> torch.Tensor:
+        # Signal extension by index arithmetic, so it also works when the
+        # padding is longer than the signal (as pywt allows)
+        n = x.shape[-1]
+        if self.mode in ("periodic", "periodization"):
+            return x[..., index % n]
+        if self.mode == "constant":
+            return x[..., index.clamp(0, n - 1)]
+        if self.mode == "zero":
+            inside = (index >= 0) & (index < n)
+            return x[..., index.clamp(0, n - 1)] * inside.to(x.dtype)
+        if self.mode == "symmetric":
+            q = index % (2 * n)
+            return x[..., torch.where(q < n, q, 2 * n - 1 - q)]
+        if n == 1:
+            return x[..., torch.zeros_like(index)]
+        q = index % (2 * n - 2)
+        return x[..., torch.where(q < n, q, 2 * n - 2 - q)]
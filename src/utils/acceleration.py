@@ -0,0 +1,131 @@
+# src/utils/acceleration.py
+
+"""
+Mixed precision, torch.compile and memory-layout helpers for the training loop.
+"""
+
+from contextlib import nullcontext
+from typing import Callable, Literal, Optional
+import logging
+import time
+
+import torch
+
+Precision = Literal["fp32", "bf16", "fp16"]
+
+
+def resolve_precision(
+    device: torch.device, precision: Precision, logger: Optional[logging.Logger] = None
+) -> Optional[torch.dtype]:
+    """
+    Map a precision setting to the autocast dtype the device supports, or None for fp32.
+
+    fp16 autocast on CPU falls back to bf16, and bf16 on a CUDA device
+    without bf16 support falls back to fp16.
+    """
+
+    def log(msg: str):
+        if logger:
+            logger.info(msg)
+        else:
+            print(msg)
+
+    if precision == "fp32":
+        return None
+    if device.type == "cpu" and precision == "fp16":
+        log("fp16 autocast is not supported for training on CPU, using bf16")
+        return torch.bfloat16
+    if device.type == "cuda" and precision == "bf16" and not torch.cuda.is_bf16_supported():
+        log("bf16 is not supported on this GPU, using fp16")
+        return torch.float16
+    return torch.bfloat16 if precision == "bf16" else torch.float16
+
+
+def autocast_context(device: torch.device, dtype: Optional[torch.dtype]):
+    """Autocast context for `dtype` on `device`, or a no-op context for fp32."""
+    if dtype is None:
+        return nullcontext()
+    return torch.autocast(device_type=device.type, dtype=dtype)
+
+
+def make_grad_scaler(device: torch.device, dtype: Optional[torch.dtype]) -> torch.amp.GradScaler:
+    """
+    Gradient scaler for fp16 on accelerators; a pass-through scaler otherwise.
+
+    bf16 has the fp32 exponent range and needs no loss scaling.
+    """
+    enabled = dtype == torch.float16 and device.type in ("cuda", "mps")
+    return torch.amp.GradScaler(device.type, enabled=enabled)
+
+
+class CompiledCallable:
+    """
+    `torch.compile`d module or function that falls back to eager execution.
+
+    Compilation happens lazily on the first call; if it (or any later
+    compiled call) raises, the error is logged once and the eager version is
+    used from then on. The original stays reachable as `__wrapped__`, so
+    signature checks and state dicts see the uncompiled module.
+    """
+
+    def __init__(
+        self,
+        fn: Callable,
+        name: str,
+        mode: Optional[str] = None,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.__wrapped__ = fn
+        self.name = name
+        self.logger = logger
+        try:
+            self.compiled = torch.compile(fn, mode=mode)
+        except Exception as e:
+            self._fall_back(e)
+
+    def __call__(self, *args, **kwargs):
+        if self.compiled is not None:
+            try:
+                return self.compiled(*args, **kwargs)
+            except Exception as e:
+                self._fall_back(e)
+        return self.__wrapped__(*args, **kwargs)
+
+    def _fall_back(self, error: Exception) -> None:
+        msg = f"torch.compile of {self.name} failed, running it eagerly: {type(error).__name__}: {error}"
+        if self.logger:
+            self.logger.warning(msg)
+        else:
+            print(msg)
+        self.compiled = None
+
+
+def to_memory_format(x: torch.Tensor, memory_format: Literal["contiguous", "channels_last"]) -> torch.Tensor:
+    """Lay out a batch in the requested memory format (channels_last applies to 4D inputs only)."""
+    if memory_format == "channels_last" and x.ndim == 4:
+        return x.contiguous(memory_format=torch.channels_last)
+    return x.contiguous()
+
+
+def synchronize(device: torch.device) -> None:
+    """Wait for queued work on the device, so wall-clock timings are accurate."""
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    elif device.type == "mps":
+        torch.mps.synchronize()
+
+
+def time_steps(step: Callable[[], None], device: torch.device, n_steps: int, warmup: int = 2) -> float:
+    """
+    Return the mean seconds per call of `step` after `warmup` untimed calls.
+
+    Warm-up calls absorb compilation and allocator start-up.
+    """
+    for _ in range(warmup):
+        step()
+    synchronize(device)
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        step()
+    synchronize(device)
+    return (time.perf_counter() - start) / n_steps
@@ -0,0 +1,228 @@
+# src/utils/dataloader_tuning.py
+
+"""
+DataLoader settings derived from ExpParams, and a throughput autotuner for them.
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import time
+
+import numpy as np
+import torch
+from torch.utils.data import BatchSampler, Dataset, RandomSampler
+
+from data_utils.loader_service import LoaderService
+from experiment.exp_params import ExpParams
+
+TUNED_KEYS = ("num_workers", "prefetch_factor", "persistent_workers")
+
+
+def dataloader_kwargs(params: ExpParams) -> dict:
+    """
+    DataLoader keyword arguments for the worker settings in `params`.
+
+    `prefetch_factor` and `persistent_workers` only apply with worker
+    processes and are left out otherwise.
+    """
+    kwargs = {
+        "num_workers": params.num_workers,
+        "pin_memory": bool(params.pin_memory),
+    }
+    if params.num_workers > 0:
+        if params.prefetch_factor is not None:
+            kwargs["prefetch_factor"] = params.prefetch_factor
+        kwargs["persistent_workers"] = params.persistent_workers
+    return kwargs
+
+
+def machine_fingerprint() -> Dict:
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "torch": torch.__version__,
+    }
+
+
+def dataset_fingerprint(dataset: Dataset, params: ExpParams) -> Dict:
+    """
+    Describe what a data-only epoch costs: the files, the transform pipeline
+    and the settings that change per-sample work.
+    """
+    file_paths = getattr(dataset, "file_paths", [])
+    paths_digest = hashlib.sha1("\n".join(map(str, file_paths)).encode()).hexdigest()
+    return {
+        "n_samples": len(dataset),
+        "files": paths_digest,
+        "transform": repr(getattr(dataset, "transform", None)),
+        "max_length": getattr(dataset, "max_length", None),
+        "batch_size": params.batch_size,
+        "dynamic_padding": params.dynamic_padding,
+        "use_waveform_arena": params.use_waveform_arena,
+        "use_feature_store": params.use_feature_store,
+        "pin_memory": bool(params.pin_memory),
+    }
+
+
+def measure_throughput(
+    dataset: Dataset,
+    batch_size: int,
+    config: dict,
+    n_batches: int,
+    n_epochs: int = 2,
+    collate_fn: Optional[Callable] = None,
+    pin_memory: bool = False,
+) -> float:
+    """
+    Samples per second of a data-only loop over `n_epochs` short epochs.
+
+    Batches come from a `LoaderService` view, as in training. Worker
+    start-up is included in every epoch, so persistent workers are
+    credited for skipping it after the first one.
+    """
+    service = LoaderService(
+        {"train": dataset}, collate_fn=collate_fn, pin_memory=pin_memory, **_loader_config(config)
+    )
+    batch_sampler = BatchSampler(RandomSampler(range(len(dataset))), batch_size, drop_last=False)
+    view = service.view("train", np.arange(len(dataset)), batch_sampler=batch_sampler)
+    n_samples = 0
+    start = time.perf_counter()
+    try:
+        for _ in range(n_epochs):
+            for i, batch in enumerate(view):
+                n_samples += len(batch[1])
+                if i + 1 >= n_batches:
+                    break
+        elapsed = time.perf_counter() - start
+    finally:
+        service.close()
+    return n_samples / elapsed
+
+
+def autotune_dataloader(
+    dataset: Dataset,
+    params: ExpParams,
+    cache_path: Path,
+    collate_fn: Optional[Callable] = None,
+    n_batches: int = 20,
+    worker_candidates: Optional[Sequence[int]] = None,
+    prefetch_candidates: Sequence[int] = (2, 4, 8),
+    logger: Optional[logging.Logger] = None,
+) -> dict:
+    """
+    Find the DataLoader worker settings with the highest data-only throughput.
+
+    Searches one setting at a time: the worker count (with prefetch_factor=2
+    and persistent workers), then prefetch_factor, then persistent_workers.
+    The winner is cached in `cache_path` under a key of the machine and
+    dataset fingerprints, and returned directly on later runs.
+
+    Args:
+        dataset: The training dataset, with its transform pipeline
+        params: Experiment parameters (batch size, pin_memory, ...)
+        cache_path: JSON file holding tuned settings
+        collate_fn: Collate function used in training
+        n_batches: Batches per trial epoch
+        worker_candidates: Worker counts to try (0, 1, 2, 4, ... below the core count if None)
+        prefetch_candidates: prefetch_factor values to try
+        logger: Optional logger for messages
+
+    Returns:
+        dict: {"num_workers", "prefetch_factor", "persistent_workers", "samples_per_s"}
+    """
+
+    def log(msg: str):
+        if logger:
+            logger.info(msg)
+        else:
+            print(msg)
+
+    fingerprint = {"machine": machine_fingerprint(), "dataset": dataset_fingerprint(dataset, params)}
+    key = hashlib.sha1(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+    cache = _read_cache(cache_path)
+    if key in cache:
+        log(f"Using cached DataLoader settings: {_describe(cache[key])}")
+        return cache[key]
+
+    if worker_candidates is None:
+        cores = multiprocessing.cpu_count()
+        worker_candidates = [0] + [n for n in (1, 2, 4, 8, 16, 32) if n < cores]
+
+    def trial(config: dict) -> float:
+        samples_per_s = measure_throughput(
+            dataset, params.batch_size, config, n_batches,
+            collate_fn=collate_fn, pin_memory=bool(params.pin_memory),
+        )
+        log(f"  {_describe(config)}: {samples_per_s:.1f} samples/s")
+        return samples_per_s
+
+    log(f"Autotuning DataLoader over {len(dataset)} samples ({n_batches} batches per trial epoch)")
+    results: List[tuple] = []
+    for num_workers in worker_candidates:
+        config = {"num_workers": num_workers, "prefetch_factor": 2, "persistent_workers": num_workers > 0}
+        results.append((trial(config), config))
+    best_rate, best = max(results, key=lambda result: result[0])
+
+    if best["num_workers"] > 0:
+        for prefetch_factor in prefetch_candidates:
+            if prefetch_factor == best["prefetch_factor"]:
+                continue
+            config = {**best, "prefetch_factor": prefetch_factor}
+            rate = trial(config)
+            if rate > best_rate:
+                best_rate, best = rate, config
+
+        config = {**best, "persistent_workers": False}
+        rate = trial(config)
+        if rate > best_rate:
+            best_rate, best = rate, config
+
+    best = {**best, "samples_per_s": best_rate}
+    cache[key] = best
+    _write_cache(cache_path, cache)
+    log(f"Selected DataLoader settings: {_describe(best)}")
+    return best
+
+
+def apply_tuned_settings(params: ExpParams, tuned: dict) -> ExpParams:
+    """Copy tuned worker settings into `params`."""
+    for key in TUNED_KEYS:
+        setattr(params, key, tuned[key])
+    return params
+
+
+def _loader_config(config: dict) -> dict:
+    if config["num_workers"] == 0:
+        return {"num_workers": 0}
+    return {key: config[key] for key in TUNED_KEYS}
+
+
+def _describe(config: dict) -> str:
+    if config["num_workers"] == 0:
+        return "num_workers=0"
+    return (f"num_workers={config['num_workers']}, prefetch_factor={config['prefetch_factor']}, "
+            f"persistent_workers={config['persistent_workers']}")
+
+
+def _read_cache(cache_path: Path) -> Dict[str, dict]:
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(cache_path: Path, cache: Dict[str, dict]) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f, indent=4)
+    os.replace(tmp_path, cache_path)
@@ -1,44 +1,71 @@
+from typing import Callable, Optional, Tuple, Union
 import torch
 from torch.utils.data import DataLoader
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score
+
+from data_utils.collate import unpack_batch, embed
+from data_utils.eval_set import EvalSet
+from utils.probes import probe_accuracy
 
 def evaluate_latent_classification(
     model: torch.nn.Module,
-    dataloader: DataLoader,
+    dataloader: Union[DataLoader, EvalSet],
     device: torch.device,
-) -> float:
+    batch_transform: Optional[Callable[[torch.Tensor], torch.Tensor]] = None,
+    probe: str = "knn",
+    test_size: float = 0.2,
+    batch_size: int = 256,
+    return_n_test: bool = False,
+    **probe_kwargs,
+) -> Union[float, Tuple[float, int]]:
     """
-    Evaluates the quality of embeddings by training a simple classifier
-    on the frozen embeddings produced by the model.
+    Evaluates the quality of embeddings by fitting a probe classifier
+    on part of the frozen embeddings and scoring it on the held-out rest.
 
     Args:
         model: The trained model that outputs embeddings
-        dataloader: A DataLoader that yields (x, label) pairs
+        dataloader: A DataLoader that yields (x, label) pairs, or
+            (x, label, mask) batches from `pad_collate`, or a materialized
+            EvalSet whose inputs are already featurized on the device
         device: The torch device to use
-        logger: Optional logger for diagnostics
+        batch_transform: Optional stage applied to each batch on the device
+            (see `build_transforms(params, split=True)`)
+        probe: Probe name, see `utils.probes.PROBES`
+        test_size: Fraction of each class held out for scoring the probe
+        batch_size: Forward batch size for an EvalSet
+        return_n_test: Also return the number of held-out samples
+        **probe_kwargs: Passed to the probe (e.g. k for knn, alpha for ridge)
 
     Returns:
-        Accuracy score (float)
+        Accuracy score (float; NaN if no sample could be held out), or
+        (accuracy, n_test) if return_n_test
     """
     model.eval()
     all_embeddings = []
     all_labels = []
 
+    if isinstance(dataloader, EvalSet):
+        # Inputs are already on the device and featurized
+        batches = dataloader.batches(batch_size)
+        batch_transform = None
+    else:
+        batches = dataloader
+
     with torch.no_grad():
-        for x, y in dataloader:
+        for batch in batches:
+            x, y, mask = unpack_batch(batch)
             x = x.to(device)
-            emb = model(x)  # [B, D]
-            all_embeddings.append(emb.cpu())
+            if mask is not None:
+                mask = mask.to(device)
+            if batch_transform is not None:
+                x = batch_transform(x, mask=mask) if mask is not None else batch_transform(x)
+            emb = embed(model, x, mask)  # [B, D]
+            all_embeddings.append(emb)
             all_labels.append(y)
 
-    embeddings = torch.cat(all_embeddings, dim=0).numpy()
-    labels = torch.cat(all_labels, dim=0).numpy()
-
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf.fit(embeddings, labels)
-    preds = clf.predict(embeddings)
-
-    acc = float(accuracy_score(labels, preds))
+    # Embeddings stay on the device; only the random forest probe moves them to CPU
+    embeddings = torch.cat(all_embeddings, dim=0)
+    labels = torch.cat(all_labels, dim=0)
 
-    return acc
+    return probe_accuracy(
+        embeddings, labels, probe=probe, test_size=test_size, return_n_test=return_n_test, **probe_kwargs
+    )
@@ -1,23 +1,22 @@
 from pathlib import Path
 import logging
-from typing import Literal
+from typing import Literal, Optional
 
 
 def create_logger(
-    log_dir: Path, console_log_level: Literal["info", "debug"] = "info"
+    log_dir: Optional[Path], console_log_level: Literal["info", "debug", "warning"] = "info"
 ) -> logging.Logger:
     """
     Creates a logger that writes both info-level and debug-level logs to separate files,
     and prints messages to the console at a configurable level.
 
     Args:
-        log_dir (Path): Directory where log files will be saved.
-        console_log_level (str): Level of log messages to print to console ("info" or "debug").
+        log_dir (Path): Directory where log files will be saved (console only if None).
+        console_log_level (str): Level of log messages to print to console ("info", "debug" or "warning").
 
     Returns:
         logging.Logger: Configured logger instance.
     """
-    log_dir.mkdir(parents=True, exist_ok=True)
     logger = logging.getLogger("experiment_logger")
     logger.setLevel(logging.DEBUG)
     logger.handlers.clear()
@@ -25,21 +24,24 @@ def create_logger(
     # Formatter
     formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s", "%Y-%m-%d %H:%M:%S")
 
-    # File handler for INFO level and above
-    info_handler = logging.FileHandler(log_dir / "log_info.txt")
-    info_handler.setLevel(logging.INFO)
-    info_handler.setFormatter(formatter)
-    logger.addHandler(info_handler)
+    if log_dir is not None:
+        log_dir.mkdir(parents=True, exist_ok=True)
 
-    # File handler for DEBUG level (everything)
-    debug_handler = logging.FileHandler(log_dir / "log_debug.txt")
-    debug_handler.setLevel(logging.DEBUG)
-    debug_handler.setFormatter(formatter)
-    logger.addHandler(debug_handler)
+        # File handler for INFO level and above
+        info_handler = logging.FileHandler(log_dir / "log_info.txt")
+        info_handler.setLevel(logging.INFO)
+        info_handler.setFormatter(formatter)
+        logger.addHandler(info_handler)
+
+        # File handler for DEBUG level (everything)
+        debug_handler = logging.FileHandler(log_dir / "log_debug.txt")
+        debug_handler.setLevel(logging.DEBUG)
+        debug_handler.setFormatter(formatter)
+        logger.addHandler(debug_handler)
 
     # Console handler
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG if console_log_level == "debug" else logging.INFO)
+    console_handler.setLevel(logging.getLevelName(console_log_level.upper()))
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
 
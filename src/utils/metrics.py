@@ -0,0 +1,250 @@
+# src/utils/metrics.py
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import csv
+import json
+import logging
+import resource
+import sys
+import threading
+import time
+
+import numpy as np
+import torch
+
+
+class MetricsWriter:
+    """
+    Buffered JSONL sink for structured training records.
+
+    `log` only appends a dict to an in-memory buffer. A background thread
+    writes the buffer to `path` every `flush_interval` seconds, so the
+    training loop never waits on file I/O. Each record carries a `kind`
+    ("step", "epoch", "eval", ...) and a wall-clock `time`.
+    """
+
+    def __init__(self, path: Path, flush_interval: float = 5.0) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = path.open("a")
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, kind: str, **fields) -> None:
+        record = {"kind": kind, "time": time.time(), **fields}
+        with self._lock:
+            self._buffer.append(record)
+
+    def flush(self) -> None:
+        """Write all buffered records to the file."""
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if records:
+            self._file.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+            self._file.flush()
+
+    def close(self) -> None:
+        """Stop the background thread and write the remaining records."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> "MetricsWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+def read_metrics(path: Path, kind: Optional[str] = None) -> List[Dict]:
+    """Read the records of a `metrics.jsonl` file, optionally only those of one kind."""
+    with path.open() as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [r for r in records if kind is None or r["kind"] == kind]
+
+
+def reset_peak_memory(device: torch.device) -> None:
+    """Start a new peak-memory window (CUDA only; the other backends have no resettable peak)."""
+    if device.type == "cuda":
+        torch.cuda.reset_peak_memory_stats(device)
+
+
+def memory_usage_mb(device: torch.device) -> Dict[str, float]:
+    """
+    Memory figures for `device` in MB, named after what each backend can measure.
+
+    - cuda: `cuda_peak_allocated_mb`, the peak since the last `reset_peak_memory`
+    - mps: `mps_driver_allocated_mb`, the memory allocated right now (MPS keeps no peak)
+    - cpu: `max_rss_mb`, the peak resident set size of this process over its
+      lifetime, and `workers_max_rss_mb`, the largest peak of its finished
+      child processes (DataLoader workers are counted once they have exited)
+    """
+    if device.type == "cuda":
+        return {"cuda_peak_allocated_mb": torch.cuda.max_memory_allocated(device) / 1024**2}
+    if device.type == "mps":
+        return {"mps_driver_allocated_mb": torch.mps.driver_allocated_memory() / 1024**2}
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    scale = 1024**2 if sys.platform == "darwin" else 1024
+    return {
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "workers_max_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+class StepMetrics:
+    """
+    Per-step training loss kept on the device and copied to the host in bulk.
+
+    `update` only queues device ops, so it never blocks on the accelerator.
+    Every `flush_every` steps (and at the end of an epoch) the pending
+    values are copied to the host with a single sync. At that point one
+    "step" record per step is written to `writer`, with the loss and any
+    host-side fields given to `update` (timings, sample counts). With
+    `debug=True`, the per-step embedding mean/std are also recorded on the
+    device and logged at each flush.
+    """
+
+    def __init__(
+        self,
+        flush_every: int = 50,
+        debug: bool = False,
+        logger: Optional[logging.Logger] = None,
+        writer: Optional[MetricsWriter] = None,
+    ) -> None:
+        self.flush_every = flush_every
+        self.debug = debug
+        self.logger = logger
+        self.writer = writer
+        self.global_step = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new epoch."""
+        self._rows: List[torch.Tensor] = []
+        self._fields: List[Dict] = []
+        self.total_loss = 0.0
+        self.steps = 0
+
+    def update(self, loss: torch.Tensor, embeddings: Optional[torch.Tensor] = None, **fields) -> None:
+        row = [loss.detach().float()]
+        if self.debug and embeddings is not None:
+            embeddings = embeddings.detach().float()
+            row += [embeddings.mean(), embeddings.std()]
+        self._rows.append(torch.stack(row))
+        self._fields.append(fields)
+        if len(self._rows) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Copy the pending values to the host."""
+        if not self._rows:
+            return
+        width = max(len(row) for row in self._rows)
+        rows = torch.stack([torch.nn.functional.pad(row, (0, width - len(row))) for row in self._rows]).tolist()
+
+        for row, fields in zip(rows, self._fields):
+            self.steps += 1
+            self.global_step += 1
+            self.total_loss += row[0]
+            if self.writer is not None:
+                self.writer.log("step", step=self.global_step, loss=row[0], **fields)
+            if self.debug and width == 3:
+                self._log_debug(
+                    f"Step {self.global_step} | embeddings mean: {row[1]:.4f}, std: {row[2]:.4f} | loss: {row[0]:.6f}"
+                )
+        self._rows = []
+        self._fields = []
+
+    def mean_loss(self) -> float:
+        """Mean loss over the epoch so far (flushes pending values)."""
+        self.flush()
+        return self.total_loss / max(self.steps, 1)
+
+    def _log_debug(self, msg: str) -> None:
+        if self.logger:
+            self.logger.debug(msg)
+        else:
+            print(msg)
+
+
+def read_accuracy_file(path: Path) -> List[tuple[int, float]]:
+    """Read the (epoch, accuracy) rows of a fold's accuracy.csv."""
+    if not path.exists():
+        return []
+    with path.open(newline="") as f:
+        return [(int(row["epoch"]), float(row["accuracy"])) for row in csv.DictReader(f)]
+
+
+def summarize_folds(
+    run_dir: Path,
+    fold_ids: List[int],
+    logger: Optional[logging.Logger] = None,
+) -> Dict:
+    """
+    Gather the per-fold accuracy files of a k-fold run into one summary.
+
+    Writes `metrics/kfold_summary.csv` (one row per fold) and
+    `metrics/kfold_summary.json` (per-fold rows plus mean/std of the best
+    accuracies) under `run_dir`.
+
+    Args:
+        run_dir: Run directory containing the `fold_k/` directories
+        fold_ids: Folds to include
+        logger: Optional logger for messages
+
+    Returns:
+        Dict: The JSON summary
+    """
+
+    def log(msg: str):
+        if logger:
+            logger.info(msg)
+        else:
+            print(msg)
+
+    folds = []
+    for fold_id in fold_ids:
+        rows = read_accuracy_file(run_dir / f"fold_{fold_id}" / "metrics" / "accuracy.csv")
+        if not rows:
+            log(f"Fold {fold_id}: no accuracy recorded")
+            continue
+        best_epoch, best_acc = max(rows, key=lambda row: row[1])
+        folds.append({
+            "fold": fold_id,
+            "best_epoch": best_epoch,
+            "best_accuracy": best_acc,
+            "last_accuracy": rows[-1][1],
+        })
+
+    best = np.array([fold["best_accuracy"] for fold in folds])
+    summary = {
+        "folds": folds,
+        "mean_best_accuracy": float(best.mean()) if len(best) else None,
+        "std_best_accuracy": float(best.std()) if len(best) else None,
+    }
+
+    metrics_dir = run_dir / "metrics"
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    with (metrics_dir / "kfold_summary.csv").open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["fold", "best_epoch", "best_accuracy", "last_accuracy"])
+        writer.writeheader()
+        writer.writerows(folds)
+    with (metrics_dir / "kfold_summary.json").open("w") as f:
+        json.dump(summary, f, indent=4)
+
+    if folds:
+        log(f"K-fold summary: best accuracy {summary['mean_best_accuracy']:.4f} "
+            f"± {summary['std_best_accuracy']:.4f} over {len(folds)} folds")
+    return summary
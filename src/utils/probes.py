@@ -0,0 +1,180 @@
+# src/utils/probes.py
+
+"""
+Probe classifiers that score frozen embeddings on a held-out split.
+
+The torch probes (knn, ridge, centroid) run on whatever device the
+embeddings live on. random_forest is the original scikit-learn probe.
+"""
+
+from typing import Callable, Dict, Tuple, Union
+import warnings
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from sklearn.ensemble import RandomForestClassifier
+
+
+def stratified_split(
+    labels: torch.Tensor, test_size: float = 0.2, seed: int = 42
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Split indices into probe-train and held-out parts, class by class.
+
+    Every class with at least two samples contributes round(test_size * n)
+    samples (at least one) to the held-out part; singleton classes are only
+    used for fitting.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor]: (train indices, test indices) on the labels' device
+    """
+    rng = np.random.RandomState(seed)
+    y = labels.cpu().numpy()
+    train, test = [], []
+    for label in np.unique(y):
+        indices = rng.permutation(np.flatnonzero(y == label))
+        n_test = 0 if len(indices) < 2 else min(len(indices) - 1, max(1, round(test_size * len(indices))))
+        test.extend(indices[:n_test])
+        train.extend(indices[n_test:])
+    as_tensor = lambda idx: torch.as_tensor(np.sort(idx), dtype=torch.long, device=labels.device)
+    return as_tensor(train), as_tensor(test)
+
+
+def knn_probe(
+    train_x: torch.Tensor,
+    train_y: torch.Tensor,
+    test_x: torch.Tensor,
+    k: int = 5,
+    block_size: int = 4096,
+    **kwargs,
+) -> torch.Tensor:
+    """
+    Exact k-nearest-neighbour vote under cosine similarity.
+
+    Similarities are computed one block of test rows at a time, so memory
+    stays at block_size x n_train. Ties are broken by summed similarity.
+    """
+    train_x = F.normalize(train_x, dim=1)
+    test_x = F.normalize(test_x, dim=1)
+    n_classes = int(train_y.max()) + 1
+    k = min(k, len(train_x))
+
+    preds = []
+    for start in range(0, len(test_x), block_size):
+        sims = test_x[start:start + block_size] @ train_x.T  # [b, N]
+        top_sims, top_idx = sims.topk(k, dim=1)
+        votes = torch.zeros(len(sims), n_classes, device=sims.device, dtype=sims.dtype)
+        votes.scatter_add_(1, train_y[top_idx], 1.0 + 1e-3 * top_sims)
+        preds.append(votes.argmax(dim=1))
+    return torch.cat(preds)
+
+
+def ridge_probe(
+    train_x: torch.Tensor,
+    train_y: torch.Tensor,
+    test_x: torch.Tensor,
+    alpha: float = 1.0,
+    **kwargs,
+) -> torch.Tensor:
+    """
+    Closed-form ridge regression onto one-hot labels (a linear probe).
+
+    Features are standardized with the probe-train statistics; the bias is
+    not penalized.
+    """
+    mean = train_x.mean(dim=0)
+    std = train_x.std(dim=0, unbiased=False).clamp_min(1e-6)
+    train_x = (train_x - mean) / std
+    test_x = (test_x - mean) / std
+
+    n_classes = int(train_y.max()) + 1
+    targets = F.one_hot(train_y, n_classes).to(train_x.dtype)
+    target_mean = targets.mean(dim=0)
+
+    # Centered data make the bias the target mean, so only the weights need solving
+    gram = train_x.T @ train_x + alpha * torch.eye(train_x.shape[1], device=train_x.device, dtype=train_x.dtype)
+    weights = torch.linalg.solve(gram, train_x.T @ (targets - target_mean))
+    return (test_x @ weights + target_mean).argmax(dim=1)
+
+
+def centroid_probe(
+    train_x: torch.Tensor,
+    train_y: torch.Tensor,
+    test_x: torch.Tensor,
+    **kwargs,
+) -> torch.Tensor:
+    """Nearest class centroid under cosine similarity."""
+    train_x = F.normalize(train_x, dim=1)
+    n_classes = int(train_y.max()) + 1
+    centroids = torch.zeros(n_classes, train_x.shape[1], device=train_x.device, dtype=train_x.dtype)
+    centroids.index_add_(0, train_y, train_x)
+    return (F.normalize(test_x, dim=1) @ F.normalize(centroids, dim=1).T).argmax(dim=1)
+
+
+def random_forest_probe(
+    train_x: torch.Tensor,
+    train_y: torch.Tensor,
+    test_x: torch.Tensor,
+    n_estimators: int = 100,
+    seed: int = 42,
+    **kwargs,
+) -> torch.Tensor:
+    """The original scikit-learn random forest, fitted on CPU."""
+    clf = RandomForestClassifier(n_estimators=n_estimators, random_state=seed)
+    clf.fit(train_x.cpu().numpy(), train_y.cpu().numpy())
+    return torch.as_tensor(clf.predict(test_x.cpu().numpy()), device=test_x.device)
+
+
+PROBES: Dict[str, Callable[..., torch.Tensor]] = {
+    "knn": knn_probe,
+    "ridge": ridge_probe,
+    "centroid": centroid_probe,
+    "random_forest": random_forest_probe,
+}
+
+
+def probe_accuracy(
+    embeddings: torch.Tensor,
+    labels: torch.Tensor,
+    probe: str = "knn",
+    test_size: float = 0.2,
+    seed: int = 42,
+    return_n_test: bool = False,
+    **probe_kwargs,
+) -> Union[float, Tuple[float, int]]:
+    """
+    Fit a probe on part of the embeddings and return its accuracy on the rest.
+
+    When no class has two samples there is nothing to hold out (a held-out
+    sample's class would be missing from the probe's training data), so the
+    accuracy is NaN and a warning is issued.
+
+    Args:
+        embeddings: [N, D] embeddings
+        labels: [N] integer labels (any values; remapped internally)
+        probe: One of PROBES ("knn", "ridge", "centroid", "random_forest")
+        test_size: Fraction of each class held out for scoring
+        seed: Seed of the split
+        return_n_test: Also return the number of held-out samples
+        **probe_kwargs: Passed to the probe (e.g. k, alpha)
+
+    Returns:
+        float: Held-out accuracy, or (accuracy, n_test) if return_n_test
+    """
+    if probe not in PROBES:
+        raise ValueError(f"Unknown probe: {probe}. Choose from {sorted(PROBES)}")
+
+    labels = labels.to(embeddings.device)
+    _, labels = torch.unique(labels, return_inverse=True)
+    train_idx, test_idx = stratified_split(labels, test_size=test_size, seed=seed)
+    if len(test_idx) == 0:
+        warnings.warn(f"No class of the {len(labels)} samples has two members to hold one out; accuracy is NaN")
+        acc = float("nan")
+    else:
+        embeddings = embeddings.float()
+        preds = PROBES[probe](
+            embeddings[train_idx], labels[train_idx], embeddings[test_idx], seed=seed, **probe_kwargs
+        )
+        acc = float((preds == labels[test_idx]).float().mean())
+    return (acc, len(test_idx)) if return_n_test else acc
@@ -0,0 +1,217 @@
+# src/utils/profiler.py
+
+"""
+Low-overhead wall-clock timing of pipeline stages, across DataLoader workers.
+
+Code marks stages with `with stage("decode"): ...`. While profiling is
+disabled this costs one global lookup. When enabled, every process
+(the training process and each DataLoader worker) accumulates count,
+total and max time per stage and writes them to its own JSON file in the
+profile directory: the training process on `dump`, workers when they exit
+(via `multiprocessing.util.Finalize`). `aggregate_profiles` merges the
+files into one per-stage breakdown.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, Dict, Optional
+import json
+import logging
+import multiprocessing.util
+import os
+import time
+
+import torch
+
+from utils.acceleration import synchronize
+
+_NULL_CONTEXT = nullcontext()
+
+
+class StageProfiler:
+    """Per-process accumulator of stage timings."""
+
+    def __init__(self, out_dir: Path, source: str, device: Optional[torch.device] = None) -> None:
+        self.out_dir = out_dir
+        self.source = source
+        # Accelerator stages are timed up to completion of their queued work
+        self.sync_device = device if device is not None and device.type != "cpu" else None
+        self.stats: Dict[str, list] = defaultdict(lambda: [0, 0, 0])  # count, total_ns, max_ns
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            if self.sync_device is not None:
+                synchronize(self.sync_device)
+            self.record_ns(name, time.perf_counter_ns() - start)
+
+    def record_ns(self, name: str, elapsed_ns: int) -> None:
+        stats = self.stats[name]
+        stats[0] += 1
+        stats[1] += elapsed_ns
+        stats[2] = max(stats[2], elapsed_ns)
+
+    def dump(self) -> Optional[Path]:
+        """Write this process's timings to `profile_<source>_<pid>.json`."""
+        if not self.stats:
+            return None
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        path = self.out_dir / f"profile_{self.source}_{os.getpid()}.json"
+        with open(path, "w") as f:
+            json.dump({"source": self.source, "pid": os.getpid(), "stages": dict(self.stats)}, f)
+        return path
+
+
+_profiler: Optional[StageProfiler] = None
+
+
+def enable(out_dir: Path, device: Optional[torch.device] = None, source: str = "main") -> StageProfiler:
+    """Start profiling in this process, discarding earlier timings."""
+    global _profiler
+    _profiler = StageProfiler(out_dir, source, device)
+    return _profiler
+
+
+def disable() -> None:
+    global _profiler
+    _profiler = None
+
+
+def get() -> Optional[StageProfiler]:
+    return _profiler
+
+
+def stage(name: str):
+    """Context manager timing a stage when profiling is enabled; a no-op otherwise."""
+    if _profiler is None:
+        return _NULL_CONTEXT
+    return _profiler.stage(name)
+
+
+def record(name: str, seconds: float) -> None:
+    """Add an externally measured duration to a stage."""
+    if _profiler is not None:
+        _profiler.record_ns(name, int(seconds * 1e9))
+
+
+class WorkerInit:
+    """
+    DataLoader `worker_init_fn` that profiles the worker into `out_dir`.
+
+    Forked workers inherit the parent's counters, so each worker starts a
+    fresh profiler; its timings are written when the worker process exits.
+    """
+
+    def __init__(self, out_dir: Path, base_init: Optional[Callable[[int], None]] = None) -> None:
+        self.out_dir = out_dir
+        self.base_init = base_init
+
+    def __call__(self, worker_id: int) -> None:
+        profiler = enable(self.out_dir, source=f"worker{worker_id}")
+        multiprocessing.util.Finalize(profiler, profiler.dump, exitpriority=10)
+        if self.base_init is not None:
+            self.base_init(worker_id)
+
+
+class Profiled:
+    """Wrap a callable (e.g. a collate function) so each call is timed as `name`."""
+
+    def __init__(self, fn: Callable, name: str) -> None:
+        self.fn = fn
+        self.name = name
+
+    def __call__(self, *args, **kwargs):
+        with stage(self.name):
+            return self.fn(*args, **kwargs)
+
+
+def trace_window(
+    out_path: Path, start: int, steps: int, device: Optional[torch.device] = None
+) -> torch.profiler.profile:
+    """
+    A `torch.profiler` session that records steps [start, start + steps) after one warm-up step.
+
+    Call `.start()` before the loop, `.step()` after every training step and
+    `.stop()` at the end; the Chrome trace is written to `out_path`.
+    """
+    activities = [torch.profiler.ProfilerActivity.CPU]
+    if device is not None and device.type == "cuda":
+        activities.append(torch.profiler.ProfilerActivity.CUDA)
+
+    def export(prof: torch.profiler.profile) -> None:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        prof.export_chrome_trace(str(out_path))
+
+    return torch.profiler.profile(
+        activities=activities,
+        schedule=torch.profiler.schedule(wait=max(start - 1, 0), warmup=1, active=steps, repeat=1),
+        on_trace_ready=export,
+        record_shapes=True,
+    )
+
+
+def aggregate_profiles(
+    profile_dir: Path,
+    out_path: Path,
+    logger: Optional[logging.Logger] = None,
+) -> Dict:
+    """
+    Merge the per-process timing files of `profile_dir` into one breakdown.
+
+    Stages are summed over processes. Worker stages run in parallel with
+    the training loop, so their totals are CPU time spent across workers,
+    not wall time added to training.
+
+    Args:
+        profile_dir: Directory holding `profile_*.json` files
+        out_path: Where to write the merged breakdown (JSON)
+        logger: Optional logger for the summary table
+
+    Returns:
+        Dict: The merged breakdown
+    """
+
+    def log(msg: str):
+        if logger:
+            logger.info(msg)
+        else:
+            print(msg)
+
+    merged: Dict[str, Dict] = {}
+    sources = []
+    for path in sorted(profile_dir.glob("profile_*.json")):
+        with open(path) as f:
+            data = json.load(f)
+        sources.append(f"{data['source']}:{data['pid']}")
+        where = "main" if data["source"] == "main" else "workers"
+        for name, (count, total_ns, max_ns) in data["stages"].items():
+            entry = merged.setdefault(name, {"where": where, "count": 0, "total_s": 0.0, "max_ms": 0.0})
+            if entry["where"] != where:
+                entry["where"] = "both"
+            entry["count"] += count
+            entry["total_s"] += total_ns / 1e9
+            entry["max_ms"] = max(entry["max_ms"], max_ns / 1e6)
+
+    for entry in merged.values():
+        entry["mean_ms"] = 1000 * entry["total_s"] / max(entry["count"], 1)
+
+    summary = {
+        "processes": sources,
+        "stages": dict(sorted(merged.items(), key=lambda item: -item[1]["total_s"])),
+    }
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(summary, f, indent=4)
+
+    lines = [f"Stage breakdown ({len(sources)} processes):"]
+    for name, entry in summary["stages"].items():
+        lines.append(
+            f"  {name:<18} {entry['where']:<8} {entry['total_s']:9.3f} s  "
+            f"{entry['count']:7d} calls  {entry['mean_ms']:8.3f} ms mean"
+        )
+    log("\n".join(lines))
+    return summary
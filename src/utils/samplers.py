@@ -1,8 +1,7 @@
 # src/data/samplers.py
 from torch.utils.data import Sampler
 import numpy as np
-from typing import List, Iterator
-from collections import defaultdict
+from typing import List, Iterator, Optional
 
 class ContrastiveBatchSampler(Sampler[List[int]]):
     """
@@ -14,6 +13,17 @@ class ContrastiveBatchSampler(Sampler[List[int]]):
     - Each sample contributes N augmented views
     
     Total batch size = K * M * N
+
+    The whole epoch is planned at once as an [n_batches, K * M] index array
+    (see `plan_epoch`), from a generator seeded with (seed, epoch), so a seed
+    and epoch always give the same plan on every process. Every class with
+    at least M samples appears in the epoch: when the classes do not fill
+    the last batch, it is topped up with classes from the batch before it.
+    With `world_size > 1` each rank iterates its own share of the batches
+    (padded by wrapping around so all ranks get the same number).
+
+    The epoch advances after each complete pass; `set_epoch` sets it
+    explicitly (as with DistributedSampler) and can resume mid-epoch.
     """
     
     def __init__(
@@ -23,56 +33,260 @@ class ContrastiveBatchSampler(Sampler[List[int]]):
         samples_per_class: int,
         views_per_sample: int,
         shuffle: bool = True,
-        seed: int = 42
+        seed: int = 42,
+        lengths: Optional[List[int]] = None,
+        bucket_window: int = 4,
+        rank: int = 0,
+        world_size: int = 1
     ):
+        if not 0 <= rank < world_size:
+            raise ValueError(f"rank must be in [0, {world_size}), got {rank}")
         self.labels = np.array(labels)
         self.classes_per_batch = classes_per_batch
         self.samples_per_class = samples_per_class
         self.views_per_sample = views_per_sample
         self.shuffle = shuffle
         self.seed = seed
+        self.bucket_window = bucket_window
+        self.rank = rank
+        self.world_size = world_size
+        self.epoch = 0
+        self.start_batch = 0
         
-        # Group indices by label
-        self.label_to_indices = defaultdict(list)
-        for idx, label in enumerate(labels):
-            self.label_to_indices[label].append(idx)
+        # Group indices by label (stable sort keeps indices ascending within a class)
+        order = np.argsort(self.labels, kind="stable")
+        classes, starts, sizes = np.unique(self.labels[order], return_index=True, return_counts=True)
+        self.label_to_indices = {
+            int(label): group.tolist()
+            for label, group in zip(classes, np.split(order, starts[1:]))
+        }
+        # Class codes (positions in `classes`) per sample, and each class's slice of the grouped order
+        self._codes = np.searchsorted(classes, self.labels)
+        self._starts = starts
+        self._sizes = sizes
             
         # Filter classes with enough samples
         self.valid_classes = [
             label for label, indices in self.label_to_indices.items()
             if len(indices) >= samples_per_class
         ]
-        
-        self.rng = np.random.RandomState(seed)
-        
+        self._valid_codes = np.flatnonzero(sizes >= samples_per_class)
+
+        # Median clip length per class, used to batch classes of similar length
+        self.class_lengths = None
+        if lengths is not None:
+            lengths = np.asarray(lengths)
+            self.class_lengths = {
+                label: float(np.median(lengths[indices]))
+                for label, indices in self.label_to_indices.items()
+            }
+            self._code_lengths = np.array([self.class_lengths[int(label)] for label in classes])
+
+    @classmethod
+    def from_dataset(cls, dataset, indices, **kwargs) -> "ContrastiveBatchSampler":
+        """
+        Build a sampler over `Subset(dataset, indices)` using the dataset's
+        metadata-only `labels_for`, so no audio is decoded.
+        """
+        return cls(labels=dataset.labels_for(indices), **kwargs)
+
+    def set_epoch(self, epoch: int, start_batch: int = 0) -> None:
+        """
+        Plan the next pass as `epoch`, starting at batch `start_batch` of this rank's share.
+
+        Args:
+            epoch: Epoch number the plan is seeded with
+            start_batch: Batches of this rank already consumed (to resume a
+                checkpointed epoch); only applies to the next pass, which is
+                empty if the rank's share is already used up
+        """
+        if start_batch < 0:
+            raise ValueError(f"start_batch must be >= 0, got {start_batch}")
+        self.epoch = epoch
+        self.start_batch = start_batch
+
+    def plan_epoch(self, epoch: int) -> np.ndarray:
+        """
+        The batches of `epoch` on every rank.
+
+        Returns:
+            np.ndarray: [n_batches, classes_per_batch * samples_per_class]
+                dataset indices, one row per batch
+        """
+        rng = np.random.default_rng((self.seed, epoch))
+        K, M = self.classes_per_batch, self.samples_per_class
+        classes = self._ordered_classes(rng)
+        n_classes = len(classes)
+        if n_classes < K:
+            return np.empty((0, K * M), dtype=np.int64)
+
+        # Consecutive groups of K classes; the last group is the last K classes,
+        # and classes it shares with the group before it draw their next M samples
+        n_batches = -(-n_classes // K)
+        slots = np.arange(n_batches * K).reshape(n_batches, K)
+        slots[-1] = np.arange(n_classes - K, n_classes)
+        groups = classes[slots]
+        occurrence = np.zeros_like(groups)
+        if n_batches > 1:
+            occurrence[-1] = slots[-1] < (n_batches - 1) * K
+
+        # Samples grouped by class, in random order within each class
+        if self.shuffle:
+            grouped = np.lexsort((rng.random(len(self.labels)), self._codes))
+        else:
+            grouped = np.argsort(self._codes, kind="stable")
+
+        offsets = (occurrence[..., None] * M + np.arange(M)) % self._sizes[groups][..., None]
+        plan = grouped[self._starts[groups][..., None] + offsets].reshape(n_batches, K * M)
+
+        # Length-ordered batches would otherwise run shortest to longest
+        if self.shuffle and self.class_lengths is not None:
+            plan = plan[rng.permutation(n_batches)]
+        return plan
+
     def __iter__(self) -> Iterator[List[int]]:
-        # Shuffle classes
-        classes = self.valid_classes.copy()
+        plan = self._rank_plan(self.plan_epoch(self.epoch))
+        start, self.start_batch = self.start_batch, 0
+        self.epoch += 1
+        for batch in plan[start:]:
+            yield batch.tolist()
+
+    def _rank_plan(self, plan: np.ndarray) -> np.ndarray:
+        if self.world_size == 1 or len(plan) == 0:
+            return plan
+        per_rank = -(-len(plan) // self.world_size)
+        padded = plan[np.arange(per_rank * self.world_size) % len(plan)]
+        return padded[self.rank::self.world_size]
+
+    def _ordered_classes(self, rng: np.random.Generator) -> np.ndarray:
+        classes = self._valid_codes
+        if self.class_lengths is None:
+            return rng.permutation(classes) if self.shuffle else classes
+
+        # Sort classes by length and only shuffle within windows of a few
+        # batches, so each batch holds classes of similar length. Window
+        # boundaries move between epochs but stay on batch boundaries.
+        classes = classes[np.argsort(self._code_lengths[classes], kind="stable")]
         if self.shuffle:
-            self.rng.shuffle(classes)
-            
-        # Generate batches
-        for i in range(0, len(classes), self.classes_per_batch):
-            batch_classes = classes[i:i + self.classes_per_batch]
-            if len(batch_classes) < self.classes_per_batch:
-                continue  # Skip incomplete batches
-                
-            batch_indices = []
-            for label in batch_classes:
-                # Sample indices for this class
-                class_indices = self.label_to_indices[label]
-                if self.shuffle:
-                    sampled = self.rng.choice(
-                        class_indices, 
-                        size=self.samples_per_class,
-                        replace=len(class_indices) < self.samples_per_class
-                    )
-                else:
-                    sampled = class_indices[:self.samples_per_class]
-                    
-                batch_indices.extend(sampled)
-                
-            yield batch_indices
+            window = self.classes_per_batch * self.bucket_window
+            offset = self.classes_per_batch * rng.integers(self.bucket_window)
+            positions = np.arange(len(classes))
+            windows = np.where(positions < offset, 0, 1 + (positions - offset) // window)
+            classes = classes[np.lexsort((rng.random(len(classes)), windows))]
+        return classes
             
     def __len__(self) -> int:
-        return len(self.valid_classes) // self.classes_per_batch
\ No newline at end of file
+        n_classes = len(self.valid_classes)
+        if n_classes < self.classes_per_batch:
+            return 0
+        n_batches = -(-n_classes // self.classes_per_batch)
+        # A resume offset at or past the end of this rank's share leaves nothing to do
+        return max(0, -(-n_batches // self.world_size) - self.start_batch)
+
+
+class MultiViewBatchSampler(ContrastiveBatchSampler):
+    """
+    ContrastiveBatchSampler for a multi-view dataset (`n_views` views per index).
+
+    A batch holds `n_classes_per_batch` classes with `samples_per_class`
+    clips each; the dataset turns every clip into `n_views` views, so a
+    batch carries n_classes_per_batch * samples_per_class * n_views views.
+    With one view per clip, clips of the same class are the only
+    positives, so at least two per class are needed.
+    """
+
+    def __init__(
+        self,
+        labels: List[int],
+        n_views: int,
+        n_classes_per_batch: int,
+        samples_per_class: Optional[int] = None,
+        lengths: Optional[List[int]] = None,
+        shuffle: bool = True,
+        seed: int = 42,
+        bucket_window: int = 4,
+        rank: int = 0,
+        world_size: int = 1
+    ):
+        if samples_per_class is None:
+            samples_per_class = 1 if n_views > 1 else 2
+        if n_views * samples_per_class < 2:
+            raise ValueError("A batch needs at least two views per class to form positives")
+        super().__init__(
+            labels,
+            classes_per_batch=n_classes_per_batch,
+            samples_per_class=samples_per_class,
+            views_per_sample=n_views,
+            shuffle=shuffle,
+            seed=seed,
+            lengths=lengths,
+            bucket_window=bucket_window,
+            rank=rank,
+            world_size=world_size,
+        )
+
+    @property
+    def n_views(self) -> int:
+        return self.views_per_sample
+
+    @classmethod
+    def for_batch_size(cls, labels: List[int], batch_size: int, n_views: int, **kwargs) -> "MultiViewBatchSampler":
+        """Fit as many classes as `batch_size` views allow (at least one)."""
+        samples_per_class = kwargs.pop("samples_per_class", None) or (1 if n_views > 1 else 2)
+        n_classes = max(batch_size // (samples_per_class * n_views), 1)
+        return cls(labels, n_views, n_classes, samples_per_class=samples_per_class, **kwargs)
+
+
+class BucketBatchSampler(Sampler[List[int]]):
+    """
+    Batches of clips with similar lengths, for use with dynamic padding.
+
+    Indices are shuffled and split into pools of `batch_size * pool_factor`.
+    Each pool is sorted by length and cut into batches, and the batch order
+    is shuffled again, so batches stay random but padding to the longest
+    clip of a batch stays small.
+    """
+
+    def __init__(
+        self,
+        lengths: List[int],
+        batch_size: int,
+        pool_factor: int = 50,
+        shuffle: bool = True,
+        drop_last: bool = False,
+        seed: int = 42
+    ):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.pool_factor = pool_factor
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.rng = np.random.RandomState(seed)
+
+    def __iter__(self) -> Iterator[List[int]]:
+        indices = np.arange(len(self.lengths))
+        if self.shuffle:
+            self.rng.shuffle(indices)
+
+        pool_size = self.batch_size * self.pool_factor if self.shuffle else len(indices)
+        batches = []
+        for start in range(0, len(indices), max(pool_size, 1)):
+            pool = indices[start:start + pool_size]
+            pool = pool[np.argsort(self.lengths[pool], kind="stable")]
+            for i in range(0, len(pool), self.batch_size):
+                batch = pool[i:i + self.batch_size]
+                if len(batch) < self.batch_size and self.drop_last:
+                    continue
+                batches.append(batch.tolist())
+
+        if self.shuffle:
+            self.rng.shuffle(batches)
+
+        yield from batches
+
+    def __len__(self) -> int:
+        if self.drop_last:
+            return len(self.lengths) // self.batch_size
+        pool_size = self.batch_size * self.pool_factor if self.shuffle else len(self.lengths)
+        full_pools, rest = divmod(len(self.lengths), max(pool_size, 1))
+        return full_pools * -(-pool_size // self.batch_size) + -(-rest // self.batch_size)
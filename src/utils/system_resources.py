@@ -60,6 +60,27 @@ def adjust_exp_params_for_system(params: ExpParams,
     return params
 
 
+def fold_resource_shares(n_parallel: int, num_cores: Optional[int] = None) -> tuple[int, int]:
+    """
+    Split the CPU cores between folds that run at the same time.
+
+    Each fold gets an equal share of cores, half of which (rounded down) go to
+    its DataLoader workers and the rest to torch intra-op threads.
+
+    Args:
+        n_parallel: Number of folds running concurrently
+        num_cores: Cores to share (all cores if None)
+
+    Returns:
+        tuple[int, int]: (torch threads, DataLoader workers) per fold
+    """
+    num_cores = num_cores or multiprocessing.cpu_count()
+    cores_per_fold = max(1, num_cores // max(1, n_parallel))
+    num_workers = cores_per_fold // 2
+    num_threads = max(1, cores_per_fold - num_workers)
+    return num_threads, num_workers
+
+
 def suggest_cluster_resources(params: ExpParams, model_size_gb: float = 1.5) -> dict:
     """
     Suggest reasonable cluster resource requests based on batch size and model size.
@@ -0,0 +1,25 @@
+import pytest
+from pathlib import Path
+import torch
+import torchaudio
+
+
+def write_wav_corpus(root: Path, spec: dict[str, list[int]], sample_rate: int = 16000) -> list[Path]:
+    """Write short sine-tone .wav files named after their labels, e.g. {"pa": [8000, 9600]}"""
+    paths = []
+    for label, lengths in spec.items():
+        for i, length in enumerate(lengths):
+            t = torch.arange(length) / sample_rate
+            waveform = 0.1 * torch.sin(2 * torch.pi * (200 + 50 * i) * t).unsqueeze(0)
+            path = root / f"{label}{i + 1}.wav"
+            torchaudio.save(str(path), waveform, sample_rate)
+            paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def wav_corpus(tmp_path: Path) -> Path:
+    data_dir = tmp_path / "stimuli"
+    data_dir.mkdir()
+    write_wav_corpus(data_dir, {"pa": [8000, 9600], "ta": [8800, 7200], "ka": [10400, 8000]})
+    return data_dir
@@ -0,0 +1,45 @@
+import torch
+import torch.nn as nn
+
+import utils.acceleration as acceleration
+from utils.acceleration import (
+    CompiledCallable, autocast_context, make_grad_scaler, resolve_precision, to_memory_format,
+)
+from data_utils.collate import accepts_mask
+
+
+def test_cpu_precision_uses_bf16_without_scaler():
+    cpu = torch.device("cpu")
+    assert resolve_precision(cpu, "fp32") is None
+    assert resolve_precision(cpu, "fp16") is torch.bfloat16
+
+    dtype = resolve_precision(cpu, "bf16")
+    with autocast_context(cpu, dtype):
+        out = nn.Linear(8, 4)(torch.randn(2, 8))
+    assert out.dtype == torch.bfloat16
+    assert not make_grad_scaler(cpu, dtype).is_enabled()
+
+
+def test_compiled_callable_falls_back_to_eager(monkeypatch):
+    def broken_compile(fn, mode=None):
+        def run(*args, **kwargs):
+            raise RuntimeError("backend unavailable")
+        return run
+
+    monkeypatch.setattr(acceleration.torch, "compile", broken_compile)
+
+    class Masked(nn.Module):
+        def forward(self, x, mask=None):
+            return x * 2
+
+    compiled = CompiledCallable(Masked(), "model")
+    assert torch.equal(compiled(torch.ones(2)), torch.full((2,), 2.0))
+    assert compiled.compiled is None
+    assert accepts_mask(compiled)
+
+
+def test_channels_last_only_for_4d_inputs():
+    x = torch.randn(2, 3, 5, 7)
+    assert to_memory_format(x, "channels_last").is_contiguous(memory_format=torch.channels_last)
+    assert to_memory_format(x[..., ::2], "contiguous").is_contiguous()
+    assert to_memory_format(torch.randn(2, 7), "channels_last").is_contiguous()
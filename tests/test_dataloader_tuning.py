@@ -0,0 +1,51 @@
+import torch
+from torch.utils.data import TensorDataset
+
+import utils.dataloader_tuning as tuning
+from experiment.exp_params import ExpParams
+from utils.dataloader_tuning import apply_tuned_settings, autotune_dataloader, dataloader_kwargs
+
+
+def test_dataloader_kwargs_only_pass_worker_options_with_workers():
+    params = ExpParams(num_workers=0, prefetch_factor=4, persistent_workers=True)
+    assert dataloader_kwargs(params) == {"num_workers": 0, "pin_memory": False}
+
+    params = ExpParams(num_workers=2, prefetch_factor=4, persistent_workers=True, pin_memory=True)
+    assert dataloader_kwargs(params) == {
+        "num_workers": 2, "pin_memory": True, "prefetch_factor": 4, "persistent_workers": True,
+    }
+
+
+def test_autotune_picks_fastest_and_caches(tmp_path, monkeypatch):
+    dataset = TensorDataset(torch.randn(64, 8), torch.arange(64))
+    params = ExpParams(batch_size=8)
+    cache_path = tmp_path / "autotune.json"
+
+    trials = []
+
+    def fake_throughput(dataset, batch_size, config, n_batches, **kwargs):
+        trials.append(dict(config))
+        # Two workers with prefetch 4 and no persistence is fastest
+        return (100 * config["num_workers"] + 10 * (config["prefetch_factor"] == 4)
+                + 5 * (not config["persistent_workers"]) - 300 * (config["num_workers"] > 2))
+
+    monkeypatch.setattr(tuning, "measure_throughput", fake_throughput)
+    best = autotune_dataloader(dataset, params, cache_path, worker_candidates=[0, 1, 2, 4])
+
+    assert (best["num_workers"], best["prefetch_factor"], best["persistent_workers"]) == (2, 4, False)
+    n_trials = len(trials)
+    assert n_trials == 4 + 2 + 1
+
+    # Second run hits the cache
+    assert autotune_dataloader(dataset, params, cache_path, worker_candidates=[0, 1, 2, 4]) == best
+    assert len(trials) == n_trials
+
+    apply_tuned_settings(params, best)
+    assert dataloader_kwargs(params)["prefetch_factor"] == 4
+
+
+def test_measure_throughput_runs_real_loader():
+    dataset = TensorDataset(torch.randn(32, 8), torch.arange(32))
+    for config in ({"num_workers": 0, "prefetch_factor": 2, "persistent_workers": False},
+                   {"num_workers": 1, "prefetch_factor": 2, "persistent_workers": True}):
+        assert tuning.measure_throughput(dataset, 4, config, n_batches=3) > 0
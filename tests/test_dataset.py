@@ -1,10 +1,14 @@
 import pytest
+import random
 from pathlib import Path
 import torch
+import torchaudio
 from torch.utils.data import DataLoader
+from data_utils.collate import multiview_collate, multiview_pad_collate, pad_collate
 from data_utils.parser import parse_dataset
 from data_utils.dataset import PhonemeDataset
 from experiment.exp_params import ExpParams
+from utils.samplers import ContrastiveBatchSampler, MultiViewBatchSampler
 
 def get_test_params(**overrides) -> ExpParams:
     """Helper to create consistent test params with optional overrides"""
@@ -59,3 +63,69 @@ def test_padding_variability():
     w1, _ = dataset[0]
     w2, _ = dataset[len(file_paths)]
     assert not torch.equal(w1, w2), "Padding should introduce variability between augmentations"
+
+def test_labels_for_does_not_decode_audio(wav_corpus, monkeypatch):
+    params = get_test_params(data_path=wav_corpus, n_augment=2)
+    file_paths, labels, _, lengths = parse_dataset(params.data_path)
+    dataset = PhonemeDataset(file_paths, labels, params=params, lengths=lengths)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("labels_for should not load audio")
+    monkeypatch.setattr(torchaudio, "load", fail)
+
+    indices = [0, 3, len(file_paths) + 1]
+    assert dataset.labels_for(indices).tolist() == [labels[0], labels[3], labels[1]]
+    assert dataset.lengths_for([len(file_paths)]).tolist() == [lengths[0]]
+
+    sampler = ContrastiveBatchSampler.from_dataset(
+        dataset, range(len(file_paths)), classes_per_batch=3, samples_per_class=2, views_per_sample=1
+    )
+    batch = next(iter(sampler))
+    assert len(batch) == 6
+    assert sorted(dataset.labels_for(batch).tolist()) == sorted(labels)
+
+def test_dynamic_padding_leaves_clips_unpadded(wav_corpus):
+    params = get_test_params(data_path=wav_corpus, dynamic_padding=True)
+    file_paths, labels, _, lengths = parse_dataset(params.data_path)
+    dataset = PhonemeDataset(file_paths, labels, params=params, lengths=lengths)
+
+    assert [dataset[i][0].shape[-1] for i in range(len(dataset))] == lengths
+
+    x, y, mask = next(iter(DataLoader(dataset, batch_size=3, collate_fn=pad_collate)))
+    assert x.shape == (3, max(lengths[:3]))
+    assert mask.sum(dim=-1).tolist() == lengths[:3]
+
+
+def test_multi_view_decodes_once_per_clip(wav_corpus, monkeypatch):
+    params = get_test_params(data_path=wav_corpus, n_views=3)
+    file_paths, labels, _, lengths = parse_dataset(params.data_path)
+    dataset = PhonemeDataset(file_paths, labels, params=params, lengths=lengths)
+
+    loads = []
+    original_load = torchaudio.load
+
+    def counting_load(*args, **kwargs):
+        loads.append(args)
+        return original_load(*args, **kwargs)
+    monkeypatch.setattr(torchaudio, "load", counting_load)
+
+    random.seed(0)
+    views, label = dataset[0]
+    assert len(loads) == 1
+    assert views.shape == (3, dataset.max_length)
+    # Random padding is drawn per view
+    assert not (torch.equal(views[0], views[1]) and torch.equal(views[1], views[2]))
+
+    sampler = MultiViewBatchSampler.for_batch_size(dataset.labels_for(range(len(dataset))), batch_size=9, n_views=3)
+    assert sampler.samples_per_class == 1 and sampler.classes_per_batch == 3
+    x, y = next(iter(DataLoader(dataset, batch_sampler=sampler, collate_fn=multiview_collate)))
+    assert x.shape == (9, dataset.max_length)
+    assert y.tolist()[0:3] == [y[0].item()] * 3 and len(set(y.tolist())) == 3
+
+    dynamic = PhonemeDataset(
+        file_paths, labels, params=get_test_params(data_path=wav_corpus, n_views=2, dynamic_padding=True),
+        lengths=lengths,
+    )
+    x, y, mask = multiview_pad_collate([dynamic[0], dynamic[1]])
+    assert x.shape == (4, max(lengths[:2]))
+    assert mask.sum(dim=-1).tolist() == [lengths[0], lengths[0], lengths[1], lengths[1]]
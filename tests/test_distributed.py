@@ -0,0 +1,116 @@
+import os
+import socket
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+import torch.nn as nn
+from torch.nn.parallel import DistributedDataParallel
+
+from experiment.distributed import DistributedContext, GlobalBatchLoss, gather_labels
+from models.memory_bank import MomentumEncoder
+
+WORLD_SIZE = 2
+
+
+class PairLoss(nn.Module):
+    """A loss that couples every pair of samples in the batch, like a contrastive loss."""
+
+    def forward(self, embeddings, labels):
+        same = (labels[:, None] == labels[None, :]).float()
+        return ((embeddings @ embeddings.T) * (2 * same - 1)).mean()
+
+
+def make_model() -> nn.Module:
+    torch.manual_seed(0)
+    return nn.Linear(6, 4)
+
+
+def make_data():
+    generator = torch.Generator().manual_seed(1)
+    return torch.randn(WORLD_SIZE * 3, 6, generator=generator), torch.tensor([0, 1, 2, 0, 1, 2])
+
+
+def run_rank(rank: int, port: int, out_dir: str) -> None:
+    os.environ["MASTER_ADDR"] = "127.0.0.1"
+    os.environ["MASTER_PORT"] = str(port)
+    dist.init_process_group("gloo", rank=rank, world_size=WORLD_SIZE)
+    try:
+        ctx = DistributedContext(rank, WORLD_SIZE)
+        x, y = make_data()
+        x, y = x[rank * 3:(rank + 1) * 3], y[rank * 3:(rank + 1) * 3]
+
+        model = make_model()
+        ddp_model = DistributedDataParallel(model)
+        loss = GlobalBatchLoss(PairLoss())(ddp_model(x), y)
+        loss.backward()
+
+        torch.save({
+            "loss": loss.detach(),
+            "grad": model.weight.grad,
+            "labels": gather_labels(y),
+            "run_dir": ctx.broadcast(f"run_from_rank_{rank}"),
+        }, os.path.join(out_dir, f"rank{rank}.pt"))
+    finally:
+        dist.destroy_process_group()
+
+
+def run_momentum_rank(rank: int, port: int, out_dir: str) -> None:
+    os.environ["MASTER_ADDR"] = "127.0.0.1"
+    os.environ["MASTER_PORT"] = str(port)
+    dist.init_process_group("gloo", rank=rank, world_size=WORLD_SIZE)
+    try:
+        # Unseeded models differ between ranks
+        torch.manual_seed(rank)
+        encoder = MomentumEncoder(nn.Linear(6, 4), momentum=0.999)
+        torch.save(encoder.state_dict(), os.path.join(out_dir, f"rank{rank}.pt"))
+        # Rank 0 hosts the store; leaving before rank 1 is done can hang the teardown
+        dist.barrier()
+    finally:
+        dist.destroy_process_group()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_global_batch_loss_matches_single_process_gradient(tmp_path):
+    mp.start_processes(
+        run_rank, args=(free_port(), str(tmp_path)), nprocs=WORLD_SIZE, join=True, start_method="fork"
+    )
+
+    x, y = make_data()
+    model = make_model()
+    expected_loss = PairLoss()(model(x), y)
+    expected_loss.backward()
+
+    for rank in range(WORLD_SIZE):
+        result = torch.load(tmp_path / f"rank{rank}.pt")
+        assert torch.allclose(result["loss"], expected_loss.detach())
+        assert torch.allclose(result["grad"], model.weight.grad, atol=1e-6)
+        assert result["labels"].tolist() == y.tolist()
+        assert result["run_dir"] == "run_from_rank_0"
+
+
+def test_momentum_encoder_starts_from_rank_0_weights(tmp_path):
+    mp.start_processes(
+        run_momentum_rank, args=(free_port(), str(tmp_path)), nprocs=WORLD_SIZE, join=True, start_method="spawn"
+    )
+
+    states = [torch.load(tmp_path / f"rank{rank}.pt") for rank in range(WORLD_SIZE)]
+    torch.manual_seed(0)
+    expected = nn.Linear(6, 4).state_dict()
+    for state in states:
+        assert all(torch.equal(state[f"encoder.{name}"], value) for name, value in expected.items())
+
+
+def test_single_process_context_is_a_no_op():
+    ctx = DistributedContext()
+    assert ctx.is_main and not ctx.enabled
+    assert ctx.broadcast("value") == "value"
+    ctx.barrier()
+
+    x, y = make_data()
+    assert torch.equal(GlobalBatchLoss(PairLoss())(x, y), PairLoss()(x, y))
@@ -0,0 +1,64 @@
+import torch
+
+from data_utils.collate import pad_collate
+from data_utils.dataset import PhonemeDataset
+from data_utils.eval_set import EvalSet, eval_indices
+from data_utils.parser import parse_dataset
+from experiment.exp_params import ExpParams
+from transforms.build_transforms import build_eval_transforms
+
+
+def eval_params(data_path, **overrides) -> ExpParams:
+    return ExpParams(**{
+        "data_path": data_path, "device": "cpu", "pad_strategy": "center",
+        "use_mfcc": True, "use_time_mask": True, "use_noise": True, **overrides,
+    })
+
+
+def test_materialized_eval_set_is_deterministic(wav_corpus):
+    params = eval_params(wav_corpus)
+    file_paths, labels, _, lengths = parse_dataset(wav_corpus)
+    transform, batch_transform = build_eval_transforms(params)
+    assert batch_transform is None
+    dataset = PhonemeDataset(file_paths, labels, params=params, transform=transform, lengths=lengths)
+
+    indices = eval_indices([4, 1, 7], len(file_paths))
+    assert indices.tolist() == [1, 4]
+
+    first = EvalSet.materialize(dataset, indices, torch.device("cpu"), batch_size=1)
+    second = EvalSet.materialize(dataset, indices, torch.device("cpu"), batch_size=2)
+    assert first.x.shape[0] == 2 and first.x.is_contiguous()
+    assert first.labels.tolist() == [labels[1], labels[4]]
+    assert first.mask is None
+    assert torch.equal(first.x, second.x)
+
+
+def test_materialized_eval_set_with_dynamic_padding(wav_corpus):
+    params = eval_params(wav_corpus, batched_features=True, dynamic_padding=True)
+    file_paths, labels, _, lengths = parse_dataset(wav_corpus)
+    transform, batch_transform = build_eval_transforms(params)
+    dataset = PhonemeDataset(file_paths, labels, params=params, transform=transform, lengths=lengths)
+
+    eval_set = EvalSet.materialize(
+        dataset, range(len(file_paths)), torch.device("cpu"),
+        batch_transform=batch_transform, batch_size=4, collate_fn=pad_collate,
+    )
+    assert eval_set.x.shape[:2] == (len(file_paths), 1)
+    assert eval_set.mask.shape == (len(file_paths), eval_set.x.shape[-1])
+    # The longest clip covers every frame; shorter ones are zero past their mask
+    assert eval_set.mask[lengths.index(max(lengths))].all()
+    assert (eval_set.x * ~eval_set.mask[:, None, None]).abs().sum() == 0
+
+    batches = list(eval_set.batches(4))
+    assert [len(b[0]) for b in batches] == [4, 2] and len(batches[0]) == 3
+
+
+def test_center_padding_is_symmetric(wav_corpus):
+    params = eval_params(wav_corpus, use_mfcc=False, max_length=12000)
+    file_paths, labels, _, lengths = parse_dataset(wav_corpus)
+    dataset = PhonemeDataset(file_paths, labels, params=params, lengths=lengths)
+
+    waveform, _ = dataset[0]
+    pad = 12000 - lengths[0]
+    assert torch.equal(waveform[:pad // 2], torch.zeros(pad // 2))
+    assert waveform[pad // 2 + 10].abs() > 0
@@ -0,0 +1,48 @@
+import torch
+from data_utils.parser import parse_dataset
+from data_utils.dataset import PhonemeDataset
+from data_utils.feature_store import FeatureStore, module_signature, precompute_features
+from experiment.exp_params import ExpParams
+from transforms.build_transforms import build_feature_transform
+from transforms.mfcc import MFCC
+
+
+def make_store(data_dir, root, dtype):
+    params = ExpParams(data_path=data_dir, pad_strategy="left", use_time_mask=False,
+                       use_freq_mask=False, use_noise=False)
+    file_paths, labels, _, lengths = parse_dataset(data_dir)
+    feature_transform = build_feature_transform(params)
+    reference = PhonemeDataset(file_paths, labels, params=params, transform=feature_transform, lengths=lengths)
+
+    store = FeatureStore(root, {"extractor": module_signature(feature_transform)}, dtype=dtype)
+    store.bind(file_paths)
+    computed = precompute_features(store, reference, feature_transform)
+    return store, reference, computed
+
+
+def test_feature_store_matches_pipeline(wav_corpus, tmp_path):
+    store, reference, computed = make_store(wav_corpus, tmp_path / "features", "float32")
+    assert computed == len(reference)
+
+    for idx in range(len(reference)):
+        expected, _ = reference[idx]
+        assert torch.allclose(store.features_for(idx), expected, atol=1e-4)
+
+    params = reference.params.model_copy(update={"pad_strategy": "random"})
+    stored = PhonemeDataset(reference.file_paths, reference.labels, params=params,
+                            lengths=reference.lengths, feature_store=store)
+    features, label = stored[0]
+    assert features.shape == expected.shape and label == reference.labels[0]
+
+
+def test_feature_store_is_reused_and_keyed_by_params(wav_corpus, tmp_path):
+    root = tmp_path / "features"
+    store, reference, _ = make_store(wav_corpus, root, "float16")
+
+    again, _, computed = make_store(wav_corpus, root, "float16")
+    assert computed == 0 and again.dir == store.dir
+    expected, _ = reference[0]
+    assert torch.allclose(again.features_for(0), expected, rtol=1e-3, atol=1e-2)
+
+    assert module_signature(MFCC(n_mfcc=40)) != module_signature(MFCC(n_mfcc=20))
+    assert module_signature(MFCC(sample_rate=16000)) != module_signature(MFCC(sample_rate=8000))
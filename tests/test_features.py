@@ -0,0 +1,39 @@
+import pytest
+import torch
+from data_utils.features import (
+    build_feature_extractor, CombinedExtractor, MFCCExtractor, MelSpectrogramExtractor,
+    SpectrogramFeatureGraph,
+)
+
+
+@pytest.mark.parametrize("mfcc_params, mel_params", [
+    ({}, {}),
+    ({"n_mels": 64}, {"n_mels": 80, "f_max": 6000}),
+])
+def test_feature_graph_matches_combined_extractor(mfcc_params, mel_params):
+    reference = CombinedExtractor({
+        "mfcc": MFCCExtractor(**mfcc_params),
+        "mel": MelSpectrogramExtractor(**mel_params),
+    })
+    graph = build_feature_extractor({
+        "type": "combined", "use_mel": True, "mfcc_params": mfcc_params, "mel_params": mel_params,
+    })
+    assert isinstance(graph, SpectrogramFeatureGraph)
+
+    waveform = torch.randn(16000)
+    assert torch.allclose(graph(waveform), reference(waveform), atol=1e-4)
+
+    batch = torch.randn(3, 1, 16000)
+    batch[1] *= 0.01
+    expected = torch.stack([reference(w) for w in batch])
+    assert torch.allclose(graph(batch), expected, atol=1e-4)
+
+
+def test_feature_graph_falls_back_on_different_stft():
+    extractor = build_feature_extractor({
+        "type": "combined", "use_mel": True, "mel_params": {"hop_length": 80},
+    })
+    assert isinstance(extractor, CombinedExtractor)
+
+    with pytest.raises(ValueError):
+        SpectrogramFeatureGraph(mfcc_params={}, mel_params={"n_fft": 512})
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+import torch
+from torch.utils.data import Dataset
+
+from data_utils.loader_service import LoaderService
+from utils.samplers import BucketBatchSampler
+
+
+class PidDataset(Dataset):
+    """Items are (index + offset, pid of the loading process)."""
+
+    def __init__(self, n: int, offset: int = 0) -> None:
+        self.n = n
+        self.offset = offset
+
+    def __getitem__(self, index):
+        return torch.tensor(index + self.offset), os.getpid()
+
+    def __len__(self):
+        return self.n
+
+
+def loaded(view):
+    values, pids = [], set()
+    for x, pid in view:
+        values.extend(x.tolist())
+        pids.update(pid.tolist())
+    return values, pids
+
+
+def test_views_route_indices_to_their_dataset():
+    service = LoaderService({"train": PidDataset(10), "eval": PidDataset(10, offset=100)})
+    values, _ = loaded(service.view("train", [3, 1, 4], batch_size=2))
+    assert values == [3, 1, 4]
+    values, _ = loaded(service.view("eval", [9, 2], batch_size=1))
+    assert values == [109, 102]
+
+    sampler = BucketBatchSampler([5, 1, 3], batch_size=3, shuffle=False)
+    view = service.view("train", [7, 8, 9], batch_sampler=sampler)
+    assert len(view) == 1
+    assert sorted(loaded(view)[0]) == [7, 8, 9]
+
+    with pytest.raises(KeyError):
+        service.view("test", [0], batch_size=1)
+
+
+def test_workers_are_reused_across_views():
+    service = LoaderService({"train": PidDataset(32), "eval": PidDataset(8, offset=100)}, num_workers=2)
+    try:
+        _, first = loaded(service.view("train", range(0, 16), batch_size=4))
+        _, second = loaded(service.view("eval", range(8), batch_size=4))
+        values, third = loaded(service.view("train", range(16, 32), batch_size=4))
+    finally:
+        service.close()
+
+    assert os.getpid() not in first
+    assert len(first) == 2
+    assert second <= first and third <= first
+    assert values == list(range(16, 32))
+
+    # close() stopped the pool
+    for pid in first:
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
+
+
+def test_non_persistent_workers_restart_for_every_view():
+    service = LoaderService({"train": PidDataset(16)}, num_workers=1, persistent_workers=False)
+    try:
+        _, first = loaded(service.view("train", range(8), batch_size=4))
+        _, second = loaded(service.view("train", range(8, 16), batch_size=4))
+    finally:
+        service.close()
+    assert first.isdisjoint(second)
+
+
+def test_switching_views_mid_iteration_fails_loudly():
+    service = LoaderService({"train": PidDataset(8)})
+    first = iter(service.view("train", range(8), batch_size=2))
+    next(first)
+    loaded(service.view("train", range(4), batch_size=2))
+    with pytest.raises(RuntimeError):
+        next(first)
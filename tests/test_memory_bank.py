@@ -0,0 +1,82 @@
+import math
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from models.memory_bank import FeatureQueue, MomentumEncoder, QueueContrastiveLoss
+
+
+def test_feature_queue_overwrites_oldest_entries():
+    queue = FeatureQueue(size=4, dim=2)
+    assert len(queue) == 0
+
+    queue.enqueue(torch.ones(3, 2), torch.tensor([0, 1, 2]))
+    queue.enqueue(2 * torch.ones(3, 2), torch.tensor([3, 4, 5]))
+    embeddings, labels = queue.contents()
+    assert len(queue) == 4
+    # Slots 0 and 1 were overwritten by the second batch
+    assert labels.tolist() == [4, 5, 2, 3]
+    assert embeddings[:, 0].tolist() == [2.0, 2.0, 1.0, 2.0]
+
+    queue.enqueue(torch.zeros(6, 2), torch.arange(10, 16))
+    assert sorted(queue.contents()[1].tolist()) == [12, 13, 14, 15]
+
+
+def test_queue_loss_matches_supcon_on_an_empty_queue():
+    torch.manual_seed(0)
+    embeddings = torch.randn(6, 8)
+    labels = torch.tensor([0, 0, 1, 1, 2, 2])
+    loss = QueueContrastiveLoss(temperature=0.1, queue_size=16, embedding_dim=8)(embeddings, labels)
+
+    z = F.normalize(embeddings, dim=1)
+    expected = 0.0
+    for i in range(6):
+        others = [j for j in range(6) if j != i]
+        denominator = sum(math.exp(float(z[i] @ z[j]) / 0.1) for j in others)
+        positive = next(j for j in others if labels[j] == labels[i])
+        expected -= math.log(math.exp(float(z[i] @ z[positive]) / 0.1) / denominator)
+    assert math.isclose(loss.item(), expected / 6, rel_tol=1e-5)
+
+
+def test_queue_supplies_positives_and_negatives():
+    torch.manual_seed(0)
+    criterion = QueueContrastiveLoss(temperature=0.1, queue_size=8, embedding_dim=4)
+
+    # One clip per class: no positives inside the batch
+    first = torch.randn(2, 4, requires_grad=True)
+    loss = criterion(first, torch.tensor([0, 1]))
+    loss.backward()
+    assert loss.item() == 0.0 and len(criterion.queue) == 2
+
+    second = torch.randn(2, 4, requires_grad=True)
+    loss = criterion(second, torch.tensor([1, 0]))
+    loss.backward()
+    assert loss.item() > 0 and second.grad.abs().sum() > 0
+    assert len(criterion.queue) == 4
+
+    # With NT-Xent, queued entries are negatives only
+    ntxent = QueueContrastiveLoss(temperature=0.1, queue_size=8, embedding_dim=4, loss_type="ntxent")
+    ntxent(torch.randn(2, 4), torch.tensor([0, 1]))
+    assert ntxent(torch.randn(2, 4), torch.tensor([1, 0])).item() == 0.0
+
+
+def test_momentum_keys_and_encoder_update():
+    torch.manual_seed(0)
+    model = nn.Linear(4, 3)
+    momentum_encoder = MomentumEncoder(model, momentum=0.9)
+    assert not any(p.requires_grad for p in momentum_encoder.parameters())
+
+    x = torch.randn(4, 4)
+    labels = torch.tensor([0, 1, 2, 3])
+    criterion = QueueContrastiveLoss(temperature=0.1, queue_size=8, embedding_dim=3)
+    # Each anchor's own key is its positive
+    loss = criterion(model(x), labels, keys=momentum_encoder(x))
+    assert loss.item() > 0
+    loss.backward()
+
+    before = momentum_encoder.encoder.weight.clone()
+    with torch.no_grad():
+        model.weight.add_(1.0)
+    momentum_encoder.update(model)
+    assert torch.allclose(momentum_encoder.encoder.weight, 0.9 * before + 0.1 * model.weight)
@@ -0,0 +1,88 @@
+import csv
+import json
+import logging
+import time
+from pathlib import Path
+
+import torch
+
+from utils.metrics import MetricsWriter, StepMetrics, memory_usage_mb, read_metrics, summarize_folds
+from utils.system_resources import fold_resource_shares
+
+
+def write_accuracy(run_dir: Path, fold_id: int, rows: list[tuple[int, float]]) -> None:
+    metrics_dir = run_dir / f"fold_{fold_id}" / "metrics"
+    metrics_dir.mkdir(parents=True)
+    with (metrics_dir / "accuracy.csv").open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["epoch", "accuracy"])
+        writer.writerows(rows)
+
+
+def test_summarize_folds(tmp_path):
+    write_accuracy(tmp_path, 0, [(1, 0.5), (2, 0.7), (3, 0.6)])
+    write_accuracy(tmp_path, 1, [(1, 0.9)])
+
+    summary = summarize_folds(tmp_path, [0, 1, 2])
+
+    assert [fold["fold"] for fold in summary["folds"]] == [0, 1]
+    assert summary["folds"][0] == {"fold": 0, "best_epoch": 2, "best_accuracy": 0.7, "last_accuracy": 0.6}
+    assert abs(summary["mean_best_accuracy"] - 0.8) < 1e-9
+    assert json.loads((tmp_path / "metrics" / "kfold_summary.json").read_text()) == summary
+    assert (tmp_path / "metrics" / "kfold_summary.csv").read_text().count("\n") == 3
+
+
+def test_fold_resource_shares_split_cores():
+    assert fold_resource_shares(5, num_cores=40) == (4, 4)
+    assert fold_resource_shares(4, num_cores=6) == (1, 0)
+    assert fold_resource_shares(1, num_cores=8) == (4, 4)
+
+
+def test_step_metrics_flush_in_bulk(caplog):
+    logger = logging.getLogger("test_step_metrics")
+    metrics = StepMetrics(flush_every=2, debug=True, logger=logger)
+    with caplog.at_level(logging.DEBUG, logger="test_step_metrics"):
+        for loss in [1.0, 2.0, 3.0, 4.0, 5.0]:
+            metrics.update(torch.tensor(loss), embeddings=torch.full((4, 8), loss))
+
+        # The last step is still on the device
+        assert metrics.steps == 4
+        assert len(caplog.records) == 4
+        assert metrics.mean_loss() == 3.0
+        assert metrics.steps == 5
+
+    assert "Step 5 | embeddings mean: 5.0000" in caplog.records[-1].getMessage()
+
+
+def test_step_metrics_skip_statistics_without_debug():
+    metrics = StepMetrics(flush_every=10, debug=False)
+    metrics.update(torch.tensor(2.0), embeddings=torch.randn(4, 8))
+    assert metrics._rows[0].numel() == 1
+    assert metrics.mean_loss() == 2.0
+
+
+def test_metrics_writer_buffers_and_flushes_in_background(tmp_path):
+    path = tmp_path / "metrics" / "metrics.jsonl"
+    writer = MetricsWriter(path, flush_interval=0.05)
+    metrics = StepMetrics(flush_every=2, writer=writer)
+
+    for loss in [1.0, 2.0, 3.0]:
+        metrics.update(torch.tensor(loss), epoch=1, samples=4, data_wait_s=0.01)
+    writer.log("epoch", epoch=1, loss=metrics.mean_loss())
+
+    deadline = time.time() + 5
+    while len(read_metrics(path)) < 4 and time.time() < deadline:
+        time.sleep(0.05)
+    writer.close()
+
+    steps = read_metrics(path, kind="step")
+    assert [r["step"] for r in steps] == [1, 2, 3]
+    assert [r["loss"] for r in steps] == [1.0, 2.0, 3.0]
+    assert steps[0]["samples"] == 4 and steps[0]["epoch"] == 1
+    assert read_metrics(path, kind="epoch")[0]["loss"] == 2.0
+
+
+def test_cpu_memory_usage_names_process_and_worker_peaks():
+    usage = memory_usage_mb(torch.device("cpu"))
+    assert set(usage) == {"max_rss_mb", "workers_max_rss_mb"}
+    assert usage["max_rss_mb"] > 0 and usage["workers_max_rss_mb"] >= 0
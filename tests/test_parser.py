@@ -24,3 +24,32 @@ def test_parse_dataset_real_data():
     for label in expected_labels:
         assert label in label_map, f"Missing label: {label}"
     assert all(isinstance(i, int) and i > 0 for i in lengths), "All lengths should be positive integers"
+
+def test_parse_dataset_manifest_is_incremental(wav_corpus, tmp_path, monkeypatch):
+    import torchaudio
+    from data_utils.manifest import load_manifest
+
+    manifest_path = tmp_path / "cache" / "manifest.jsonl"
+    first = parse_dataset(wav_corpus, manifest_path=manifest_path)
+    records = load_manifest(manifest_path)
+    assert len(records) == 6
+    assert all(r.sample_rate == 16000 and r.num_channels == 1 for r in records.values())
+
+    probed = []
+    real_info = torchaudio.info
+    monkeypatch.setattr(torchaudio, "info", lambda path: probed.append(path) or real_info(path))
+
+    second = parse_dataset(wav_corpus, manifest_path=manifest_path)
+    assert probed == [], "Unchanged files should not be re-probed"
+    assert second == first
+
+    (wav_corpus / "pa1.wav").write_bytes((wav_corpus / "ka1.wav").read_bytes())
+    (wav_corpus / "bad.wav").write_bytes(b"not a wav file")
+    (wav_corpus / "12.wav").write_bytes(b"")
+    parse_dataset(wav_corpus, manifest_path=manifest_path)
+    assert sorted(Path(p).name for p in probed) == ["bad.wav", "pa1.wav"]
+
+    records = load_manifest(manifest_path)
+    assert records["pa1.wav"].num_frames == 10400
+    assert records["bad.wav"].skip_reason
+    assert records["12.wav"].skip_reason.startswith("Cannot extract label")
@@ -0,0 +1,66 @@
+import math
+
+import pytest
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
+
+from utils.probes import PROBES, knn_probe, probe_accuracy, stratified_split
+from utils.evaluate_latent_classification import evaluate_latent_classification
+
+
+def clustered_embeddings(n_classes=8, per_class=12, dim=16, noise=0.3, seed=0):
+    g = torch.Generator().manual_seed(seed)
+    centers = torch.randn(n_classes, dim, generator=g) * 3
+    labels = torch.arange(n_classes).repeat_interleave(per_class) * 7  # non-contiguous labels
+    x = centers[labels // 7] + noise * torch.randn(len(labels), dim, generator=g)
+    return x, labels
+
+
+def test_stratified_split_is_disjoint_and_keeps_every_class_in_train():
+    labels = torch.tensor([0] * 10 + [1] * 5 + [2])
+    train_idx, test_idx = stratified_split(labels, test_size=0.2, seed=0)
+
+    assert set(train_idx.tolist()).isdisjoint(test_idx.tolist())
+    assert len(train_idx) + len(test_idx) == len(labels)
+    assert labels[test_idx].tolist().count(0) == 2
+    assert set(labels[train_idx].tolist()) == {0, 1, 2}
+
+
+@pytest.mark.parametrize("probe", sorted(PROBES))
+def test_probes_separate_clusters(probe):
+    x, labels = clustered_embeddings()
+    assert probe_accuracy(x, labels, probe=probe) > 0.9
+
+
+def test_probe_accuracy_reports_held_out_size_and_nan_without_one():
+    x, labels = clustered_embeddings(per_class=10)
+    acc, n_test = probe_accuracy(x, labels, probe="centroid", test_size=0.2, return_n_test=True)
+    assert acc > 0.9 and n_test == 8 * 2
+
+    # One sample per class leaves nothing to hold out
+    with pytest.warns(UserWarning):
+        acc, n_test = probe_accuracy(x[::10], labels[::10], return_n_test=True)
+    assert math.isnan(acc) and n_test == 0
+
+
+def test_knn_blocking_matches_single_block():
+    x, labels = clustered_embeddings(noise=2.0)
+    train_x, test_x = x[::2], x[1::2]
+    train_y = torch.unique(labels, return_inverse=True)[1][::2]
+
+    assert torch.equal(
+        knn_probe(train_x, train_y, test_x, k=3, block_size=5),
+        knn_probe(train_x, train_y, test_x, k=3, block_size=4096),
+    )
+
+
+def test_evaluate_latent_classification_scores_held_out_embeddings():
+    x, labels = clustered_embeddings()
+    loader = DataLoader(TensorDataset(x, labels), batch_size=10)
+
+    acc = evaluate_latent_classification(nn.Identity(), loader, torch.device("cpu"), probe="centroid")
+    assert acc > 0.9
+
+    with pytest.raises(ValueError):
+        evaluate_latent_classification(nn.Identity(), loader, torch.device("cpu"), probe="svm")
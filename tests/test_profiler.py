@@ -0,0 +1,78 @@
+import json
+
+import torch
+from torch.utils.data import DataLoader, TensorDataset, default_collate
+
+from data_utils.dataset import PhonemeDataset
+from data_utils.loader_service import LoaderService
+from data_utils.parser import parse_dataset
+from experiment.exp_params import ExpParams
+from utils import profiler
+from utils.profiler import Profiled, WorkerInit, aggregate_profiles, trace_window
+
+
+def test_stage_timings_are_gathered_from_workers(wav_corpus, tmp_path):
+    params = ExpParams(data_path=wav_corpus, use_mfcc=False, use_time_mask=False,
+                       use_freq_mask=False, use_noise=False, device="cpu")
+    file_paths, labels, _, lengths = parse_dataset(wav_corpus)
+    dataset = PhonemeDataset(file_paths, labels, params=params, lengths=lengths)
+
+    profile_dir = tmp_path / "profile"
+    profiler.enable(profile_dir)
+    try:
+        loader = DataLoader(
+            dataset, batch_size=2, num_workers=2,
+            collate_fn=Profiled(default_collate, "collate"), worker_init_fn=WorkerInit(profile_dir),
+        )
+        for _ in loader:
+            with profiler.stage("forward_backward"):
+                pass
+        del loader
+        profiler.get().dump()
+    finally:
+        profiler.disable()
+
+    summary = aggregate_profiles(profile_dir, tmp_path / "profile.json")
+    stages = summary["stages"]
+
+    assert len(summary["processes"]) == 3
+    assert stages["decode"]["count"] == len(file_paths)
+    assert stages["decode"]["where"] == "workers"
+    assert stages["pad"]["count"] == len(file_paths)
+    assert stages["collate"]["count"] == 3
+    assert stages["forward_backward"] == {**stages["forward_backward"], "where": "main", "count": 3}
+    assert json.loads((tmp_path / "profile.json").read_text()) == summary
+
+
+def test_closing_a_loader_service_writes_worker_timings(tmp_path):
+    dataset = TensorDataset(torch.randn(8, 4), torch.arange(8))
+    profile_dir = tmp_path / "profile"
+    service = LoaderService(
+        {"train": dataset}, num_workers=2,
+        collate_fn=Profiled(default_collate, "collate"), worker_init_fn=WorkerInit(profile_dir),
+    )
+    for _ in service.view("train", range(8), batch_size=2):
+        pass
+    service.close()
+
+    summary = aggregate_profiles(profile_dir, tmp_path / "profile.json")
+    assert len(summary["processes"]) == 2
+    assert summary["stages"]["collate"]["count"] == 4
+
+
+def test_stage_is_a_no_op_when_disabled():
+    assert profiler.get() is None
+    with profiler.stage("decode"):
+        pass
+    profiler.record("data_wait", 1.0)
+    assert profiler.get() is None
+
+
+def test_trace_window_writes_chrome_trace(tmp_path):
+    trace = trace_window(tmp_path / "trace.json", start=1, steps=2)
+    trace.start()
+    for _ in range(5):
+        torch.randn(64, 64) @ torch.randn(64, 64)
+        trace.step()
+    trace.stop()
+    assert (tmp_path / "trace.json").stat().st_size > 0
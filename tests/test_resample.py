@@ -0,0 +1,28 @@
+import torch
+import torchaudio
+from data_utils.resample import get_resampler, resample, resample_batch, resampled_length
+
+
+def test_resampler_kernel_is_cached():
+    assert get_resampler(44100, 16000) is get_resampler(44100, 16000)
+    assert get_resampler(22050, 16000) is not get_resampler(44100, 16000)
+
+    waveform = torch.randn(1, 4410)
+    expected = torchaudio.transforms.Resample(44100, 16000)(waveform)
+    assert torch.allclose(resample(waveform, 44100, 16000), expected)
+    assert resample(waveform, 16000, 16000) is waveform
+
+
+def test_resample_batch_matches_per_clip():
+    rates = [44100, 22050, 16000, 44100, 22050, 44100]
+    waveforms = [torch.randn(n) for n in (4410, 3000, 1600, 9001, 2205, 123)]
+    waveforms[3] = torch.randn(2, 9001)
+
+    # A small batch limit forces each rate group to be split into several chunks
+    out = resample_batch(waveforms, rates, 16000, max_batch_samples=12000)
+
+    for waveform, sr, result in zip(waveforms, rates, out):
+        expected = torchaudio.functional.resample(waveform, sr, 16000)
+        assert result.shape == expected.shape
+        assert result.shape[-1] == resampled_length(waveform.shape[-1], sr, 16000)
+        assert torch.allclose(result, expected, atol=1e-4)
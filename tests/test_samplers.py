@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+import torch
+
+from data_utils.collate import pad_collate, resize_mask, apply_mask
+from utils.samplers import BucketBatchSampler, ContrastiveBatchSampler
+
+
+def test_bucket_batch_sampler_covers_every_index_once():
+    lengths = np.random.RandomState(0).randint(1000, 50000, size=103)
+    sampler = BucketBatchSampler(lengths, batch_size=8, pool_factor=4)
+    batches = list(sampler)
+
+    assert len(batches) == len(sampler)
+    assert sorted(i for batch in batches for i in batch) == list(range(103))
+
+
+def test_bucket_batch_sampler_reduces_padding():
+    lengths = np.random.RandomState(0).randint(1000, 50000, size=512)
+    rng = np.random.RandomState(1)
+    random_batches = np.array_split(rng.permutation(512), 64)
+    bucketed = list(BucketBatchSampler(lengths, batch_size=8, pool_factor=8))
+
+    def padded(batches):
+        return sum(len(b) * lengths[b].max() for b in map(np.asarray, batches))
+
+    assert padded(bucketed) < 0.8 * padded(random_batches)
+
+
+def test_contrastive_sampler_with_lengths_groups_similar_classes():
+    # Four short classes and four long ones
+    labels = np.repeat(np.arange(8), 4)
+    lengths = np.where(labels < 4, 1000, 20000) + np.arange(len(labels))
+    sampler = ContrastiveBatchSampler(
+        labels, classes_per_batch=2, samples_per_class=2, views_per_sample=1,
+        lengths=lengths, bucket_window=1,
+    )
+
+    for _ in range(3):
+        batches = list(sampler)
+        assert len(batches) == 4
+        for batch in batches:
+            batch_labels = set(labels[batch].tolist())
+            assert len(batch_labels) == 2
+            assert len({label < 4 for label in batch_labels}) == 1
+
+
+def test_contrastive_sampler_plan_is_reproducible_and_covers_all_classes():
+    labels = np.random.RandomState(0).randint(0, 23, size=400)
+    sampler = ContrastiveBatchSampler(labels, classes_per_batch=5, samples_per_class=3, views_per_sample=2)
+    plan = sampler.plan_epoch(0)
+
+    assert plan.shape == (5, 15) == (len(sampler), 15)
+    assert np.array_equal(plan, ContrastiveBatchSampler(
+        labels, classes_per_batch=5, samples_per_class=3, views_per_sample=2
+    ).plan_epoch(0))
+    assert not np.array_equal(plan, sampler.plan_epoch(1))
+
+    # 23 classes in batches of 5: the last batch is topped up instead of dropped
+    assert set(labels[plan].ravel().tolist()) == set(range(23))
+    for batch in plan:
+        per_class = batch.reshape(5, 3)
+        assert len(set(labels[per_class[:, 0]].tolist())) == 5
+        assert all(len(set(row.tolist())) == 3 for row in per_class)
+        assert all(len(set(labels[row].tolist())) == 1 for row in per_class)
+
+    # Passes advance the epoch unless it is set explicitly
+    assert np.array_equal(np.array(list(sampler)), plan)
+    assert np.array_equal(np.array(list(sampler)), sampler.plan_epoch(1))
+
+
+def test_contrastive_sampler_shards_and_resumes():
+    labels = np.repeat(np.arange(30), 4)
+    kwargs = dict(classes_per_batch=4, samples_per_class=2, views_per_sample=1)
+    plan = ContrastiveBatchSampler(labels, **kwargs).plan_epoch(3)
+
+    shards = []
+    for rank in range(3):
+        sampler = ContrastiveBatchSampler(labels, rank=rank, world_size=3, **kwargs)
+        sampler.set_epoch(3)
+        assert len(sampler) == 3
+        shards.append(list(sampler))
+    # 8 batches over 3 ranks: every batch is used, one is repeated to even out the shards
+    flat = [tuple(batch) for shard in shards for batch in shard]
+    assert len(flat) == 9
+    assert set(flat) == set(map(tuple, plan.tolist()))
+
+    sampler = ContrastiveBatchSampler(labels, rank=1, world_size=3, **kwargs)
+    sampler.set_epoch(3, start_batch=2)
+    assert len(sampler) == 1
+    assert list(sampler) == shards[1][2:]
+    assert len(sampler) == 3 and sampler.epoch == 4
+
+    # Resuming at or past the end of the rank's share (e.g. from an end-of-epoch checkpoint)
+    for start_batch in (3, 5):
+        sampler.set_epoch(3, start_batch=start_batch)
+        assert len(sampler) == len(list(sampler)) == 0
+    with pytest.raises(ValueError):
+        sampler.set_epoch(3, start_batch=-1)
+
+
+def test_pad_collate_pads_to_longest_and_masks():
+    batch = [(torch.ones(5), 0), (torch.ones(3), 1)]
+    x, y, mask = pad_collate(batch)
+
+    assert x.shape == (2, 5)
+    assert y.tolist() == [0, 1]
+    assert mask.tolist() == [[True] * 5, [True] * 3 + [False] * 2]
+    assert torch.equal(x[1, 3:], torch.zeros(2))
+
+
+def test_resize_and_apply_mask_on_frames():
+    mask = torch.arange(100) < torch.tensor([[100], [50]])
+    frame_mask = resize_mask(mask, 10)
+    assert frame_mask.sum(dim=-1).tolist() == [10, 5]
+
+    features = torch.ones(2, 1, 4, 10)
+    masked = apply_mask(features, frame_mask)
+    assert masked[0].sum() == 40
+    assert masked[1, ..., 5:].abs().sum() == 0
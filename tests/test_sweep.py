@@ -0,0 +1,61 @@
+import csv
+import time
+from pathlib import Path
+
+import pytest
+
+from experiment.exp_params import ExpParams
+from experiment.sweep import Choice, SuccessiveHalving, Uniform, run_sweep, sample_configs
+
+
+def fake_trial(params: ExpParams, trial_dir: Path, num_threads: int) -> None:
+    """Write an accuracy curve that scales with the learning rate, one epoch at a time."""
+    metrics_dir = trial_dir / "metrics"
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    with (metrics_dir / "accuracy.csv").open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["epoch", "accuracy"])
+        for epoch in range(1, params.epochs + 1):
+            writer.writerow([epoch, params.learning_rate * epoch / params.epochs])
+            f.flush()
+            time.sleep(0.1)
+
+
+def test_sample_configs_is_seeded_and_in_range():
+    space = {"temperature": Uniform(0.01, 1.0, log=True), "embedding_dim": Choice([64, 128])}
+    configs = sample_configs(space, n_trials=20, seed=3)
+
+    assert configs == sample_configs(space, n_trials=20, seed=3)
+    assert all(0.01 <= c["temperature"] <= 1.0 for c in configs)
+    assert {c["embedding_dim"] for c in configs} <= {64, 128}
+
+    with pytest.raises(ValueError):
+        sample_configs({"not_a_field": Choice([1])}, n_trials=1)
+
+
+def test_successive_halving_keeps_top_fraction():
+    pruner = SuccessiveHalving(min_epochs=1, max_epochs=9, reduction_factor=3)
+    assert pruner.rungs == [1, 3]
+
+    assert pruner.report(0, 1, 0.5)
+    assert pruner.report(1, 1, 0.6)
+    assert not pruner.report(2, 1, 0.4)
+    # Reports between rungs do not count
+    assert pruner.report(1, 2, 0.1)
+
+
+def test_run_sweep_prunes_bad_trials(tmp_path):
+    params = ExpParams(epochs=9, eval_classifier_every=1, run_base_dir=tmp_path)
+    space = {"learning_rate": Uniform(1e-4, 1e-2, log=True)}
+
+    trials = run_sweep(
+        params, space, n_trials=6, max_concurrent=3, min_epochs=1, reduction_factor=3,
+        sweep_dir=tmp_path / "sweep", poll_interval=0.05, trial_fn=fake_trial,
+    )
+
+    statuses = [trial.status for trial in trials]
+    assert set(statuses) <= {"completed", "pruned"}
+    assert "pruned" in statuses
+    best = max(trials, key=lambda t: t.overrides["learning_rate"])
+    assert best.status == "completed" and best.epochs_run == 9
+    assert (tmp_path / "sweep" / "trials.csv").read_text().count("\n") == 7
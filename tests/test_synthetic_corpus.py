@@ -0,0 +1,20 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from synthetic import CorpusScale, class_labels, generate_corpus
+from data_utils.parser import parse_dataset
+
+
+def test_synthetic_corpus_follows_label_convention(tmp_path):
+    scale = CorpusScale(n_classes=5, files_per_class=3, sample_rates=(16000, 22050))
+    paths = generate_corpus(tmp_path, scale, seed=1)
+
+    file_paths, labels, label_map, lengths = parse_dataset(tmp_path)
+
+    assert len(file_paths) == len(paths) == 15
+    assert sorted(label_map) == sorted(class_labels(5))
+    assert all(length > 0 for length in lengths)
+    # Regenerating keeps the existing files
+    assert generate_corpus(tmp_path, scale, seed=1) == paths
@@ -1,3 +1,4 @@
+import pytest
 import torch
 from experiment.exp_params import ExpParams
 from transforms.build_transforms import build_transforms
@@ -36,3 +37,53 @@ def test_build_transforms_with_augmentation():
     out = transform(waveform)
 
     assert out.shape[-1] > 0, "Augmented output should have non-zero length"
+
+@pytest.mark.parametrize("feature", ["use_mfcc", "use_log_mel", "use_wavelet"])
+def test_split_transforms_match_per_sample_pipeline(feature):
+    flags = {name: name == feature for name in ("use_mfcc", "use_log_mel", "use_wavelet")}
+    params = ExpParams(**flags, use_time_mask=False, use_freq_mask=False, use_noise=False)
+    per_sample = build_transforms(params)
+    sample_transform, batch_transform = build_transforms(params, split=True)
+
+    waveforms = torch.randn(3, 16000)
+    waveforms[1] *= 0.01  # quiet example: dB clamping must stay per example
+    expected = torch.stack([per_sample(w) for w in waveforms])
+
+    out = batch_transform(torch.stack([sample_transform(w) for w in waveforms]))
+    assert out.shape == expected.shape
+    assert torch.allclose(out, expected, atol=1e-3)
+
+def test_batch_transform_augments_each_example():
+    params = ExpParams(use_mfcc=True, use_time_mask=False, use_freq_mask=False,
+                       use_noise=True, noise_p=1.0, noise_std=1.0)
+    _, batch_transform = build_transforms(params, split=True)
+
+    out = batch_transform(torch.zeros(2, 16000))
+    assert out.shape[:2] == (2, 1)
+    assert not torch.equal(out[0], out[1]), "Each example should get its own noise"
+
+def test_batch_masks_match_per_sample_distribution():
+    from transforms.masking import RandomTimeMask, RandomFreqMask, BatchRandomTimeMask, BatchRandomFreqMask
+
+    torch.manual_seed(0)
+    n = 4000
+    x = torch.ones(n, 1, 40, 81)
+    for per_sample, batched in [(RandomTimeMask(30, p=0.5), BatchRandomTimeMask(30, p=0.5)),
+                                (RandomFreqMask(10, p=0.5), BatchRandomFreqMask(10, p=0.5))]:
+        single = torch.stack([per_sample(example) for example in x[:n // 4]])
+        batch = batched(x)
+
+        masked_single = (single == 0).flatten(1).float().mean(1)
+        masked_batch = (batch == 0).flatten(1).float().mean(1)
+        assert abs(masked_single.mean() - masked_batch.mean()) < 0.01
+        assert abs((masked_single > 0).float().mean() - (masked_batch > 0).float().mean()) < 0.06
+        # Masks are contiguous stripes, identical across the other axis
+        assert ((batch == 0).sum(dim=(-1, -2)) % (40 if isinstance(batched, BatchRandomTimeMask) else 81) == 0).all()
+
+def test_batch_noise_is_per_example():
+    from transforms.noise import BatchAddNoise
+
+    out = BatchAddNoise(std=1.0, p=0.5)(torch.zeros(1000, 1, 4, 4))
+    noisy = out.flatten(1).abs().sum(1) > 0
+    assert 0.4 < noisy.float().mean() < 0.6
+    assert torch.allclose(out[noisy].std(), torch.tensor(1.0), atol=0.1)
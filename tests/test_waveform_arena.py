@@ -0,0 +1,47 @@
+import pickle
+import torch
+import torchaudio
+from data_utils.parser import parse_manifest, dataset_from_manifest
+from data_utils.waveform_arena import WaveformArena
+
+
+def build_arena(data_dir, **kwargs):
+    records = parse_manifest(data_dir)
+    file_paths, _, _, _ = dataset_from_manifest(data_dir, records)
+    arena = WaveformArena.build(
+        file_paths,
+        target_sr=8000,
+        sample_rates=[r.sample_rate for r in records],
+        num_frames=[r.num_frames for r in records],
+        **kwargs,
+    )
+    return file_paths, arena
+
+
+def test_arena_matches_decoded_audio(wav_corpus):
+    file_paths, arena = build_arena(wav_corpus)
+
+    assert len(arena) == len(file_paths)
+    for i, path in enumerate(file_paths):
+        waveform, sr = torchaudio.load(path)
+        expected = torchaudio.functional.resample(waveform, sr, 8000).squeeze(0)
+        assert torch.allclose(arena.get(i), expected)
+
+
+def test_arena_int16_budget_and_memmap(wav_corpus, tmp_path):
+    path = tmp_path / "arena.bin"
+    file_paths, arena = build_arena(wav_corpus, storage="int16", max_bytes=3 * 5200 * 2, path=path)
+
+    stored = [i for i in range(len(file_paths)) if i in arena]
+    assert 0 < len(stored) < len(file_paths), "Budget should leave some files out"
+    assert arena.nbytes <= 3 * 5200 * 2
+
+    waveform, sr = torchaudio.load(file_paths[0])
+    expected = torchaudio.functional.resample(waveform, sr, 8000).squeeze(0)
+    assert torch.allclose(arena.get(0), expected, atol=1e-4)
+
+    clone = pickle.loads(pickle.dumps(arena))
+    assert torch.equal(clone.get(0), arena.get(0))
+
+    _, reused = build_arena(wav_corpus, storage="int16", max_bytes=3 * 5200 * 2, path=path)
+    assert torch.equal(reused.get(stored[-1]), arena.get(stored[-1]))
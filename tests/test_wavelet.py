@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import pywt
+import torch
+from transforms.wavelet import WaveletTransform, TorchWaveletTransform
+
+
+@pytest.mark.parametrize("mode", TorchWaveletTransform.SUPPORTED_MODES)
+@pytest.mark.parametrize("wavelet", ["haar", "db4", "coif1", "sym5", "bior2.2"])
+def test_torch_wavelet_matches_pywt(wavelet, mode):
+    rng = np.random.default_rng(0)
+    signals = rng.standard_normal((3, 1001))
+    transform = TorchWaveletTransform(wavelet=wavelet, level=4, mode=mode).double()
+
+    out = transform(torch.from_numpy(signals))
+
+    for signal, coeffs in zip(signals, out):
+        expected = pywt.wavedec(signal, wavelet, mode=mode, level=4)
+        for level, c in enumerate(expected):
+            n = min(len(c), coeffs.shape[-1])
+            np.testing.assert_allclose(coeffs[level, :n].numpy(), c[:n], atol=1e-10)
+
+
+def test_torch_wavelet_matches_numpy_transform():
+    waveform = torch.randn(16000)
+    expected = WaveletTransform(wavelet="db4", level=5, mode="symmetric")(waveform)
+    transform = TorchWaveletTransform(wavelet="db4", level=5, mode="symmetric")
+
+    assert transform(waveform).shape == (1, *expected.shape)
+    assert torch.allclose(transform(waveform)[0], expected, atol=1e-4)
+    batch = transform(torch.stack([waveform, waveform]).unsqueeze(1))
+    assert batch.shape == (2, 1, *expected.shape)
+
+
+def test_torch_wavelet_short_signal_and_bad_mode():
+    transform = TorchWaveletTransform(wavelet="db4", level=1, mode="reflect").double()
+    signal = np.arange(5.0)
+    expected = pywt.wavedec(signal, "db4", mode="reflect", level=1)
+    np.testing.assert_allclose(transform(torch.from_numpy(signal))[0, 0].numpy(), expected[0])
+
+    with pytest.raises(ValueError):
+        TorchWaveletTransform(mode="smooth")